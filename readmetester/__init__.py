@@ -5,7 +5,19 @@ readmetester
 Parse, test, and assert RST code-blocks
 """
 from . import exceptions
-from ._main import main
+from ._main import Result, main, run, run_blocks
+from ._memory import Memory
+from ._plugins import Plugin, merge_reports
 from ._version import __version__
 
-__all__ = ["__version__", "exceptions", "main"]
+__all__ = [
+    "Memory",
+    "Plugin",
+    "Result",
+    "__version__",
+    "exceptions",
+    "main",
+    "merge_reports",
+    "run",
+    "run_blocks",
+]
@@ -2,26 +2,44 @@
 readmetester._assert
 ====================
 """
+import contextlib as _contextlib
+import functools as _functools
+import re as _re
 import sys as _sys
 import typing as _t
+from importlib import metadata as _metadata
 from pathlib import Path as _Path
 from warnings import warn as _warn
 
+import docutils as _docutils
 import restructuredtext_lint as _restructuredtext_lint
 
+from . import _diff
 from . import exceptions as _exceptions
-from ._core import CROSS as _CROSS
+from ._core import Block as _Block
 from ._core import Readme as _Readme
+from ._holder import format_duration as _format_duration
+from ._holder import format_size as _format_size
+from ._store import LintCache as _LintCache
+from ._trace import tracer as _tracer
+
+_INCLUDE = _re.compile(r"^\s*\.\. include::\s*(.+?)\s*$", _re.MULTILINE)
 
 
 def equality(
-    actual: _t.Optional[str], expected: _t.Optional[str], code_block: str
+    actual: _t.Optional[str],
+    expected: _t.Optional[str],
+    code_block: str,
+    output: _t.Optional[_t.Tuple[_t.Sequence[str], _t.Sequence[str]]] = None,
 ) -> None:
     """Test actual value against expected value.
 
     :param actual: Actual command output.
     :param expected: Expected command output.
     :param code_block: code-block x of all code-blocks.
+    :param output: All actual and expected output of the code-block, to
+        show the diff of if assertion fails, which is only read if it
+        does, so need not be copied.
     :raises OutputDocumentError: If assertion fails.
     """
     if actual is not None and expected is not None:
@@ -29,9 +47,13 @@ def equality(
             assert actual == expected
 
         except AssertionError as err:
-            print(_CROSS)
             raise _exceptions.OutputNotEqualError(
-                code_block, actual, expected
+                code_block,
+                _diff.trim(actual),
+                _diff.trim(expected),
+                None
+                if output is None
+                else _diff.unified(output[1], output[0]),
             ) from err
 
 
@@ -55,14 +77,148 @@ def actual_expected(
         raise _exceptions.OutputNotExpectedError(code_block, actual)
 
 
-def syntax(path: _t.Union[str, _Path]) -> None:
+@_functools.lru_cache(maxsize=None)
+def _budget_code_block() -> _t.Any:
+    # code-block directive accepting the options setting a budget, which
+    # is only created when needed, as the directives import pygments
+    # pylint: disable=import-outside-toplevel
+    from docutils.parsers.rst import directives
+    from docutils.parsers.rst.directives.body import CodeBlock
+
+    class _BudgetCodeBlock(CodeBlock):
+        option_spec = dict(
+            CodeBlock.option_spec,
+            **{i: directives.unchanged for i in _Block.OPTIONS},
+        )
+
+    return _BudgetCodeBlock
+
+
+@_contextlib.contextmanager
+def _register_options() -> _t.Iterator[None]:
+    # accept the options setting a budget only while linting, so the
+    # directive registered for the rest of the process is left as it was
+    # pylint: disable=import-outside-toplevel,protected-access
+    from docutils.parsers.rst import directives
+
+    registered = directives._directives
+    previous = registered.get("code-block")
+    directives.register_directive("code-block", _budget_code_block())
+    try:
+        yield
+    finally:
+        if previous is None:
+            registered.pop("code-block", None)
+        else:
+            registered["code-block"] = previous
+
+
+@_functools.lru_cache(maxsize=None)
+def _versions() -> str:
+    # versions of the packages linting README, which results depend on
+    return (
+        f"{_docutils.__version__};"
+        f"{_metadata.version('restructuredtext-lint')}"
+    )
+
+
+def _includes(path: _Path, content: str) -> _t.List[str]:
+    # path and content of each file README includes, as its result
+    # depends on them as well, and relative paths are resolved from the
+    # file including them
+    includes = []
+    seen = set()
+    stack = [(path, content)]
+    while stack:
+        parent, text = stack.pop()
+        for match in _INCLUDE.finditer(text):
+            name = match.group(1)
+
+            # standard includes are versioned along with docutils
+            if name.startswith("<"):
+                continue
+
+            include = parent.parent / name
+            if include in seen:
+                continue
+
+            seen.add(include)
+            try:
+                included = include.read_text(encoding="utf-8")
+            except OSError:
+                includes.append(str(include))
+                continue
+
+            includes.append(f"{include}\0{included}")
+            stack.append((include, included))
+
+    return includes
+
+
+def lint(
+    path: _t.Union[str, _Path],
+    content: _t.Optional[str] = None,
+    cache: _t.Optional[_Path] = None,
+) -> _t.Optional[str]:
+    """Lint README without raising, so it can be run in another process.
+
+    If cached, README is only linted again if it, or any file it
+    includes, changed.
+
+    :param path: Path to README.
+    :param content: Content of README, if not to be read from path.
+    :param cache: Directory to cache results in, if any.
+    :return: Message of the first error, if there is one.
+    """
+    with _tracer.span("lint", "lint"):
+        if content is None:
+            content = _Path(path).read_text(encoding="utf-8")
+
+        key = None
+        if cache is not None:
+            key = _LintCache.key(
+                str(path),
+                content,
+                _versions(),
+                _includes(_Path(path), content),
+            )
+            try:
+                return _LintCache(cache)[key]
+            except KeyError:
+                pass
+
+        with _register_options():
+            errors = _restructuredtext_lint.lint(content, str(path))
+
+        message = errors[0].full_message if errors else None
+        if cache is not None and key is not None:
+            _LintCache(cache)[key] = message
+
+        return message
+
+
+def linted(message: _t.Optional[str]) -> None:
+    """Raise the error found by linting README, if there was one.
+
+    :param message: Message of the first error, if there is one.
+    :raises SyntaxDocumentError: If there was an error.
+    """
+    if message is not None:
+        raise _exceptions.SyntaxDocumentError(message)
+
+
+def syntax(
+    path: _t.Union[str, _Path],
+    content: _t.Optional[str] = None,
+    cache: _t.Optional[_Path] = None,
+) -> None:
     """Check README for valid syntax.
 
     :param path: Path to README.
+    :param content: Content of README, if not to be read from path.
+    :param cache: Directory to cache results in, if any.
     """
-    errors = _restructuredtext_lint.lint_file(str(path))
-    if errors:
-        raise _exceptions.SyntaxDocumentError(errors[0].full_message)
+    linted(lint(path, content, cache))
 
 
 def code_blocks(readme: _Readme) -> None:
@@ -70,6 +226,87 @@ def code_blocks(readme: _Readme) -> None:
 
     :param readme: Instantiated ``Readme`` object.
     """
-    if not readme:
+    if not readme and not readme.console:
         _warn("file contains no code-blocks", RuntimeWarning)
         _sys.exit(0)
+
+
+def commands(readme: _Readme, path: _t.Union[str, _Path]) -> None:
+    """Check every command in README compiles before any are executed.
+
+    :param readme: Instantiated ``Readme`` object.
+    :param path: Path to README.
+    :raises CommandSyntaxError: If any command is invalid Python.
+    """
+    errors = readme.compile(str(path))
+    if errors:
+        raise _exceptions.CommandSyntaxError(
+            "\n".join(
+                f"code-block {c}: line {e.lineno}: {e.msg}" for c, e in errors
+            )
+        )
+
+
+def options(readme: _Readme) -> None:
+    """Check the options of every code-block before any are executed.
+
+    :param readme: Instantiated ``Readme`` object.
+    :raises SyntaxDocumentError: If any option setting a budget is
+        invalid, or is set for a console block.
+    """
+    errors = []
+    for count, block in enumerate(readme, 1):
+        try:
+            block.validate()
+        except ValueError as err:
+            errors.append(f"code-block {count}: {err}")
+
+    for count, block in enumerate(readme.console, 1):
+        try:
+            block.validate()
+        except ValueError as err:
+            errors.append(f"console-block {count}: {err}")
+
+        # console blocks are not timed or traced, so cannot be held to a
+        # budget
+        errors.extend(
+            f"console-block {count}: {i} is not supported"
+            for i in _Block.BUDGETS
+            if i in block.options
+        )
+
+    if errors:
+        raise _exceptions.SyntaxDocumentError("\n".join(errors))
+
+
+def budget(
+    block: _Block,
+    duration: _t.Optional[float],
+    peak: _t.Optional[int],
+    code_block: str,
+) -> None:
+    """Test code-block is within the budgets set by its options.
+
+    :param block: Code-block with options.
+    :param duration: Seconds code-block took, if timed.
+    :param peak: Peak bytes code-block allocated, if traced.
+    :param code_block: code-block x of all code-blocks.
+    :raises BudgetExceededError: If a budget is exceeded.
+    """
+    max_time = block.max_time
+    if duration is not None and max_time is not None and duration > max_time:
+        raise _exceptions.BudgetExceededError(
+            code_block,
+            "max-time",
+            _format_duration(duration),
+            block.options["max-time"],
+        )
+
+    max_memory = block.max_memory
+    if peak is not None and max_memory is not None and peak > max_memory:
+        raise _exceptions.BudgetExceededError(
+            code_block,
+            "max-memory",
+            _format_size(peak),
+            block.options["max-memory"],
+        )
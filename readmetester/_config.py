@@ -0,0 +1,232 @@
+"""
+readmetester._config
+====================
+
+Load settings from pyproject.toml.
+"""
+from __future__ import annotations
+
+import functools as _functools
+import re as _re
+import typing as _t
+from pathlib import Path as _Path
+from tempfile import gettempdir as _gettempdir
+
+from pyproject_parser import PyProject as _PyProject
+
+from ._highlight import highlight_builtin as _highlight_builtin
+from ._highlight import highlight_pygments as _highlight_pygments
+
+NAME = __name__.split(".", maxsplit=1)[0]
+
+
+class Normalizer:  # pylint: disable=too-few-public-methods
+    """Normalize non-deterministic output so it can be documented.
+
+    All rules are combined into a single pattern, so each line is only
+    scanned once. Lines which contain none of the characters that the
+    rules could match are returned as they are without being scanned.
+
+    :param names: Names of built-in rules to apply.
+    :param patterns: Additional patterns mapped to literal replacements.
+    :raises ValueError: If a built-in rule does not exist.
+    """
+
+    _RULES = {
+        "hex": (r"(?: object)? at 0x[0-9A-Fa-f]+", " at ", "x"),
+        "uuid": (
+            r"\b[0-9A-Fa-f]{8}(?:-[0-9A-Fa-f]{4}){3}-[0-9A-Fa-f]{12}\b",
+            "<uuid>",
+            "-",
+        ),
+        "timestamp": (
+            r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?"
+            r"(?:Z|[+-]\d{2}:?\d{2})?",
+            "<timestamp>",
+            "-",
+        ),
+        "tmp": (
+            _re.escape(_gettempdir()) + r"[^\s'\"]*",
+            "<tmp>",
+            _gettempdir()[0],
+        ),
+        "duration": (
+            r"\b\d+(?:\.\d+)?\s?(?:ns|us|\u00b5s|ms|s)\b",
+            "<duration>",
+            "s",
+        ),
+    }
+
+    def __init__(
+        self, names: _t.Iterable[str], patterns: _t.Mapping[str, str]
+    ) -> None:
+        rules = []
+        triggers: _t.Optional[_t.Set[str]] = set()
+        for name in names:
+            if name not in self._RULES:
+                raise ValueError(f"unknown normalizer: {name}")
+
+            pattern, replacement, trigger = self._RULES[name]
+            rules.append((pattern, replacement))
+            if triggers is not None:
+                triggers.update(trigger)
+
+        # there is no telling what a user defined pattern could match,
+        # so every line needs to be scanned
+        if patterns:
+            triggers = None
+            rules.extend(patterns.items())
+
+        self._triggers = None if triggers is None else frozenset(triggers)
+        self._replacements = {f"n{c}": r for c, (_, r) in enumerate(rules)}
+        self._pattern = (
+            _re.compile(
+                "|".join(f"(?P<n{c}>{p})" for c, (p, _) in enumerate(rules))
+            )
+            if rules
+            else None
+        )
+
+    def _replace(self, match: _t.Match[str]) -> str:
+        return self._replacements[str(match.lastgroup)]
+
+    def __call__(self, value: str) -> str:
+        if self._pattern is None or (
+            self._triggers is not None and self._triggers.isdisjoint(value)
+        ):
+            return value
+
+        return self._pattern.sub(self._replace, value)
+
+
+class Config:
+    """Settings from the ``[tool.readmetester]`` table of pyproject.toml.
+
+    :param path: Path to pyproject.toml, which does not need to exist.
+    :param options: Options to use instead of those configured.
+    """
+
+    def __init__(self, path: _Path, **options: _t.Any) -> None:
+        # paths are relative to where config was loaded, so they do not
+        # move if a document changes the working directory
+        self._cwd = _Path.cwd()
+        self._tool: _t.Dict[str, _t.Any] = {}
+        if path.is_file():
+            self._tool = dict(_PyProject.load(path).tool.get(NAME, {}))
+
+        self._tool.update(options)
+
+    @property
+    def style(self) -> str:
+        """Style to highlight commands with."""
+        return self._tool.get("style", "default")
+
+    @property
+    def highlight(self) -> _t.Callable[[str], str]:
+        """Highlight commands with the configured highlighter.
+
+        :raises ValueError: If highlighter does not exist.
+        """
+        highlighter = self._tool.get("highlighter", "pygments")
+        if highlighter == "builtin":
+            return _highlight_builtin
+
+        if highlighter == "pygments":
+            return _highlight_pygments(self.style)
+
+        raise ValueError(f"unknown highlighter: {highlighter}")
+
+    @property
+    def concurrent(self) -> bool:
+        """Run independent chains which await concurrently."""
+        return self._tool.get("concurrent", False)
+
+    @property
+    def console(self) -> bool:
+        """Run console blocks as well as python code-blocks."""
+        return self._tool.get("console", False)
+
+    @property
+    def isolate(self) -> bool:
+        """Restore the state of the interpreter after each document."""
+        return self._tool.get("isolate", False)
+
+    @property
+    def console_timeout(self) -> float:
+        """Seconds a command of a console block can run for."""
+        return self._tool.get("console_timeout", 60)
+
+    @property
+    def console_jobs(self) -> int:
+        """Number of commands of console blocks to run at once."""
+        return self._tool.get("console_jobs", 8)
+
+    @property
+    def memory(self) -> bool:
+        """Trace the memory allocated by each code-block."""
+        return self._tool.get("memory", False)
+
+    @property
+    def retained_threshold(self) -> int:
+        """Bytes a code-block can retain before it is flagged."""
+        return self._tool.get("retained_threshold", 1 << 20)
+
+    @property
+    def bench(self) -> bool:
+        """Benchmark each code-block against its baseline."""
+        return self._tool.get("bench", False)
+
+    @property
+    def bench_threshold(self) -> float:
+        """Percentage slower than baseline that is a regression."""
+        return self._tool.get("bench_threshold", 10)
+
+    @property
+    def cache(self) -> bool:
+        """Store results between runs, such as those of linting."""
+        return self._tool.get("cache", False)
+
+    @property
+    def durations(self) -> _t.Optional[_Path]:
+        """File shared between shards to record durations in, if any."""
+        value = self._tool.get("durations")
+        return None if value is None else self._cwd / value
+
+    @property
+    def cache_dir(self) -> _Path:
+        """Directory to store data between runs in."""
+        return self._cwd / self._tool.get("cache_dir", f".{NAME}_cache")
+
+    @_functools.cached_property
+    def normalizer(self) -> Normalizer:
+        """Normalizer to apply to actual and expected output."""
+        return Normalizer(
+            self._tool.get("normalize", ["hex"]),
+            self._tool.get("patterns", {}),
+        )
+
+
+@_functools.lru_cache(maxsize=None)
+def _load_config(path: _Path, _: _t.Optional[int]) -> Config:
+    return Config(path)
+
+
+def load_config(path: _t.Optional[_Path] = None, **options: _t.Any) -> Config:
+    """Load config, which is only parsed again if the file changes.
+
+    :param path: Directory containing pyproject.toml, defaults to the
+        current working directory.
+    :param options: Options to use instead of those configured, which
+        are not cached.
+    :return: Instantiated ``Config`` object.
+    """
+    pyproject_file = (_Path.cwd() if path is None else path) / "pyproject.toml"
+    if options:
+        return Config(pyproject_file, **options)
+
+    try:
+        mtime: _t.Optional[int] = pyproject_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    return _load_config(pyproject_file, mtime)
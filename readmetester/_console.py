@@ -0,0 +1,142 @@
+"""
+readmetester._console
+=====================
+
+Run the commands of console blocks in a pool of subprocesses.
+"""
+import asyncio as _asyncio
+import os as _os
+import signal as _signal
+import tempfile as _tempfile
+import time as _time
+import typing as _t
+from asyncio.subprocess import Process as _Process
+
+from ._core import Block as _Block
+
+_PROMPT = "$ "
+_CONTINUATION = "\\"
+
+
+class Command(_t.NamedTuple):
+    """Command of a console block, with its documented output."""
+
+    lineno: int
+    command: str
+    expected: _t.List[str]
+
+
+class Ran(_t.NamedTuple):
+    """Command that was run, with the output it returned.
+
+    Return code is None if the command timed out.
+    """
+
+    command: Command
+    output: _t.List[str]
+    returncode: _t.Optional[int]
+
+
+def commands(block: _Block) -> _t.List[Command]:
+    """Parse the commands of a console block.
+
+    Commands begin with ``"$ "``, and continue onto the next line if
+    they end with a backslash. Any other lines are the output of the
+    command before them.
+
+    :param block: Console block.
+    :return: List of commands.
+    """
+    parsed: _t.List[Command] = []
+    continued = False
+    for line in block:
+        if continued:
+            parsed[-1] = parsed[-1]._replace(
+                command=f"{parsed[-1].command}\n{line}"
+            )
+        elif line.startswith(_PROMPT):
+            parsed.append(Command(line.lineno, line[len(_PROMPT) :], []))
+        elif parsed:
+            parsed[-1].expected.append(line)
+
+        continued = line.endswith(_CONTINUATION)
+
+    return parsed
+
+
+def _kill(process: _Process) -> None:
+    # kill the group of the shell, as anything it started could still
+    # hold its output open
+    try:
+        _os.killpg(process.pid, _signal.SIGKILL)
+    except (AttributeError, ProcessLookupError):  # pragma: no cover
+        process.kill()
+
+
+async def _run(
+    command: Command, cwd: str, semaphore: _asyncio.Semaphore, timeout: float
+) -> Ran:
+    async with semaphore:
+        process = await _asyncio.create_subprocess_shell(
+            command.command,
+            cwd=cwd,
+            stdout=_asyncio.subprocess.PIPE,
+            stderr=_asyncio.subprocess.STDOUT,
+            start_new_session=True,
+        )
+        try:
+            stdout, _ = await _asyncio.wait_for(process.communicate(), timeout)
+        except _asyncio.TimeoutError:
+            _kill(process)
+            await process.wait()
+            return Ran(command, [], None)
+
+    # blank lines cannot be documented, as they end the block
+    output = stdout.decode("utf-8", errors="replace").splitlines()
+    return Ran(
+        command, [i.rstrip() for i in output if i.strip()], process.returncode
+    )
+
+
+async def _run_block(
+    block: _Block, semaphore: _asyncio.Semaphore, timeout: float
+) -> _t.Tuple[_t.List[Ran], float]:
+    # commands of a block run in order, in a working directory of their
+    # own, and the block stops at the first to time out
+    ran = []
+    start = _time.perf_counter()
+    with _tempfile.TemporaryDirectory() as cwd:
+        for command in commands(block):
+            ran.append(await _run(command, cwd, semaphore, timeout))
+            if ran[-1].returncode is None:
+                break
+
+    return ran, _time.perf_counter() - start
+
+
+async def _gather(
+    blocks: _t.List[_Block], jobs: int, timeout: float
+) -> _t.List[_t.Tuple[_t.List[Ran], float]]:
+    semaphore = _asyncio.Semaphore(jobs)
+    return list(
+        await _asyncio.gather(
+            *(_run_block(i, semaphore, timeout) for i in blocks)
+        )
+    )
+
+
+def run(
+    blocks: _t.List[_Block], jobs: int, timeout: float
+) -> _t.List[_t.Tuple[_t.List[Ran], float]]:
+    """Run console blocks concurrently.
+
+    No more than ``jobs`` commands are run at once, and each command is
+    killed if it runs for longer than ``timeout`` seconds.
+
+    :param blocks: Console blocks.
+    :param jobs: Number of commands to run at once.
+    :param timeout: Seconds each command can run for.
+    :return: Commands that were run of each block, and the seconds the
+        block took.
+    """
+    return _asyncio.run(_gather(blocks, jobs, timeout))
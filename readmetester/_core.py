@@ -2,28 +2,25 @@
 readmetester._core
 ==================
 """
-# pylint: disable=consider-using-f-string
 from __future__ import annotations
 
-import contextlib as _contextlib
+import ast as _ast
 import os as _os
+import re as _re
+import statistics as _statistics
 import sys as _sys
 import typing as _t
 from argparse import ArgumentParser as _ArgumentParser
+from argparse import ArgumentTypeError as _ArgumentTypeError
+from argparse import Namespace as _Arguments
 from collections.abc import MutableSequence as _MutableSequence
-from io import StringIO as _StringIO
 from pathlib import Path as _Path
 
 from object_colors import Color as _Color
-from pygments import highlight as _highlight
-from pygments.formatters.terminal256 import (
-    Terminal256Formatter as _Terminal256Formatter,
-)
-
-# noinspection PyUnresolvedReferences
-from pygments.lexers.python import PythonLexer as _PythonLexer
-from pyproject_parser import PyProject as _PyProject
 
+from ._config import NAME as _NAME
+from ._exec import Unit as _Unit
+from ._trace import tracer as _tracer
 from ._version import __version__
 
 color = _Color()
@@ -31,35 +28,80 @@ color.populate("fore")
 for foreground in color.colors:
     getattr(color, foreground).populate("effect")
 
-NAME = __name__.split(".", maxsplit=1)[0]
 README = "README.rst"
+DISCOVER = "discover"
 CHECK = color.green.get("\u2713")
 CROSS = color.red.get("\u2716")
 
+_STAR = "*"
 
 _os.environ["PYCHARM_HOSTED"] = "True"
 
 
-class ExecStatus:
-    """Holds status of running exec."""
+def _quantity(value: str, units: _t.Mapping[str, float]) -> float:
+    # parse a documented number, which may be followed by a unit
+    match = _re.fullmatch(r"(\d+(?:\.\d+)?)\s*(\S*)", value)
+    if match is None or match.group(2) not in units:
+        raise ValueError
+
+    return float(match.group(1)) * units[match.group(2)]
+
+
+def _isfuture(tree: _ast.Module) -> bool:
+    # command is a future statement
+    return (
+        bool(tree.body)
+        and isinstance(tree.body[0], _ast.ImportFrom)
+        and tree.body[0].module == "__future__"
+    )
+
+
+def _getnames(
+    tree: _ast.AST, stored: _t.Set[str], loaded: _t.Set[str]
+) -> None:
+    # collect the names a tree binds, and the names it uses which were
+    # not already bound by a previous tree
+    bound = set(stored)
+    for node in _ast.walk(tree):
+        if isinstance(node, _ast.Name):
+            if isinstance(node.ctx, _ast.Load):
+                if node.id not in bound:
+                    loaded.add(node.id)
+            else:
+                stored.add(node.id)
+
+        elif isinstance(node, (_ast.Import, _ast.ImportFrom)):
+            stored.update(
+                (i.asname or i.name).split(".", maxsplit=1)[0]
+                for i in node.names
+            )
 
-    def __init__(self) -> None:
-        self._switch = False
+        elif isinstance(
+            node, (_ast.FunctionDef, _ast.AsyncFunctionDef, _ast.ClassDef)
+        ):
+            stored.add(node.name)
 
-    @property
-    def in_exec(self) -> bool:
-        """Running in exec, True or False."""
-        return self._switch
 
-    @_contextlib.contextmanager
-    def context(self) -> _t.Generator[ExecStatus, None, None]:
-        """Run exec within context.
+def _shard(value: str) -> _t.Tuple[int, int]:
+    # parse shard of the form ``i/n``, counting from 1
+    try:
+        index, count = (int(i) for i in value.split("/"))
+    except ValueError as err:
+        raise _ArgumentTypeError(f"invalid shard: {value}") from err
 
-        :return: Yield self.
-        """
-        self._switch = True
-        yield self
-        self._switch = False
+    if not 0 < index <= count:
+        raise _ArgumentTypeError(f"invalid shard: {value}")
+
+    return index, count
+
+
+def _interpreters(value: str) -> _t.List[str]:
+    # parse comma separated interpreters
+    interpreters = [i.strip() for i in value.split(",") if i.strip()]
+    if not interpreters:
+        raise _ArgumentTypeError(f"invalid interpreters: {value}")
+
+    return interpreters
 
 
 class Parser(_ArgumentParser):
@@ -67,14 +109,137 @@ class Parser(_ArgumentParser):
 
     def __init__(self) -> None:
         readme = _Path.cwd() / README
-        if len(_sys.argv) < 2:
-            _sys.argv.append(str(readme))
-
-        super().__init__(prog=color.cyan.get(NAME))
+        super().__init__(prog=color.cyan.get(_NAME))
         self._version_request()
-        self.add_argument("file", metavar=README, nargs="?", action="store")
+        self.add_argument(
+            "file",
+            metavar=README,
+            nargs="*",
+            default=[str(readme)],
+            action="store",
+        )
+        self.add_argument(
+            "-p",
+            "--package",
+            metavar="NAME",
+            help="test docstrings of package NAME instead of README",
+        )
+        self.add_argument(
+            "-i",
+            "--interpreters",
+            metavar="LIST",
+            type=_interpreters,
+            help="test under each comma separated interpreter of LIST",
+        )
+        self.add_argument(
+            "-e",
+            "--exclude",
+            metavar="GLOB",
+            action="append",
+            default=[],
+            help="exclude documents matching GLOB when discovering",
+        )
+        self.add_argument(
+            "-v",
+            "--verbose",
+            action="store_true",
+            help="show commands and output of passing code-blocks",
+        )
+        self.add_argument(
+            "-c",
+            "--concurrent",
+            action="store_true",
+            help="run independent code-blocks which await concurrently",
+        )
+        self.add_argument(
+            "--console",
+            action="store_true",
+            help="run console blocks as well as python code-blocks",
+        )
+        self.add_argument(
+            "--isolate",
+            action="store_true",
+            help="restore the state of the interpreter after each README",
+        )
+        self.add_argument(
+            "-m",
+            "--memory",
+            action="store_true",
+            help="trace the memory allocated by each code-block",
+        )
+        self.add_argument(
+            "-b",
+            "--bench",
+            action="store_true",
+            help="benchmark each code-block against its baseline",
+        )
+        self.add_argument(
+            "-t",
+            "--trace",
+            metavar="FILE",
+            type=_Path,
+            help="write Chrome trace events of the run to FILE",
+        )
+        self.add_argument(
+            "-s",
+            "--shard",
+            metavar="I/N",
+            type=_shard,
+            help="only test shard I of N, balanced by recorded durations",
+        )
+        self.add_argument(
+            "--durations",
+            metavar="FILE",
+            type=_Path,
+            help="balance shards by the durations recorded in FILE",
+        )
+        self.add_argument(
+            "--lf",
+            "--last-failed",
+            action="store_true",
+            help="only test code-blocks which failed when last run",
+        )
+        self.add_argument(
+            "--ff",
+            "--failed-first",
+            action="store_true",
+            help="test READMEs which failed when last run first",
+        )
+        self.add_argument(
+            "-r",
+            "--report",
+            metavar="FILE",
+            type=_Path,
+            help="write a JSON report of each code-block to FILE",
+        )
+        self.add_argument(
+            "-o",
+            "--output",
+            metavar="FILE",
+            type=_Path,
+            help="write output to FILE instead of stdout",
+        )
         self._args = self.parse_args()
-        self.file = _Path(self._args.file)
+        self.discover: _t.Optional[_Path] = None
+        if self._args.file[:1] == [DISCOVER]:
+            if len(self._args.file) > 2:
+                self.error(f"{DISCOVER} takes one root")
+
+            # the documents discovered would be ignored
+            for option in ("package", "interpreters"):
+                if getattr(self._args, option) is not None:
+                    self.error(f"{DISCOVER} cannot be used with --{option}")
+
+            self.discover = _Path(*self._args.file[1:])
+            self._args.file = [str(readme)]
+
+        self.files = [_Path(i) for i in self._args.file]
+        self.file = self.files[0]
+
+    @property
+    def args(self) -> _Arguments:
+        """Parsed commandline arguments."""
+        return self._args
 
     def _version_request(self) -> None:
         # print version if `--version` is passed to commandline
@@ -83,7 +248,7 @@ class Parser(_ArgumentParser):
             version, action="store_true", help="show version and exit"
         )
         # the only exception for not providing positional args
-        if _sys.argv[1] == version:
+        if _sys.argv[1:2] == [version]:
             print(__version__)
             _sys.exit(0)
 
@@ -129,6 +294,8 @@ class Code(str):
     _SINGLE_QUOTE = "'"
     _DOUBLE_QUOTE = '"'
     _START_BLOCK = ".. code-block:: python"
+    _START_CONSOLE = ".. code-block:: console"
+    _OPTION = _re.compile(r":([\w-]+):(.*)")
     _END_DOT = ".."
     _LINEBREAK = ""
     _CODE_BREAK = ">>>"
@@ -144,8 +311,15 @@ class Code(str):
     _CONTINUED = _COLON, _COMMA
     _QUOTES = _SINGLE_QUOTE, _DOUBLE_QUOTE
 
-    def __new__(cls, item: str) -> Code:
-        return super().__new__(cls, item.lstrip())
+    lineno: int
+
+    def __new__(cls, item: str, lineno: int = 0) -> Code:
+        value = item.lstrip()
+        code = super().__new__(cls, value)
+
+        # account for any leading newlines stripped from the value
+        code.lineno = lineno + item[: len(item) - len(value)].count("\n")
+        return code
 
     def iscode(self) -> bool:
         """Test if this is a line of code.
@@ -187,7 +361,7 @@ class Code(str):
 
         :return: Instance of ``Code`` without quotes.
         """
-        return Code(self[1:-1:]) if self.isquoted() else self
+        return Code(self[1:-1:], self.lineno) if self.isquoted() else self
 
     def isstartblock(self) -> bool:
         """Test that this starts a block.
@@ -196,6 +370,25 @@ class Code(str):
         """
         return self == self._START_BLOCK
 
+    def isstartconsole(self) -> bool:
+        """Test that this starts a console block.
+
+        :return: This starts a console block, True or False.
+        """
+        return self == self._START_CONSOLE
+
+    def getoption(self) -> _t.Optional[_t.Tuple[str, str]]:
+        """Get the name and value of this option of a directive.
+
+        :return: Tuple of name and value, or None if this is not an
+            option.
+        """
+        match = self._OPTION.fullmatch(self)
+        if match is None:
+            return None
+
+        return match.group(1), match.group(2).strip()
+
     def isenddot(self) -> bool:
         """Test that this is a dot to end a block.
 
@@ -215,10 +408,13 @@ class Code(str):
 
         :return: Instance of ``Code`` without starters.
         """
-        return Code(self[4:])
+        return Code(self[4:], self.lineno)
 
     def splitlines(self, keepends: bool = False) -> _t.List[str]:
-        return [Code(i) for i in super().splitlines(keepends)]
+        return [
+            Code(i, self.lineno + c)
+            for c, i in enumerate(super().splitlines(keepends))
+        ]
 
     def iscontinued(self) -> bool:
         """Test that this is a continuation of code.
@@ -300,9 +496,104 @@ class OpenReadme:
     def read(self) -> Code:
         """Read file contents into ``Code`` object.
 
-        :return: ``Code`` object.
+        :return: ``Code`` object, starting on line 1.
+        """
+        return Code(self._fin.read(), 1)
+
+
+class Block(_Seq):
+    """Lines of a code-block, with the options of its directive.
+
+    Options setting a budget are parsed when accessed.
+
+    :param lines: Lines of code-block.
+    :param options: Options of directive, mapped to their values.
+    """
+
+    _TIME_UNITS = {"": 1, "s": 1, "ms": 1e-3, "us": 1e-6, "ns": 1e-9}
+    _MEMORY_UNITS = {
+        "": 1,
+        "B": 1,
+        "KB": 1e3,
+        "MB": 1e6,
+        "GB": 1e9,
+        "KiB": 1 << 10,
+        "MiB": 1 << 20,
+        "GiB": 1 << 30,
+    }
+    _STATISTICS = {"min": min, "median": _statistics.median}
+
+    BUDGETS = ("max-time", "max-memory", "repeat", "statistic")
+    OPTIONS = (*BUDGETS, "returncode")
+
+    def __init__(
+        self, lines: _t.List[Code], options: _t.Dict[str, str]
+    ) -> None:
+        super().__init__()
+        self._list.extend(lines)
+        self._options = options
+        self.units: _t.List[_Unit] = []
+
+    def _get(
+        self, name: str, parse: _t.Callable[[str], _t.Any], default: _t.Any
+    ) -> _t.Any:
+        if name not in self._options:
+            return default
+
+        try:
+            return parse(self._options[name])
+        except (KeyError, ValueError) as err:
+            raise ValueError(f"invalid {name}: {self._options[name]}") from err
+
+    @property
+    def options(self) -> _t.Dict[str, str]:
+        """Options of directive, mapped to their values."""
+        return self._options
+
+    @property
+    def max_time(self) -> _t.Optional[float]:
+        """Seconds code-block is allowed to take, if any."""
+        return self._get(
+            "max-time", lambda x: _quantity(x, self._TIME_UNITS), None
+        )
+
+    @property
+    def max_memory(self) -> _t.Optional[float]:
+        """Peak bytes code-block is allowed to allocate, if any."""
+        return self._get(
+            "max-memory", lambda x: _quantity(x, self._MEMORY_UNITS), None
+        )
+
+    @property
+    def repeat(self) -> int:
+        """Number of times to run code-block when timing it."""
+
+        def _parse(value: str) -> int:
+            repeat = int(value)
+            if repeat < 1:
+                raise ValueError
+
+            return repeat
+
+        return self._get("repeat", _parse, 1)
+
+    @property
+    def statistic(self) -> _t.Callable[[_t.List[float]], float]:
+        """Statistic to take of the times of repeated runs."""
+        return self._get("statistic", self._STATISTICS.__getitem__, min)
+
+    @property
+    def returncode(self) -> int:
+        """Return code expected of the last command of a console block."""
+        return self._get("returncode", int, 0)
+
+    def validate(self) -> None:
+        """Check the options of the directive can be parsed.
+
+        :raises ValueError: If an option is invalid.
         """
-        return Code(self._fin.read())
+        for name in self.OPTIONS:
+            getattr(self, name.replace("-", "_"))
 
 
 class Readme(_Seq):
@@ -314,15 +605,30 @@ class Readme(_Seq):
     def __init__(self) -> None:
         super().__init__()
         self._end_line_switch = False
+        self._compiled: _t.Dict[int, _Unit] = {}
+        self._units: _t.List[_t.List[_Unit]] = []
+        self._names: _t.List[_t.Tuple[_t.Set[str], _t.Set[str]]] = []
+        self._console: _t.List[Block] = []
 
     def _partition_blocks(
-        self, elements: _t.Iterator[_t.Any], block: bool = False
+        self,
+        elements: _t.Iterator[_t.Any],
+        options: _t.Optional[_t.Dict[str, str]] = None,
     ) -> _t.Iterator[_t.Any]:
         for element in elements:
             if element.isstartblock():
-                yield list(self._partition_blocks(elements, block=True))
-
-            elif block:
+                block_options: _t.Dict[str, str] = {}
+                lines = list(self._partition_blocks(elements, block_options))
+                yield Block(lines, block_options)
+
+            # console blocks are partitioned the same way, but are held
+            # apart, so python code-blocks are numbered the same
+            elif element.isstartconsole():
+                block_options = {}
+                lines = list(self._partition_blocks(elements, block_options))
+                self._console.append(Block(lines, block_options))
+
+            elif options is not None:
                 if element.isenddot():
 
                     # block completed with two dots and not a second
@@ -341,6 +647,13 @@ class Readme(_Seq):
                     self._end_line_switch = True
                     continue
 
+                # options follow the directive, before the first newline
+                option = element.getoption()
+                if not self._end_line_switch and option is not None:
+                    name, value = option
+                    options[name] = value
+                    continue
+
                 yield element
 
     def load(self, path: _t.Union[str, _Path]) -> None:
@@ -351,181 +664,189 @@ class Readme(_Seq):
         with OpenReadme(path) as fin:
             self.extend(fin.read().splitlines())
 
-    def extend(self, values: _t.Iterable[_t.Any]) -> None:
-        super().extend(self._partition_blocks(iter(values)))
-
-
-class _Result(_Seq):
-    """``list`` for normalizing string entries for variable results."""
-
-    @staticmethod
-    def _normalize_hex(value: str) -> str:
-        # remove hex substrings returned from classes
-        string = []
-        for substring in value.split(" "):
-            if substring != "object":
-                if substring.startswith("0x"):
-                    find_index = substring.find(">")
-                    substring = substring[find_index:]
-
-                string.append(substring)
-
-        return " ".join(string)
+    def loads(self, content: str) -> None:
+        """Read README content to object.
 
-    def insert(self, index: int, value: str) -> None:
-        super().insert(index, self._normalize_hex(value))
-
-    def getindex(self, index: int) -> _t.Optional[str]:
-        """Get value by index if it exists, else None.
-
-        :param index: Index to get.
-        :return: Value if it exists, else None.
+        :param content: Content of README.
         """
-        try:
-            return self[index]
-        except IndexError:
-            return None
+        self.extend(Code(content, 1).splitlines())
 
+    def extend(self, values: _t.Iterable[_t.Any]) -> None:
+        with _tracer.span("parse", "parse"):
+            super().extend(self._partition_blocks(iter(values)))
 
-class Actual(_Result):
-    """``list`` for normalizing string entries for variable results."""
-
-
-class Total(_Result):
-    """List containing total output to display."""
-
-    @staticmethod
-    def _highlight(value: str) -> str:
-        style = "default"
-        pyproject_file = _Path.cwd() / "pyproject.toml"
-        if pyproject_file.is_file():
-            pyproject_obj = _PyProject.load(pyproject_file)
-            style = pyproject_obj.tool.get(NAME, {}).get("style", style)
+    def add_block(self, lines: _t.Iterable[str], lineno: int) -> None:
+        """Add code-block taken from a document parsed some other way.
 
-        return _highlight(
-            value, _PythonLexer(), _Terminal256Formatter(style=style)
-        )
+        Blank lines are skipped, as they are within a code-block of a
+        README, but the document has already decided where the
+        code-block ends, so they do not end it.
 
-    def append_header(self, value: str) -> None:
-        """Append ``str`` to total as stylized header.
-
-        :param value: Header ``str``.
+        :param lines: Lines of code-block, without its directive.
+        :param lineno: Line the first line of code-block is on.
         """
-        self.append(
-            "{}\n{}".format(
-                color.cyan.underline.get(80 * " "),
-                color.cyan.underline.get(value + (80 - len(value)) * " "),
-            )
-        )
-
-    def append_command(self, value: str) -> None:
-        """Append value prefixed with a dotpoint.
+        codes = (Code(i, lineno + c) for c, i in enumerate(lines))
+        with _tracer.span("parse", "parse"):
+            self.append(Block([i for i in codes if not i.islinebreak()], {}))
 
-        :param value: ``str`` to append with dotpoint.
-        """
-        self.append(f". {self._highlight(value).strip()}")
-
-    def extend(self, values: _t.Iterable[_t.Any]) -> None:
-        """Append value prefixed with a check symbol.
-
-        :param values: ``str`` to append with check symbol.
-        """
-        super().append("\n".join([f"{CHECK} {i}" for i in values]))
+    @property
+    def console(self) -> _t.List[Block]:
+        """Console blocks, in the order they are documented."""
+        return self._console
 
-    def get(self) -> str:
-        """Get the final total result.
+    @property
+    def compiled(self) -> _t.Dict[int, _Unit]:
+        """Compiled units, keyed by the line their first command is on."""
+        return self._compiled
+
+    def _add_unit(
+        self,
+        trees: _t.List[_t.Tuple[int, _ast.Module]],
+        filename: str,
+        errors: _t.List[_t.Tuple[int, SyntaxError]],
+    ) -> None:
+        # errors found compiling the commands together, such as those
+        # which are not allowed at the top level, are recorded the same
+        # as those found parsing each command
+        if trees:
+            try:
+                unit = _Unit([i for _, i in trees], filename)
+            except SyntaxError as err:
+                errors.append((len(self._units), err))
+            else:
+                self._compiled[trees[0][0]] = unit
+                self._units[-1].append(unit)
+
+            trees.clear()
+
+    def _add_tree(
+        self,
+        trees: _t.List[_t.Tuple[int, _ast.Module]],
+        tree: _t.Tuple[int, _ast.Module],
+        filename: str,
+        errors: _t.List[_t.Tuple[int, SyntaxError]],
+    ) -> None:
+        # future statements must start a module, so start a unit
+        if _isfuture(tree[1]):
+            self._add_unit(trees, filename, errors)
 
-        :return: Final total result.
-        """
-        return "\n".join(self)
+        trees.append(tree)
 
+    def compile(self, filename: str) -> _t.List[_t.Tuple[int, SyntaxError]]:
+        """Compile every command before any are executed.
 
-class Expected(_Result):
-    """t.List containing expected code."""
+        Commands are assembled the same way they are when processed, so
+        the resulting code objects can be reused for execution.
 
-    def append(self, value: str) -> None:
-        """Append ``str`` and retain escape codes.
+        Consecutive commands with no documented output between them are
+        compiled together as one ``Unit``.
 
-        :param value: Value to append to self.
+        :param filename: Name of the file the commands were read from.
+        :return: List of code-block numbers paired with the syntax
+            errors found within them.
         """
-        super().append(bytes(value, "utf-8").decode("unicode_escape"))
+        with _tracer.span("compile", "parse"):
+            return self._compile(filename)
 
+    def _compile(self, filename: str) -> _t.List[_t.Tuple[int, SyntaxError]]:
+        errors = []
+        for count, element in enumerate(self, 1):
+            command = Command()
+            trees: _t.List[_t.Tuple[int, _ast.Module]] = []
+            names: _t.Tuple[_t.Set[str], _t.Set[str]] = set(), set()
+            self._names.append(names)
+            self._units.append(element.units)
+            for line in element:
+                if line.iscode():
+                    command.append(line)
+                    if command.ready():
+                        try:
+                            tree = command.parse(filename)
+                        except SyntaxError as err:
+                            errors.append((count, err))
+                        else:
+                            self._add_tree(
+                                trees, (command.lineno, tree), filename, errors
+                            )
+                            _getnames(tree, *names)
 
-class CatchStdout(_StringIO):
-    """Context action for capturing stdout."""
+                        command.clear()
 
-    def __init__(self) -> None:
-        super().__init__()
-        self._freeze = _sys.stdout
-        _sys.stdout = self
+                # documented output ends the run of commands
+                elif not line.iscodebreak():
+                    self._add_unit(trees, filename, errors)
 
-    def getparts(self) -> _t.Optional[_t.List[str]]:
-        """Get list of stdout if captured, else None.
+            self._add_unit(trees, filename, errors)
 
-        :return: List object if stdout captured, else None.
-        """
-        value = super().getvalue()
-        return (
-            None if value == "" else [i for i in value.split("\n") if i != ""]
-        )
+        return errors
 
-    def __enter__(self) -> CatchStdout:
-        return self
+    def chains(self) -> _t.List[_t.List[int]]:
+        """Group code-blocks into chains that can run independently.
 
-    def __exit__(
-        self, exc_type: _t.Any, exc_val: _t.Any, exc_tb: _t.Any
-    ) -> None:
-        _sys.stdout = self._freeze
+        A code-block belongs to the same chain as any earlier code-block
+        that binds a name it uses. Must be called after ``compile``.
 
+        :return: List of chains, each a list of code-block indices in
+            the order they are documented.
+        """
+        parents = list(range(len(self._names)))
 
-class Holder:
-    """Object for holding README data."""
+        def _find(index: int) -> int:
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
 
-    _SUCCESS_MESSAGE = f"\n{80 * '-'}\n{color.green.bold.get('Success!')}"
+            return index
 
-    def __init__(self) -> None:
-        super().__init__()
-        self._actual = Actual()
-        self._expected = Expected()
-        self._total = Total()
+        for count, (_, loaded) in enumerate(self._names):
+            for index, (stored, _) in enumerate(self._names[:count]):
+                if _STAR in stored or not stored.isdisjoint(loaded):
+                    parents[_find(count)] = _find(index)
 
-    @property
-    def actual(self) -> Actual:
-        """``list`` containing actual code."""
-        return self._actual
+        chains: _t.Dict[int, _t.List[int]] = {}
+        for index in range(len(self._names)):
+            chains.setdefault(_find(index), []).append(index)
 
-    @property
-    def expected(self) -> Expected:
-        """``list`` containing expected code."""
-        return self._expected
+        return list(chains.values())
 
-    @property
-    def total(self) -> Total:
-        """``list`` containing total to display."""
-        return self._total
+    def prerequisites(self, index: int) -> _t.Set[int]:
+        """Get code-blocks that must run before a code-block.
 
-    def catch_output(self, value: _t.List[str]) -> None:
-        """Capture command output and add to actual and total objects.
+        These are the earlier code-blocks that bind a name it uses, and
+        in turn those that bind a name they use. Must be called after
+        ``compile``.
 
-        :param value: Output from executed command.
+        :param index: Index of code-block.
+        :return: Indices of code-blocks, including the code-block.
         """
-        self._actual.extend(value)
-        self._total.extend(value)
+        indices = {index}
+        needed = set(self._names[index][1])
+        for count in range(index - 1, -1, -1):
+            stored, loaded = self._names[count]
+            if _STAR in stored or not stored.isdisjoint(needed):
+                indices.add(count)
+                needed.update(loaded)
 
-    def display(self) -> None:
-        """Consume the total command, actual, and expected result."""
-        print(self.total.get())
-        print(self._SUCCESS_MESSAGE)
+        return indices
 
-    def getpair(
-        self, index: int
-    ) -> _t.Tuple[_t.Optional[str], _t.Optional[str]]:
-        """Get actual and expected results.
+    def async_chains(
+        self, blocks: _t.Optional[_t.Container[int]] = None
+    ) -> _t.List[_t.List[_Unit]]:
+        """Get the units of each chain that awaits at the top level.
 
-        :param index: Index of each respectively.
-        :return: A tuple of actual and expected results.
+        Must be called after ``compile``.
+
+        :param blocks: Indices of code-blocks to get the chains of, if
+            not all.
+        :return: List of chains, each a list of units in the order they
+            are documented.
         """
-        return self.actual.getindex(index), self.expected.getindex(index)
+        chains = [
+            [u for i in c for u in self._units[i]]
+            for c in self.chains()
+            if blocks is None or c[0] in blocks
+        ]
+        return [c for c in chains if any(u.isasync for u in c)]
 
 
 class Command(_Seq):
@@ -534,10 +855,27 @@ class Command(_Seq):
     def __init__(self) -> None:
         super().__init__()
         self._brackets: _t.List[str] = []
+        self._linenos: _t.List[int] = []
 
     def __str__(self) -> str:
         return "".join(self)
 
+    @property
+    def lineno(self) -> int:
+        """Line number that this command starts on."""
+        return self._linenos[0]
+
+    def _getlineno(self, offset: _t.Optional[int]) -> int:
+        # commands are joined onto a single line, so find the line that
+        # the column offset falls within
+        position = 0
+        for count, value in enumerate(self):
+            position += len(value)
+            if offset is not None and offset <= position:
+                return self._linenos[count]
+
+        return self._linenos[-1]
+
     def ascode(self) -> Code:
         """Return command as code.
 
@@ -551,13 +889,35 @@ class Command(_Seq):
         :param value: Line of Python code.
         """
         super().append(value.demark())
+        self._linenos.append(value.lineno)
         self.eval()
 
-    def exec(self) -> None:
-        """Execute compiled Python command."""
-        with exec_status.context():
-            exec(str(self), globals())  # pylint: disable=exec-used
-            self.clear()
+    def clear(self) -> None:
+        """Clear command and the line numbers it was documented on."""
+        self._list.clear()
+        self._linenos.clear()
+
+    def parse(self, filename: str) -> _ast.Module:
+        """Parse command into a syntax tree.
+
+        Line numbers of the tree refer to the README.
+
+        :param filename: Name of the file the command was read from.
+        :raises SyntaxError: If command is not valid Python, with the
+            line number of the README line at fault.
+        :return: Parsed syntax tree.
+        """
+        try:
+            # parse without a real filename, otherwise the offset is
+            # resolved against the wrong line of the file
+            tree = _ast.parse(str(self), "<string>")
+        except SyntaxError as err:
+            err.filename = filename
+            err.lineno = self._getlineno(err.offset)
+            raise
+
+        _ast.increment_lineno(tree, self.lineno - 1)
+        return tree
 
     def eval(self) -> None:
         """Evaluate string to set bracket status to open or closed."""
@@ -579,6 +939,3 @@ class Command(_Seq):
         :return: Command is ready, True or False.
         """
         return not self.ascode().iscontinued() and not self._brackets
-
-
-exec_status = ExecStatus()
@@ -0,0 +1,144 @@
+"""
+readmetester._diff
+==================
+
+Diff expected and actual output with a bounded cost.
+"""
+import difflib as _difflib
+import typing as _t
+
+# lines of context to show either side of the lines that differ
+_CONTEXT = 3
+
+# pairs of lines that can be compared before the lines that differ are
+# shown as replaced, rather than matched line by line
+_MAX_WORK = 1 << 16
+
+# lines of diff, and characters of each line, to show
+_MAX_LINES = 60
+_MAX_WIDTH = 200
+
+
+_Opcode = _t.Tuple[str, int, int, int, int]
+
+
+def trim(value: str) -> str:
+    """Trim a line of output to the width that is shown.
+
+    :param value: Line of output.
+    :return: Line, cut short if it is too wide.
+    """
+    if len(value) > _MAX_WIDTH:
+        return f"{value[:_MAX_WIDTH]}..."
+
+    return value
+
+
+def _column(expected: str, actual: str) -> int:
+    column = 0
+    for column, (char_e, char_a) in enumerate(zip(expected, actual)):
+        if char_e != char_a:
+            return column
+
+    return min(len(expected), len(actual))
+
+
+def _common(
+    expected: _t.Sequence[str], actual: _t.Sequence[str]
+) -> _t.Tuple[int, int]:
+    # number of lines common to the start, and then the end, of both
+    shortest = min(len(expected), len(actual))
+    start = 0
+    while start < shortest and expected[start] == actual[start]:
+        start += 1
+
+    end = 0
+    while (
+        end < shortest - start
+        and expected[len(expected) - 1 - end] == actual[len(actual) - 1 - end]
+    ):
+        end += 1
+
+    return start, end
+
+
+def _opcodes(
+    diff_e: _t.Sequence[str], diff_a: _t.Sequence[str]
+) -> _t.List[_Opcode]:
+    # lines that differ are only matched if there are few enough of them
+    if len(diff_e) * len(diff_a) <= _MAX_WORK:
+        return _difflib.SequenceMatcher(
+            None, diff_e, diff_a, autojunk=False
+        ).get_opcodes()
+
+    return [("replace", 0, len(diff_e), 0, len(diff_a))]
+
+
+def _changes(
+    diff_e: _t.Sequence[str],
+    diff_a: _t.Sequence[str],
+    marker: _t.Optional[str],
+) -> _t.List[str]:
+    # lines that differ, with the marker under the first that was added
+    lines: _t.List[str] = []
+    for tag, e_1, e_2, a_1, a_2 in _opcodes(diff_e, diff_a):
+        if tag == "equal":
+            lines.extend(f" {i}" for i in diff_e[e_1:e_2])
+            continue
+
+        lines.extend(f"-{i}" for i in diff_e[e_1:e_2])
+        for line in diff_a[a_1:a_2]:
+            lines.append(f"+{line}")
+            if marker is not None:
+                lines.append(marker)
+                marker = None
+
+    return lines
+
+
+def unified(expected: _t.Sequence[str], actual: _t.Sequence[str]) -> str:
+    """Get unified diff of expected and actual output.
+
+    Lines common to the start and end of both are skipped in a single
+    pass, so only the lines that differ are matched, and only if there
+    are few enough of them. The first position that differs is marked.
+
+    :param expected: Lines of expected output.
+    :param actual: Lines of actual output.
+    :return: Unified diff.
+    """
+    start, end = _common(expected, actual)
+    diff_e = expected[start : len(expected) - end]
+    diff_a = actual[start : len(actual) - end]
+    before = max(start - _CONTEXT, 0)
+    after = min(end, _CONTEXT)
+    marker = None
+    if start < min(len(expected), len(actual)):
+        # the marker is under the line that was added, after its sign
+        marker = f"?{' ' * _column(expected[start], actual[start])}^"
+
+    lines = [
+        *(f" {i}" for i in expected[before:start]),
+        *_changes(diff_e, diff_a, marker),
+        *(
+            f" {i}"
+            for i in expected[
+                len(expected) - end : len(expected) - end + after
+            ]
+        ),
+    ]
+    hidden = len(lines) - _MAX_LINES
+    lines = [trim(i) for i in lines[:_MAX_LINES]]
+    if hidden > 0:
+        lines.append(f"... {hidden} more lines")
+
+    size_e = start - before + len(diff_e) + after
+    size_a = start - before + len(diff_a) + after
+    return "\n".join(
+        [
+            "--- expected",
+            "+++ actual",
+            f"@@ -{before + 1},{size_e} +{before + 1},{size_a} @@",
+            *lines,
+        ]
+    )
@@ -0,0 +1,187 @@
+"""
+readmetester._discover
+======================
+
+Discover documents in a tree, and the config of the package of each.
+"""
+import os as _os
+import re as _re
+import typing as _t
+from pathlib import Path as _Path
+
+from ._config import Config as _Config
+from ._config import load_config as _load_config
+
+_SUFFIX = ".rst"
+_GITIGNORE = ".gitignore"
+_PYPROJECT_TOML = "pyproject.toml"
+
+# never walked, whether ignored or not
+_SKIP = frozenset((".git", ".hg", ".svn"))
+
+
+class _Rule(_t.NamedTuple):
+    base: str
+    pattern: _t.Pattern[str]
+    negate: bool
+    directory: bool
+
+
+def _translate(pattern: str) -> str:
+    # translate glob of gitignore to regular expression, where only
+    # ``**`` matches across directories
+    index, parts = 0, []
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("**", index):
+            parts.append(".*")
+            index += 2
+        elif char == "*":
+            parts.append("[^/]*")
+            index += 1
+        elif char == "?":
+            parts.append("[^/]")
+            index += 1
+        elif char == "[" and "]" in pattern[index + 2 :]:
+            end = pattern.index("]", index + 2)
+            chars = pattern[index + 1 : end]
+            if chars.startswith("!"):
+                chars = f"^{chars[1:]}"
+
+            parts.append(f"[{chars}]")
+            index = end + 1
+        else:
+            parts.append(_re.escape(char))
+            index += 1
+
+    return "".join(parts)
+
+
+def _parse(base: str, lines: _t.Iterable[str]) -> _t.Iterator[_Rule]:
+    # parse lines of gitignore found in base, relative to the root
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+
+        negate = line.startswith("!")
+        if negate or line.startswith("\\"):
+            line = line[1:]
+
+        directory = line.endswith("/")
+        line = line.rstrip("/")
+
+        # patterns only match relative to where they are from if they
+        # contain a separator, otherwise they match at any depth
+        anchored = "/" in line
+        regex = _translate(line.lstrip("/"))
+        if not anchored:
+            regex = f"(?:.*/)?{regex}"
+
+        yield _Rule(base, _re.compile(regex), negate, directory)
+
+
+def _ignored(rules: _t.List[_Rule], path: str, isdir: bool) -> bool:
+    # the last rule to match decides, like git
+    ignored = False
+    for rule in rules:
+        if rule.directory and not isdir:
+            continue
+
+        # rules are only passed down to the directory they are from, so
+        # every path they are checked against is within it
+        relative = path[len(rule.base) + 1 :] if rule.base else path
+        if rule.pattern.fullmatch(relative):
+            ignored = not rule.negate
+
+    return ignored
+
+
+def discover(
+    root: _t.Union[str, _Path], exclude: _t.Iterable[str] = ()
+) -> _t.List[_Path]:
+    """Find every RST document in a tree.
+
+    Directories are walked with ``os.scandir``, and those which are
+    ignored by a ``.gitignore`` are not walked at all.
+
+    :param root: Directory to walk.
+    :param exclude: Globs to exclude, relative to root, with the same
+        syntax as ``.gitignore``.
+    :return: Sorted list of paths to documents.
+    """
+    root = _Path(root)
+    documents = []
+    stack = [("", list(_parse("", exclude)))]
+    while stack:
+        relative, rules = stack.pop()
+        directory = root / relative
+        gitignore = directory / _GITIGNORE
+        if gitignore.is_file():
+            rules = rules + list(
+                _parse(
+                    relative,
+                    gitignore.read_text(encoding="utf-8").splitlines(),
+                )
+            )
+
+        try:
+            with _os.scandir(directory) as entries:
+                children = [(i.name, i.is_dir()) for i in entries]
+        except OSError:
+            continue
+
+        for name, isdir in children:
+            path = f"{relative}/{name}" if relative else name
+            if name in _SKIP or _ignored(rules, path, isdir):
+                continue
+
+            if isdir:
+                stack.append((path, rules))
+            elif name.lower().endswith(_SUFFIX):
+                documents.append(root / path)
+
+    return sorted(documents)
+
+
+def configs(
+    paths: _t.Iterable[_Path], **options: _t.Any
+) -> _t.Dict[str, _Config]:
+    """Resolve the config of the package each document belongs to.
+
+    The config of a document is that of the nearest pyproject.toml of
+    the directories containing it, or that of the current working
+    directory if there is none. Each directory is only searched once,
+    and each config only loaded once, so they are shared by documents
+    of sibling packages.
+
+    :param paths: Paths to documents.
+    :param options: Options to use instead of those configured.
+    :return: Config of each document, keyed by its path.
+    """
+    found: _t.Dict[_Path, _t.Optional[_Path]] = {}
+    loaded: _t.Dict[_t.Optional[_Path], _Config] = {}
+
+    def _nearest(directory: _Path) -> _t.Optional[_Path]:
+        if directory not in found:
+            if (directory / _PYPROJECT_TOML).is_file():
+                found[directory] = directory
+            elif directory.parent == directory:
+                found[directory] = None
+            else:
+                found[directory] = _nearest(directory.parent)
+
+        return found[directory]
+
+    resolved = {}
+    for path in paths:
+        directory = _nearest(path.absolute().parent)
+        if directory not in loaded:
+            loaded[directory] = _load_config(directory, **options)
+
+        resolved[str(path)] = loaded[directory]
+
+    return resolved
@@ -0,0 +1,372 @@
+"""
+readmetester._exec
+==================
+
+Execute the commands of documents.
+"""
+from __future__ import annotations
+
+import ast as _ast
+import asyncio as _asyncio
+import atexit as _atexit
+import contextlib as _contextlib
+import contextvars as _contextvars
+import dis as _dis
+import functools as _functools
+import os as _os
+import sys as _sys
+import typing as _t
+from io import StringIO as _StringIO
+from io import TextIOBase as _TextIOBase
+
+from ._config import NAME as _NAME
+from ._trace import tracer as _tracer
+
+_MARK = f"__{_NAME}_mark__"
+
+# ``inspect`` sets its flags dynamically, so they are looked up the
+# same way
+_CO_COROUTINE = {v: k for k, v in _dis.COMPILER_FLAG_NAMES.items()}[
+    "COROUTINE"
+]
+
+# commands were once executed in the globals of ``readmetester._core``
+_NAMESPACE = f"{_NAME}._core"
+
+_Outputs = _t.List[_t.Optional[_t.List[str]]]
+
+_capture: _contextvars.ContextVar[
+    _t.Optional[CatchStdout]
+] = _contextvars.ContextVar("capture", default=None)
+
+
+def _mark() -> None:
+    # mark the end of a command's output in the current capture
+    capture = _capture.get()
+    if capture is not None:
+        capture.mark()
+
+
+class ExecStatus:
+    """Holds status of running exec."""
+
+    def __init__(self) -> None:
+        self._depth = 0
+
+    @property
+    def in_exec(self) -> bool:
+        """Running in exec, True or False."""
+        return bool(self._depth)
+
+    @_contextlib.contextmanager
+    def context(self) -> _t.Generator[ExecStatus, None, None]:
+        """Run exec within context.
+
+        Contexts are counted, as tasks may run within them concurrently.
+
+        :return: Yield self.
+        """
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+
+
+class CatchStdout(_StringIO):
+    """Context action for capturing stdout.
+
+    :param swap: Replace stdout, rather than relying on ``RouteStdout``
+        to route output written by the current task to this.
+    """
+
+    def __init__(self, swap: bool = True) -> None:
+        super().__init__()
+        self._freeze = _sys.stdout
+        self._swap = swap
+        self._marks: _t.List[int] = []
+        self._token = _capture.set(self)
+        if swap:
+            _sys.stdout = self
+
+    @staticmethod
+    def _getparts(value: str) -> _t.Optional[_t.List[str]]:
+        return (
+            None if value == "" else [i for i in value.split("\n") if i != ""]
+        )
+
+    def mark(self) -> None:
+        """Mark the end of output belonging to one command."""
+        self._marks.append(self.tell())
+
+    def getparts(self) -> _Outputs:
+        """Get list of stdout for each marked section.
+
+        :return: List object for each section if stdout captured, else
+            None.
+        """
+        value = super().getvalue()
+        bounds = [0, *self._marks, len(value)]
+        return [self._getparts(value[i:j]) for i, j in zip(bounds, bounds[1:])]
+
+    def __enter__(self) -> CatchStdout:
+        return self
+
+    def __exit__(
+        self, exc_type: _t.Any, exc_val: _t.Any, exc_tb: _t.Any
+    ) -> None:
+        _capture.reset(self._token)
+        if self._swap:
+            _sys.stdout = self._freeze
+
+
+class RouteStdout(_TextIOBase):
+    """Context action for routing stdout to the capture of each task."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._freeze = _sys.stdout
+        _sys.stdout = _t.cast(_t.TextIO, self)
+
+    def write(self, s: str) -> int:
+        capture = _capture.get()
+        return (self._freeze if capture is None else capture).write(s)
+
+    def __enter__(self) -> RouteStdout:
+        return self
+
+    def __exit__(
+        self, exc_type: _t.Any, exc_val: _t.Any, exc_tb: _t.Any
+    ) -> None:
+        _sys.stdout = self._freeze
+
+
+class Isolate:
+    """Context action for isolating a document's changes to interpreter.
+
+    Modules first imported by the document are evicted, and
+    ``sys.path``, the environment, the working directory, and the
+    bindings of ``sys.stdout`` and ``sys.stderr`` are restored, so
+    documents can share one process without leaking state into the next.
+
+    Functions the document registers with ``atexit`` are called when it
+    ends, as they would be when its process exits, rather than at the
+    end of every document after it.
+    """
+
+    def __init__(self) -> None:
+        self._modules: _t.Dict[str, _t.Any] = {}
+        self._path: _t.List[str] = []
+        self._environ: _t.Dict[str, str] = {}
+        self._cwd = ""
+        self._streams: _t.Tuple[_t.Any, _t.Any] = (None, None)
+        self._register = _atexit.register
+        self._exits: _t.List[_t.Callable[..., _t.Any]] = []
+
+    def _record(
+        self, func: _t.Callable[..., _t.Any], *args: _t.Any, **kwargs: _t.Any
+    ) -> _t.Callable[..., _t.Any]:
+        self._exits.append(_functools.partial(func, *args, **kwargs))
+        return func
+
+    def __enter__(self) -> Isolate:
+        self._modules = dict(_sys.modules)
+        self._path = list(_sys.path)
+        self._environ = dict(_os.environ)
+        self._cwd = _os.getcwd()
+        self._streams = _sys.stdout, _sys.stderr
+        _atexit.register = self._record  # type: ignore
+        return self
+
+    def __exit__(
+        self, exc_type: _t.Any, exc_val: _t.Any, exc_tb: _t.Any
+    ) -> None:
+        _atexit.register = self._register  # type: ignore
+        while self._exits:
+            with _contextlib.suppress(Exception):
+                self._exits.pop()()
+
+        _sys.stdout, _sys.stderr = self._streams
+        _os.chdir(self._cwd)
+
+        # only what has changed is set, as each change to the
+        # environment calls ``putenv``
+        for key in set(_os.environ) - set(self._environ):
+            del _os.environ[key]
+
+        for key, value in self._environ.items():
+            if _os.environ.get(key) != value:
+                _os.environ[key] = value
+
+        # the same list is kept, as it may be referenced elsewhere
+        _sys.path[:] = self._path
+        for name in set(_sys.modules) - set(self._modules):
+            del _sys.modules[name]
+
+        for name, module in self._modules.items():
+            if _sys.modules.get(name) is not module:
+                _sys.modules[name] = module
+
+
+class Unit:
+    """Run of consecutive commands compiled to execute as one.
+
+    A mark is placed between each command so that captured output can
+    still be attributed to the command which produced it.
+
+    :param trees: Parsed commands, in the order they are documented.
+    :param filename: Name of the file the commands were read from.
+    """
+
+    def __init__(self, trees: _t.List[_ast.Module], filename: str) -> None:
+        body: _t.List[_ast.stmt] = []
+        for count, tree in enumerate(trees):
+            if count:
+                body.append(
+                    _ast.Expr(_ast.Call(_ast.Name(_MARK, _ast.Load()), [], []))
+                )
+
+            body.extend(tree.body)
+
+        self._outputs: _Outputs = []
+        self._code = compile(
+            _ast.fix_missing_locations(_ast.Module(body, type_ignores=[])),
+            filename,
+            "exec",
+            flags=_ast.PyCF_ALLOW_TOP_LEVEL_AWAIT,
+        )
+
+    @property
+    def isasync(self) -> bool:
+        """Commands await at the top level, True or False."""
+        return bool(self._code.co_flags & _CO_COROUTINE)
+
+    @property
+    def outputs(self) -> _Outputs:
+        """Output of each command which ran when last executed.
+
+        If a command raised, it is the last with output.
+        """
+        return self._outputs
+
+    def exec(self, namespace: Namespace) -> _Outputs:
+        """Execute compiled Python commands.
+
+        Commands which await are run on the event loop of the namespace.
+
+        :param namespace: Namespace to execute commands in.
+        :return: Output of each command, or None if there was none.
+        """
+        with CatchStdout() as stdout:
+            try:
+                with exec_status.context():
+                    # pylint: disable-next=eval-used
+                    result = eval(self._code, namespace.globals)
+                    if self.isasync:
+                        namespace.loop.run_until_complete(result)
+            finally:
+                self._outputs = stdout.getparts()
+
+        return self._outputs
+
+    async def aexec(self, namespace: Namespace) -> _Outputs:
+        """Execute compiled Python commands as a task.
+
+        Output is captured for this task only, so must be run within
+        ``RouteStdout``.
+
+        :param namespace: Namespace to execute commands in.
+        :return: Output of each command, or None if there was none.
+        """
+        with CatchStdout(swap=False) as stdout:
+            try:
+                with exec_status.context():
+                    # pylint: disable-next=eval-used
+                    result = eval(self._code, namespace.globals)
+                    if self.isasync:
+                        await result
+            finally:
+                self._outputs = stdout.getparts()
+
+        return self._outputs
+
+
+class Namespace:
+    """Namespace for the commands of a document to execute in.
+
+    Commands which await at the top level are all run on one event
+    loop, which is created when first needed and closed on exit.
+
+    Commands were once executed in the globals of this module, so its
+    name is kept for the documented representations of objects.
+    """
+
+    def __init__(self) -> None:
+        self._globals: _t.Dict[str, _t.Any] = {
+            "__name__": _NAMESPACE,
+            _MARK: _mark,
+        }
+        self._loop: _t.Optional[_asyncio.AbstractEventLoop] = None
+        self._results: _t.Dict[Unit, _t.Union[_Outputs, Exception]] = {}
+
+    def __enter__(self) -> Namespace:
+        return self
+
+    def __exit__(
+        self, exc_type: _t.Any, exc_val: _t.Any, exc_tb: _t.Any
+    ) -> None:
+        if self._loop is not None:
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    @property
+    def globals(self) -> _t.Dict[str, _t.Any]:
+        """Globals that commands are executed in."""
+        return self._globals
+
+    @property
+    def loop(self) -> _asyncio.AbstractEventLoop:
+        """Event loop to run commands which await on."""
+        if self._loop is None:
+            self._loop = _asyncio.new_event_loop()
+
+        return self._loop
+
+    async def _chain(self, units: _t.List[Unit]) -> None:
+        for unit in units:
+            try:
+                self._results[unit] = await unit.aexec(self)
+            except Exception as err:  # pylint: disable=broad-except
+                self._results[unit] = err
+                return
+
+    async def _gather(self, chains: _t.List[_t.List[Unit]]) -> None:
+        await _asyncio.gather(*(self._chain(i) for i in chains))
+
+    def gather(self, chains: _t.List[_t.List[Unit]]) -> None:
+        """Run independent chains of units concurrently.
+
+        Results are held until each unit is executed in turn.
+
+        :param chains: Chains of units, each in the order documented.
+        """
+        with _tracer.span("gather", "exec"), RouteStdout():
+            self.loop.run_until_complete(self._gather(chains))
+
+    def exec(self, unit: Unit) -> _Outputs:
+        """Execute unit, or get its result if it has already run.
+
+        :param unit: Unit to execute.
+        :return: Output of each command, or None if there was none.
+        """
+        result = self._results.pop(unit, None)
+        if result is None:
+            return unit.exec(self)
+
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+
+exec_status = ExecStatus()
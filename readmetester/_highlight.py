@@ -0,0 +1,83 @@
+"""
+readmetester._highlight
+=======================
+
+Highlight commands to be displayed.
+"""
+import functools as _functools
+import keyword as _keyword
+import token as _token
+import tokenize as _tokenize
+import typing as _t
+from io import StringIO as _StringIO
+
+# 256 colours of each type of token, close to the default pygments style
+_KEYWORD_COLOR = 28
+_TOKEN_COLORS = {
+    getattr(_token, k): v
+    for k, v in (
+        ("STRING", 124),
+        ("FSTRING_START", 124),
+        ("FSTRING_MIDDLE", 124),
+        ("FSTRING_END", 124),
+        ("NUMBER", 241),
+        ("COMMENT", 65),
+    )
+    if hasattr(_token, k)
+}
+
+
+def highlight_builtin(value: str) -> str:
+    """Highlight a line of Python with 256 colour escape codes.
+
+    Only keywords, strings, numbers, and comments are highlighted, so
+    this can be done with ``tokenize``.
+
+    :param value: Line to highlight.
+    :return: Highlighted line.
+    """
+    parts = []
+    end = 0
+    try:
+        for token in _tokenize.generate_tokens(_StringIO(value).readline):
+            if token.start[0] > 1:
+                break
+
+            number = _TOKEN_COLORS.get(token.type)
+            if token.type == _token.NAME and _keyword.iskeyword(token.string):
+                number = _KEYWORD_COLOR
+
+            if number is not None:
+                start = token.start[1]
+                stop = token.end[1] if token.end[0] == 1 else len(value)
+                parts.append(value[end:start])
+                parts.append(f"\x1b[38;5;{number}m{value[start:stop]}\x1b[39m")
+                end = stop
+
+    # an incomplete line, such as one opening a bracket, is valid until
+    # it ends
+    except (_tokenize.TokenError, SyntaxError):
+        pass
+
+    parts.append(value[end:])
+    return "".join(parts)
+
+
+@_functools.lru_cache(maxsize=None)
+def highlight_pygments(style: str) -> _t.Callable[[str], str]:
+    """Get function to highlight a line of Python with pygments.
+
+    Pygments is only imported when its highlighting is used.
+
+    :param style: Pygments style to highlight with.
+    :return: Function highlighting a line.
+    """
+    # pylint: disable=import-outside-toplevel
+    from pygments import highlight
+    from pygments.formatters.terminal256 import Terminal256Formatter
+
+    # noinspection PyUnresolvedReferences
+    from pygments.lexers.python import PythonLexer
+
+    lexer, formatter = PythonLexer(), Terminal256Formatter(style=style)
+    return lambda x: highlight(x, lexer, formatter)
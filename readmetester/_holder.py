@@ -0,0 +1,416 @@
+"""
+readmetester._holder
+====================
+
+Hold the results of a document and display them.
+"""
+# pylint: disable=consider-using-f-string
+from __future__ import annotations
+
+import contextlib as _contextlib
+import sys as _sys
+import typing as _t
+from pathlib import Path as _Path
+
+from ._config import Config as _Config
+from ._config import Normalizer as _Normalizer
+from ._core import CHECK as _CHECK
+from ._core import CROSS as _CROSS
+from ._core import Code as _Code
+from ._core import _Seq
+from ._core import color as _color
+from ._memory import Memory as _Memory
+from ._store import Bench as _Bench
+from ._trace import tracer as _tracer
+
+_OUTPUT_BUFFER = 1 << 16
+
+
+def format_size(value: float) -> str:
+    """Format a number of bytes to be read.
+
+    :param value: Number of bytes.
+    :return: Formatted ``str``.
+    """
+    for unit in ("B", "KiB", "MiB"):
+        if abs(value) < 1024:
+            return f"{value:.1f} {unit}"
+
+        value /= 1024
+
+    return f"{value:.1f} GiB"
+
+
+def format_duration(value: float) -> str:
+    """Format a number of seconds to be read.
+
+    :param value: Number of seconds.
+    :return: Formatted ``str``.
+    """
+    for unit in ("s", "ms", "us"):
+        if value >= 1:
+            return f"{value:.1f} {unit}"
+
+        value *= 1000
+
+    return f"{value:.1f} ns"
+
+
+class _Result(_Seq):
+    """``list`` for normalizing string entries for variable results.
+
+    :param normalizer: Normalizer to apply to entries.
+    """
+
+    def __init__(self, normalizer: _Normalizer) -> None:
+        super().__init__()
+        self._normalizer = normalizer
+
+    def insert(self, index: int, value: str) -> None:
+        super().insert(index, self._normalizer(value))
+
+    def getindex(self, index: int) -> _t.Optional[str]:
+        """Get value by index if it exists, else None.
+
+        :param index: Index to get.
+        :return: Value if it exists, else None.
+        """
+        try:
+            return self[index]
+        except IndexError:
+            return None
+
+
+class Actual(_Result):
+    """``list`` for normalizing string entries for variable results."""
+
+
+class Total(_Seq):
+    """List containing total output to display.
+
+    :param normalizer: Normalizer to apply to output.
+    :param highlight: Function to highlight commands with.
+    """
+
+    def __init__(
+        self, normalizer: _Normalizer, highlight: _t.Callable[[str], str]
+    ) -> None:
+        super().__init__()
+        self._normalizer = normalizer
+        self._highlight = highlight
+
+    def append_header(self, value: str) -> None:
+        """Append ``str`` to total as stylized header.
+
+        :param value: Header ``str``.
+        """
+        self.append(
+            "{}\n{}".format(
+                _color.cyan.underline.get(80 * " "),
+                _color.cyan.underline.get(value + (80 - len(value)) * " "),
+            )
+        )
+
+    def append_command(self, value: str) -> None:
+        """Append value prefixed with a dotpoint.
+
+        :param value: ``str`` to append with dotpoint.
+        """
+        self.append(f". {self._highlight(value).strip()}")
+
+    def append_shell(self, value: str) -> None:
+        """Append command of console block prefixed with a prompt.
+
+        :param value: Command, without its prompt.
+        """
+        self.append(f"$ {value}")
+
+    def extend(self, values: _t.Iterable[_t.Any]) -> None:
+        """Append value prefixed with a check symbol.
+
+        :param values: ``str`` to append with check symbol.
+        """
+        super().append(
+            "\n".join([f"{_CHECK} {self._normalizer(i)}" for i in values])
+        )
+
+    def get(self) -> str:
+        """Get the final total result.
+
+        :return: Final total result.
+        """
+        return "\n".join(self)
+
+
+class Expected(_Result):
+    """t.List containing expected code."""
+
+    def append(self, value: str) -> None:
+        """Append ``str`` and retain escape codes.
+
+        :param value: Value to append to self.
+        """
+        super().append(bytes(value, "utf-8").decode("unicode_escape"))
+
+
+class _Commands(_t.List[_t.Tuple[int, int, int]]):
+    """``list`` of the line each command run starts on.
+
+    Each is held with the length of actual and expected output before
+    it, along with the line of the command failed at, if known.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.failed: _t.Optional[int] = None
+
+
+class Holder:
+    """Object for holding README data.
+
+    Headers, commands, and output are recorded as events, and are only
+    rendered for display when needed.
+
+    Each code-block is written to the stream as soon as it has passed,
+    so the events are only ever held for one code-block.
+
+    :param config: Config to process README with.
+    :param verbose: Display the events of passing code-blocks.
+    :param stream: Stream to write to, defaults to stdout.
+    """
+
+    _SUCCESS_MESSAGE = f"\n{80 * '-'}\n{_color.green.bold.get('Success!')}"
+    _HEADER, _COMMAND, _OUTPUT, _SHELL = range(4)
+
+    def __init__(
+        self,
+        config: _Config,
+        verbose: bool = False,
+        stream: _t.Optional[_t.TextIO] = None,
+    ) -> None:
+        super().__init__()
+        self._config = config
+        self._verbose = verbose
+        self._stream = stream
+        self._actual = Actual(config.normalizer)
+        self._expected = Expected(config.normalizer)
+        self._events: _t.List[_t.Tuple[int, _t.Any]] = []
+        self._commands = _Commands()
+
+    @property
+    def config(self) -> _Config:
+        """Config to process README with."""
+        return self._config
+
+    def using(self, config: _Config) -> Holder:
+        """Get holder which processes README with another config.
+
+        :param config: Config to process README with.
+        :return: Instantiated ``Holder`` object, writing the same way.
+        """
+        return Holder(config, self._verbose, self._stream)
+
+    @property
+    def actual(self) -> Actual:
+        """``list`` containing actual code."""
+        return self._actual
+
+    @property
+    def expected(self) -> Expected:
+        """``list`` containing expected code."""
+        return self._expected
+
+    @property
+    def total(self) -> Total:
+        """``list`` containing total to display, rendered from events."""
+        total = Total(self._config.normalizer, self._config.highlight)
+        render = {
+            self._HEADER: total.append_header,
+            self._COMMAND: total.append_command,
+            self._OUTPUT: total.extend,
+            self._SHELL: total.append_shell,
+        }
+        for kind, value in self._events:
+            render[kind](value)
+
+        return total
+
+    def _write(self, value: str, flush: bool = False) -> None:
+        # stdout is only resolved when writing, as it may be redirected
+        stream = _sys.stdout if self._stream is None else self._stream
+        stream.write(f"{value}\n")
+
+        # flush once a code-block is written, so piped output keeps up
+        # with each code-block, without flushing every line
+        if flush:
+            stream.flush()
+
+    def append_header(self, value: str) -> None:
+        """Record the start of a code-block.
+
+        Output of previous code-blocks has already been asserted, so
+        actual and expected output start again.
+
+        :param value: Header ``str``.
+        """
+        self._actual = Actual(self._config.normalizer)
+        self._expected = Expected(self._config.normalizer)
+        self._commands = _Commands()
+        self._events.append((self._HEADER, value))
+
+    def append_command(self, value: _Code) -> None:
+        """Record a line of a command.
+
+        :param value: Line of command, holding the line it is on.
+        """
+        self._events.append((self._COMMAND, value))
+
+    def append_shell(self, value: str) -> None:
+        """Record a command of a console block.
+
+        :param value: Command, without its prompt.
+        """
+        self._events.append((self._SHELL, value))
+
+    def ran(self, lineno: int) -> None:
+        """Record that a command has run.
+
+        Output caught, and expected output documented, until the next
+        command is run belong to this command.
+
+        :param lineno: Line the command starts on.
+        """
+        self._commands.append((lineno, len(self._actual), len(self._expected)))
+
+    def fail(self, position: _t.Optional[int] = None) -> None:
+        """Record the command the code-block failed at.
+
+        :param position: Position of the output which was not as
+            documented, or None if the last command run raised.
+        """
+        commands: _t.List[_t.Tuple[int, int, int]] = self._commands
+        if position is not None:
+            # output is documented under the command it came from, so
+            # prefer the command it was documented under
+            index = 2 if position < len(self._expected) else 1
+            commands = [i for i in commands if i[index] <= position]
+
+        self._commands.failed = commands[-1][0] if commands else None
+
+    @property
+    def failed_lineno(self) -> _t.Optional[int]:
+        """Line of the command the code-block failed at, if known."""
+        return self._commands.failed
+
+    def catch_output(self, value: _t.List[str]) -> None:
+        """Capture command output and add to actual and events.
+
+        :param value: Output from executed command.
+        """
+        self._actual.extend(value)
+        self._events.append((self._OUTPUT, value))
+
+    def passed(self) -> None:
+        """Write the code-block that has passed if verbose, and clear."""
+        if self._verbose:
+            with _tracer.span("render", "render"):
+                self._write(self.total.get(), flush=True)
+
+        self._events.clear()
+
+    def display(self) -> None:
+        """Display that all code-blocks have passed."""
+        self._write(self._SUCCESS_MESSAGE, flush=True)
+
+    def display_failure(self) -> None:
+        """Display the events leading up to a failure."""
+        with _tracer.span("render", "render"):
+            self._write(self.total.get())
+            self._write(_CROSS, flush=True)
+
+    def display_rendered(self, header: str, rendered: str) -> None:
+        """Display output rendered by another holder, such as a worker's.
+
+        :param header: Header to display before output.
+        :param rendered: Rendered output.
+        """
+        self._write(f"{_color.cyan.get(header)}\n{rendered}")
+
+    def display_memory(self, code_block: str, memory: _Memory) -> None:
+        """Display the memory allocated by a code-block.
+
+        Code-blocks which retain more than the configured threshold into
+        later code-blocks are flagged.
+
+        :param code_block: Header of code-block.
+        :param memory: Memory allocated by code-block.
+        """
+        rss = "n/a" if memory.rss is None else f"+{format_size(memory.rss)}"
+        self._write(
+            f"{code_block}: peak {format_size(memory.peak)}, "
+            f"retained {format_size(memory.retained)}, rss {rss}"
+        )
+        for site, size in memory.sites:
+            self._write(f"    {site}: {format_size(size)}")
+
+        if memory.retained >= self._config.retained_threshold:
+            self._write(
+                _color.yellow.get(
+                    f"    retains {format_size(memory.retained)} into later"
+                    " code-blocks"
+                )
+            )
+
+    def display_bench(self, code_block: str, bench: _Bench) -> None:
+        """Display the timing of a benchmarked code-block.
+
+        Code-blocks which are slower than their baseline by more than
+        the configured threshold are flagged.
+
+        :param code_block: Header of code-block.
+        :param bench: Timing of code-block.
+        """
+        change = (
+            "baseline saved"
+            if bench.change is None
+            else f"{bench.change:+.1f}% from baseline"
+        )
+        self._write(
+            f"{code_block}: {format_duration(bench.best)} per loop, median"
+            f" {format_duration(bench.median)} ({bench.loops} loops),"
+            f" {change}"
+        )
+        if (
+            bench.change is not None
+            and bench.change > self._config.bench_threshold
+        ):
+            self._write(
+                _color.yellow.get(f"    regressed by {bench.change:.1f}%")
+            )
+
+    def getpair(
+        self, index: int
+    ) -> _t.Tuple[_t.Optional[str], _t.Optional[str]]:
+        """Get actual and expected results.
+
+        :param index: Index of each respectively.
+        :return: A tuple of actual and expected results.
+        """
+        return self.actual.getindex(index), self.expected.getindex(index)
+
+
+def open_output(
+    path: _t.Optional[_Path],
+) -> _t.ContextManager[_t.Optional[_t.TextIO]]:
+    """Open file to write output to, if there is one.
+
+    Output is written in large chunks, rather than line by line, and
+    is flushed after each code-block.
+
+    :param path: Path to file, or None to write to stdout.
+    :return: Context yielding the opened file, or None.
+    """
+    if path is None:
+        return _contextlib.nullcontext()
+
+    return open(path, "w", encoding="utf-8", buffering=_OUTPUT_BUFFER)
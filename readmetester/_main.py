@@ -2,21 +2,130 @@
 readmetester
 ============
 """
+import contextlib as _contextlib
+import io as _io
+import time as _time
 import typing as _t
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
 from itertools import zip_longest as _zip_longest
 from pathlib import Path as _Path
+from timeit import Timer as _Timer
 
-from . import _assert
-from ._core import CatchStdout as _CatchStdout
+from . import _assert, _console
+from ._config import Config as _Config
+from ._config import load_config as _load_config
+from ._core import Block as _Block
 from ._core import Code as _Code
 from ._core import Command as _Command
-from ._core import Holder as _Holder
 from ._core import Parser as _Parser
 from ._core import Readme as _Readme
-from ._core import exec_status as _exec_status
+from ._discover import configs as _configs
+from ._discover import discover as _discover
+from ._exec import Isolate as _Isolate
+from ._exec import Namespace as _Namespace
+from ._exec import Unit as _Unit
+from ._exec import exec_status as _exec_status
+from ._holder import Holder as _Holder
+from ._holder import format_duration as _format_duration
+from ._holder import open_output as _open_output
+from ._matrix import test as _test_matrix
+from ._memory import Memory as _Memory
+from ._memory import TraceMemory as _TraceMemory
+from ._package import docstrings as _docstrings
+from ._package import examples as _examples
+from ._package import sources as _sources
+from ._plugins import DurationsPlugin as _DurationsPlugin
+from ._plugins import Hooks as _Hooks
+from ._plugins import LastFailedPlugin as _LastFailedPlugin
+from ._plugins import ReportPlugin as _ReportPlugin
+from ._plugins import TracePlugin as _TracePlugin
+from ._plugins import load_plugins as _load_plugins
+from ._shard import Shard as _Shard
+from ._shard import select as _select
+from ._shard import select_failed as _select_failed
+from ._store import Baseline as _Baseline
+from ._store import Bench as _Bench
+from ._store import Durations as _Durations
+from ._store import Hashes as _Hashes
+from ._store import LastFailed as _LastFailed
+from ._trace import tracer as _tracer
+from .exceptions import CommandExitError as _CommandExitError
+from .exceptions import CommandTimeoutError as _CommandTimeoutError
+from .exceptions import DocumentError as _DocumentError
 
+PASSED = "passed"
+FAILED = "failed"
+ERROR = "error"
 
-def _process(lines: _t.List[_Code], holder: _Holder) -> None:
+_BENCH_REPEAT = 5
+_NO_HOOKS = _Hooks(())
+
+# arguments of the commandline to use instead of those configured
+_OPTIONS = ("concurrent", "console", "isolate", "memory", "bench")
+
+# header of docstring which failed, and its events rendered by a worker
+_Failure = _t.Tuple[str, str]
+
+
+class _Settings(_t.NamedTuple):
+    # settings of a run, which are only parsed from the commandline if
+    # not given a path
+    paths: _t.List[_Path]
+    options: _t.Dict[str, _t.Any]
+    verbose: bool = False
+    output: _t.Optional[_Path] = None
+    report: _t.Optional[_Path] = None
+    trace: _t.Optional[_Path] = None
+    shard: _t.Optional[_t.Tuple[int, int]] = None
+    root: _t.Optional[_Path] = None
+    package: _t.Optional[str] = None
+    interpreters: _t.Optional[_t.List[str]] = None
+    exclude: _t.Sequence[str] = ()
+    last_failed: bool = False
+    failed_first: bool = False
+
+
+class _Document(_t.NamedTuple):
+    # README being tested, with the namespace its commands execute in,
+    # and the hooks to call around them
+    readme: _Readme
+    namespace: _Namespace
+    hooks: _Hooks = _NO_HOOKS
+
+
+class Result(_t.NamedTuple):
+    """Result of testing a code-block.
+
+    Status is ``"passed"``, ``"failed"`` if output was not as documented,
+    or ``"error"`` if a command raised.
+
+    Memory is only traced, and code-blocks only benchmarked, if
+    configured.
+
+    The line of the command a code-block failed at is recorded if it is
+    known, otherwise the code-block failed as a whole.
+    """
+
+    code_block: str
+    lineno: int
+    end_lineno: int
+    status: str
+    actual: _t.List[str]
+    expected: _t.List[str]
+    duration: float
+    error: _t.Optional[BaseException]
+    memory: _t.Optional[_Memory] = None
+    bench: _t.Optional[_Bench] = None
+    error_lineno: _t.Optional[int] = None
+
+
+def _process(
+    lines: _t.Iterable[_Code],
+    holder: _Holder,
+    compiled: _t.Mapping[int, _Unit],
+    namespace: _Namespace,
+    hooks: _Hooks,
+) -> None:
     """Populate items to their allocated ``list`` object.
 
     First split data by documented commands and documented command
@@ -31,33 +140,730 @@ def _process(lines: _t.List[_Code], holder: _Holder) -> None:
 
     :param lines: Lines from README file.
     :param holder: Holding object.
+    :param compiled: Precompiled units, keyed by starting line.
+    :param namespace: Namespace to execute commands in.
+    :param hooks: Hooks to call around executing commands.
+    :raises RuntimeError: If a command was not compiled.
     """
     command = _Command()
+    outputs: _t.Iterator[_t.Optional[_t.List[str]]] = iter(())
+    error: _t.Optional[Exception] = None
+    remaining = 0
     for line in lines:
 
         # any lines beginning with ``>>> `` or ``... `` are considered
         # commands
         if line.iscode():
-            holder.total.append_command(line)
+            holder.append_command(line)
             command.append(line)
 
             # if command ends with a colon it is a statement with a
             # continuation
             # append the continuation to execute as one command
             if command.ready():
-                with _CatchStdout() as stdout:
-                    command.exec()
+                unit = compiled.get(command.lineno)
+
+                # this command starts a run of commands compiled as one,
+                # so execute them all and collect the output of each
+                if unit is not None:
+                    try:
+                        parts = _exec(unit, command.lineno, namespace, hooks)
+                    except Exception as err:  # pylint: disable=broad-except
+
+                        # the commands which ran are still recorded, so
+                        # the failure is shown at the command which
+                        # raised
+                        error, parts = err, unit.outputs
+
+                    outputs, remaining = iter(parts), len(parts)
+
+                # every command is compiled before any are executed, so
+                # one which was not is a fault of this package
+                try:
+                    value = next(outputs)
+                except StopIteration as err:
+                    raise RuntimeError(
+                        f"command on line {command.lineno} was not compiled"
+                    ) from err
 
-                value = stdout.getparts()
+                holder.ran(command.lineno)
+                command.clear()
                 if value is not None:
                     holder.catch_output(value)
 
+                remaining -= 1
+                if error is not None and not remaining:
+                    holder.fail()
+                    raise error
+
         elif not line.iscodebreak():
 
             # remove quotes from documented `str` output
             holder.expected.append(line.dequote())
 
 
+def _exec(
+    unit: _Unit, lineno: int, namespace: _Namespace, hooks: _Hooks
+) -> _t.List[_t.Optional[_t.List[str]]]:
+    # execute unit, calling the hooks around it
+    if hooks.before_command is not None:
+        hooks.before_command(lineno)
+
+    if hooks.after_command is None:
+        return namespace.exec(unit)
+
+    start = _time.perf_counter()
+    parts = namespace.exec(unit)
+    hooks.after_command(lineno, parts, _time.perf_counter() - start)
+    return parts
+
+
+def _timeit(
+    block: _Block, namespace: _Namespace, duration: _t.Optional[float]
+) -> float:
+    """Time code-block, repeating it if configured to.
+
+    :param block: Code-block, which has already been run once.
+    :param namespace: Namespace to execute commands in.
+    :param duration: Seconds the first run took, or None if it was
+        slowed by tracing memory, so each repeated run is timed again.
+    :return: Statistic of the seconds each run took.
+    """
+    durations = [] if duration is None else [duration]
+    while len(durations) < block.repeat:
+        start = _time.perf_counter()
+        for unit in block.units:
+            unit.exec(namespace)
+
+        durations.append(_time.perf_counter() - start)
+
+    return block.statistic(durations)
+
+
+def _bench(
+    readme: _Readme, index: int
+) -> _t.Optional[_t.Tuple[int, _t.List[float]]]:
+    """Time code-block like ``timeit``, calibrating the number of loops.
+
+    Code-block is timed in a namespace of its own, so running it many
+    times does not change the state of the code-blocks after it. The
+    code-blocks it depends on are run there first.
+
+    :param readme: Compiled ``Readme`` object.
+    :param index: Index of code-block, which has already been run once.
+    :return: Number of loops, and seconds per loop of each repeated run,
+        or None if it, or the code-blocks it depends on, could not be run
+        again.
+    """
+
+    def _run(indices: _t.Iterable[int]) -> None:
+        for count in indices:
+            for unit in readme[count].units:
+                unit.exec(namespace)
+
+    with _Namespace() as namespace:
+        try:
+            _run(sorted(readme.prerequisites(index) - {index}))
+            timer = _Timer(lambda: _run((index,)))
+            loops, _ = timer.autorange()
+            times = timer.repeat(_BENCH_REPEAT, loops)
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+    return loops, [i / loops for i in times]
+
+
+def _assert_output(holder: _Holder, code_block: str, hooks: _Hooks) -> None:
+    """Assert actual output of code-block is as documented.
+
+    :param holder: Holding object.
+    :param code_block: code-block x of all code-blocks.
+    :param hooks: Hooks to call before asserting.
+    """
+    for position, _ in enumerate(_zip_longest(holder.actual, holder.expected)):
+        actual, expected = holder.getpair(position)
+        if hooks.on_assert is not None:
+            hooks.on_assert(code_block, actual, expected)
+
+        try:
+            _assert.actual_expected(actual, expected, code_block)
+            _assert.equality(
+                actual, expected, code_block, (holder.actual, holder.expected)
+            )
+        except _DocumentError:
+            holder.fail(position)
+            raise
+
+
+def _test_block(
+    document: _Document,
+    lines: _Block,
+    holder: _Holder,
+    code_block: str,
+    trace: _t.Optional[_TraceMemory] = None,
+) -> None:
+    """Execute code-block and assert its output is as documented.
+
+    Assert the code-block is within any budgets set by its options.
+
+    :param document: README, the namespace to execute commands in, and
+        the hooks to call around executing and asserting.
+    :param lines: Lines from code-block.
+    :param holder: Holding object.
+    :param code_block: code-block x of all code-blocks.
+    :param trace: Trace memory allocated by code-block, if provided.
+    """
+    readme, namespace, hooks = document
+    if trace is None and lines.max_memory is not None:
+        trace = _TraceMemory()
+
+    context: _t.ContextManager[_t.Any] = _contextlib.nullcontext()
+    if trace is not None:
+        context = trace
+
+    start = _time.perf_counter()
+    with context:
+        _process(lines, holder, readme.compiled, namespace, hooks)
+
+    # a code-block which is not repeated is only run once, so is timed
+    # along with tracing it, rather than run again
+    duration: _t.Optional[float] = _time.perf_counter() - start
+    if trace is not None and lines.repeat > 1:
+        duration = None
+
+    _assert_output(holder, code_block, hooks)
+    _assert.budget(
+        lines,
+        None
+        if lines.max_time is None
+        else _timeit(lines, namespace, duration),
+        None if trace is None or trace.memory is None else trace.memory.peak,
+        code_block,
+    )
+
+
+def _console_results(
+    readme: _Readme, holder: _Holder, hooks: _Hooks
+) -> _t.Iterator[Result]:
+    """Test console blocks of README and yield the result of each.
+
+    Every console block is run concurrently before any is asserted.
+
+    :param readme: Compiled ``Readme`` object.
+    :param holder: Holding object.
+    :param hooks: Hooks to call for each console block.
+    :return: Generator yielding the result of each console block.
+    """
+    ran = _console.run(
+        readme.console,
+        holder.config.console_jobs,
+        holder.config.console_timeout,
+    )
+    for count, (element, (commands, duration)) in enumerate(
+        zip(readme.console, ran), 1
+    ):
+        code_block = f"console-block {count}"
+        holder.append_header(code_block)
+        if hooks.on_block_start is not None:
+            hooks.on_block_start(code_block, element)
+
+        status, error = PASSED, None
+        try:
+            for command in commands:
+                holder.append_shell(command.command.command)
+                if command.returncode is None:
+                    raise _CommandTimeoutError(
+                        code_block,
+                        command.command.command,
+                        _format_duration(holder.config.console_timeout),
+                    )
+
+                if command.output:
+                    holder.catch_output(command.output)
+
+                for line in command.command.expected:
+                    holder.expected.append(line)
+
+                # only the last command can be documented to fail
+                if command.returncode != (
+                    element.returncode if command is commands[-1] else 0
+                ):
+                    raise _CommandExitError(
+                        code_block, command.command.command, command.returncode
+                    )
+
+            _assert_output(holder, code_block, hooks)
+        except _DocumentError as err:
+            status, error = FAILED, err
+
+        yield Result(
+            code_block,
+            element[0].lineno if element else 0,
+            element[-1].lineno if element else 0,
+            status,
+            list(holder.actual),
+            list(holder.expected),
+            duration,
+            error,
+        )
+
+
+def _result(
+    document: _Document, holder: _Holder, index: int, baseline: _Baseline
+) -> Result:
+    """Test code-block of README and get its result.
+
+    :param document: README, the namespace to execute commands in, and
+        the hooks to call for the code-block.
+    :param holder: Holding object.
+    :param index: Index of code-block.
+    :param baseline: Baselines to benchmark against.
+    :return: Result of code-block.
+    """
+    element = document.readme[index]
+    code_block = f"code-block {index + 1}"
+    holder.append_header(code_block)
+    if document.hooks.on_block_start is not None:
+        document.hooks.on_block_start(code_block, element)
+
+    status, bench = PASSED, None
+    error: _t.Optional[BaseException] = None
+    trace = _TraceMemory() if holder.config.memory else None
+    start = _time.perf_counter()
+    try:
+        with _tracer.span(code_block, "code-block"):
+            _test_block(document, element, holder, code_block, trace)
+    except _DocumentError as err:
+        status, error = FAILED, err
+    except Exception as err:  # pylint: disable=broad-except
+        status, error = ERROR, err
+
+    duration = _time.perf_counter() - start
+    if holder.config.bench and error is None:
+        with _tracer.span(code_block, "bench"):
+            timing = _bench(document.readme, index)
+            if timing is not None:
+                bench = baseline.compare(element, *timing)
+
+    return Result(
+        code_block,
+        element[0].lineno if element else 0,
+        element[-1].lineno if element else 0,
+        status,
+        list(holder.actual),
+        list(holder.expected),
+        duration,
+        error,
+        None if trace is None else trace.memory,
+        bench,
+        holder.failed_lineno,
+    )
+
+
+def _results(
+    document: _Document,
+    holder: _Holder,
+    blocks: _t.Optional[_t.Set[int]] = None,
+    baseline: _t.Optional[_Baseline] = None,
+) -> _t.Generator[Result, None, None]:
+    """Test each code-block of README and yield its result.
+
+    Events of each code-block are left in the holder to be displayed or
+    cleared by the caller.
+
+    :param document: README, the namespace to execute commands in, and
+        the hooks to call for each code-block.
+    :param holder: Holding object.
+    :param blocks: Indices of code-blocks to test, if not all.
+    :param baseline: Baselines to benchmark against, which are saved by
+        the caller, otherwise they are loaded and saved here.
+    :return: Generator yielding the result of each code-block.
+    """
+    readme = document.readme
+    if holder.config.concurrent:
+        document.namespace.gather(readme.async_chains(blocks))
+
+    owned = baseline is None
+    if baseline is None:
+        baseline = _Baseline(holder.config.cache_dir / "baseline.json")
+
+    try:
+        for index in range(len(readme)):
+            if blocks is None or index in blocks:
+                yield _result(document, holder, index, baseline)
+
+        # console blocks are not selected, so are only run in full
+        if holder.config.console and readme.console and blocks is None:
+            yield from _console_results(readme, holder, document.hooks)
+    finally:
+        if owned:
+            baseline.save()
+
+
+def _lint_cache(config: _Config) -> _t.Optional[_Path]:
+    # directory to cache the results of linting in, if configured to
+    return config.cache_dir / "lint" if config.cache else None
+
+
+def _isolate(holder: _Holder) -> _t.ContextManager[_t.Any]:
+    # isolate the document from those after it if configured to
+    if holder.config.isolate:
+        return _Isolate()
+
+    return _contextlib.nullcontext()
+
+
+def _display(holder: _Holder, result: Result) -> None:
+    # display code-block as soon as it has been tested
+    if result.error is None:
+        holder.passed()
+    else:
+        holder.display_failure()
+
+    if result.memory is not None:
+        holder.display_memory(result.code_block, result.memory)
+
+    if result.bench is not None:
+        holder.display_bench(result.code_block, result.bench)
+
+
+def _test(
+    path: _t.Union[str, _Path],
+    holder: _Holder,
+    hooks: _Hooks = _NO_HOOKS,
+    lint: bool = True,
+    blocks: _t.Optional[_t.Set[int]] = None,
+) -> None:
+    """Test README, writing each code-block as soon as it has passed.
+
+    :param path: Path to README.
+    :param holder: Holding object.
+    :param hooks: Hooks to call throughout the run.
+    :param lint: Lint README first, unless it has been linted already.
+    :param blocks: Indices of code-blocks to test, if not all.
+    """
+    if lint:
+        _assert.syntax(path, cache=_lint_cache(holder.config))
+
+    readme = _Readme()
+    readme.load(path)
+    _assert.code_blocks(readme)
+    _assert.commands(readme, path)
+    _assert.options(readme)
+    if _exec_status.in_exec:
+        print("recursive exec not implemented")
+    else:
+        results: _t.List[Result] = []
+        baseline = _Baseline(holder.config.cache_dir / "baseline.json")
+        if hooks.on_document_start is not None:
+            hooks.on_document_start(str(path))
+
+        # caches are saved once the document is no longer isolated, so
+        # they are not written with any state it changed
+        try:
+            with _isolate(holder), _Namespace() as namespace, (
+                _contextlib.closing(
+                    _results(
+                        _Document(readme, namespace, hooks),
+                        holder,
+                        blocks,
+                        baseline,
+                    )
+                )
+            ) as generator:
+                for result in generator:
+                    results.append(result)
+                    _display(holder, result)
+                    if result.error is not None:
+                        raise result.error
+        finally:
+            baseline.save()
+            if hooks.on_document_end is not None:
+                hooks.on_document_end(str(path), results)
+
+        holder.display()
+
+
+def _lint(
+    path: str, trace: bool, cache: _t.Optional[_Path] = None
+) -> _t.Tuple[_t.Optional[str], _t.List[_t.Dict[str, _t.Any]]]:
+    """Lint README in a worker process.
+
+    :param path: Path to README.
+    :param trace: Trace linting, to be merged into the trace of the run.
+    :param cache: Directory to cache results in, if any.
+    :return: Message of the first error, if any, and traced events.
+    """
+    if trace:
+        _tracer.enable()
+
+    message = _assert.lint(path, cache=cache)
+    return message, _tracer.collect() if trace else []
+
+
+def _test_docstring(
+    lines: _t.List[str], lineno: int, filename: str, config: _Config
+) -> str:
+    # test the examples of a docstring, and render its failure, if any
+    readme = _Readme()
+    for example, start in _examples(lines, lineno):
+        readme.add_block(example, start)
+
+    if not readme:
+        return ""
+
+    stream = _io.StringIO()
+    holder = _Holder(config, stream=stream)
+    try:
+        _assert.commands(readme, filename)
+        with _Namespace() as namespace:
+            for result in _results(_Document(readme, namespace), holder):
+                if result.error is not None:
+                    holder.display_failure()
+                    stream.write(f"{result.error}\n")
+                    break
+
+                holder.passed()
+    except _DocumentError as err:
+        stream.write(f"{err}\n")
+
+    return stream.getvalue()
+
+
+def _test_module(
+    source: str,
+    name: str,
+    filename: str,
+    options: _t.Optional[_t.Dict[str, _t.Any]] = None,
+) -> _t.List[_Failure]:
+    """Test the docstrings of a module in a worker process.
+
+    Each docstring is tested in its own namespace, and stops at its
+    first failure.
+
+    :param source: Source of module.
+    :param name: Name of module.
+    :param filename: Path to module.
+    :param options: Options to use instead of those configured.
+    :return: Failure of each docstring which failed.
+    """
+    config = _load_config(**(options or {}))
+    failures = []
+    for qualname, lineno, lines in _docstrings(source, name, filename):
+        failure = _test_docstring(lines, lineno, filename, config)
+        if failure:
+            failures.append((f"{filename}:{lineno}: {qualname}", failure))
+
+    return failures
+
+
+def _test_package(
+    name: str,
+    holder: _Holder,
+    options: _t.Optional[_t.Dict[str, _t.Any]] = None,
+) -> None:
+    """Test the docstrings of every module of a package.
+
+    Modules are spread across a process pool, and those which passed
+    and have not changed since are skipped. Only the source of each
+    module is compared, so a module is not tested again if only a
+    module it imports has changed.
+
+    :param name: Name of package, or module.
+    :param holder: Holding object.
+    :param options: Options to use instead of those configured.
+    :raises DocumentError: If any docstring failed.
+    """
+    hashes = _Hashes(holder.config.cache_dir / "docstrings.json")
+    modules = []
+    for module, path in _sources(name):
+        source = path.read_text(encoding="utf-8")
+        if not hashes.unchanged(str(path), source):
+            modules.append((module, path, source))
+
+    failed: _t.List[str] = []
+    try:
+        with _ProcessPoolExecutor() as executor:
+            futures = [
+                executor.submit(_test_module, s, m, str(p), options)
+                for m, p, s in modules
+            ]
+            for (_, path, source), future in zip(modules, futures):
+                failures = future.result()
+                for header, rendered in failures:
+                    holder.display_rendered(header, rendered)
+
+                hashes.record(str(path), source, not failures)
+                failed.extend(header for header, _ in failures)
+    finally:
+        hashes.save()
+
+    if failed:
+        raise _DocumentError(f"{len(failed)} docstrings failed: {failed[0]}")
+
+    holder.display()
+
+
+def _pipeline(
+    paths: _t.List[_Path],
+    holder: _Holder,
+    hooks: _Hooks = _NO_HOOKS,
+    shard: _t.Optional[_Shard] = None,
+    configs: _t.Optional[_t.Mapping[str, _Config]] = None,
+) -> None:
+    """Test READMEs, linting ahead in a worker process.
+
+    Each README is linted while the one before it is executed, so the
+    time taken is that of the slower of the two, rather than both.
+
+    An error only stops the README it is raised for, and the first is
+    raised once every README has been tested.
+
+    :param paths: Paths to READMEs.
+    :param holder: Holding object.
+    :param hooks: Hooks to call throughout the run.
+    :param shard: Indices of code-blocks to test of each README, if not
+        all.
+    :param configs: Config of each README, if not that of the holder.
+    """
+    errors = []
+    holders = [
+        holder if configs is None else holder.using(configs[str(i)])
+        for i in paths
+    ]
+    with _ProcessPoolExecutor(max_workers=1) as executor:
+        futures = [
+            executor.submit(
+                _lint, str(p), _tracer.enabled, _lint_cache(h.config)
+            )
+            for p, h in zip(paths, holders)
+        ]
+        for path, using, future in zip(paths, holders, futures):
+            message, events = future.result()
+            _tracer.merge(events)
+            try:
+                _assert.linted(message)
+                _test(
+                    path,
+                    using,
+                    hooks,
+                    lint=False,
+                    blocks=None if shard is None else shard[str(path)],
+                )
+            except SystemExit as err:
+
+                # a README without code-blocks only warns, and the rest
+                # are still to be tested
+                if err.code not in (None, 0):
+                    raise
+            except Exception as err:  # pylint: disable=broad-except
+                errors.append(err)
+
+    if errors:
+        raise errors[0]
+
+
+def _settings(path: _t.Optional[_t.Union[str, _Path]]) -> _Settings:
+    """Get the settings of a run from the commandline.
+
+    :param path: Path to README, which is tested with the defaults
+        instead of parsing the commandline, if provided.
+    :return: Settings of run.
+    """
+    if path is not None:
+        return _Settings([_Path(path)], {})
+
+    parser = _Parser()
+    args = parser.args
+    options: _t.Dict[str, _t.Any] = {
+        i: True for i in _OPTIONS if getattr(args, i)
+    }
+    if args.durations is not None:
+        options["durations"] = str(args.durations)
+
+    return _Settings(
+        parser.files,
+        options,
+        verbose=args.verbose,
+        output=args.output,
+        report=args.report,
+        trace=args.trace,
+        shard=args.shard,
+        root=parser.discover,
+        package=args.package,
+        interpreters=args.interpreters,
+        exclude=args.exclude,
+        last_failed=args.lf,
+        failed_first=args.ff,
+    )
+
+
+def _cache_plugins(settings: _Settings, holder: _Holder) -> _t.List[_t.Any]:
+    """Get the plugins which record to caches, if configured to.
+
+    :param settings: Settings of run.
+    :param holder: Holding object.
+    :return: Plugins to record with.
+    """
+    plugins: _t.List[_t.Any] = []
+    config = holder.config
+    if settings.last_failed or settings.failed_first or config.cache:
+        plugins.append(
+            _LastFailedPlugin(
+                _LastFailed(config.cache_dir / "lastfailed.json")
+            )
+        )
+
+    # shards must all partition with the same durations, so they are
+    # only recorded to a file shared with them, by runs which are not
+    # sharded
+    if config.durations is not None and settings.shard is None:
+        plugins.append(_DurationsPlugin(_Durations(config.durations)))
+
+    return plugins
+
+
+def _test_paths(settings: _Settings, holder: _Holder, hooks: _Hooks) -> None:
+    """Test READMEs selected by the settings of a run.
+
+    :param settings: Settings of run.
+    :param holder: Holding object.
+    :param hooks: Hooks to call throughout the run.
+    """
+    paths = settings.paths
+    selected = None
+    configs = None
+    if settings.root is not None:
+        paths = _discover(settings.root, settings.exclude)
+        configs = _configs(paths, **settings.options)
+
+    if settings.shard is not None:
+        durations = holder.config.durations
+        selected = _select(
+            paths,
+            *settings.shard,
+            None if durations is None else _Durations(durations),
+        )
+        paths = [i for i in paths if str(i) in selected]
+
+    if settings.last_failed or settings.failed_first:
+        lastfailed = _LastFailed(holder.config.cache_dir / "lastfailed.json")
+        failed = _select_failed(paths, lastfailed, selected)
+
+        # like pytest, everything is tested if nothing failed
+        if settings.last_failed and failed:
+            selected = failed
+
+        paths = sorted(paths, key=lambda x: str(x) not in failed)
+        if selected is not None:
+            paths = [i for i in paths if selected.get(str(i))]
+
+    if selected is None and configs is None and len(paths) == 1:
+        _test(paths[0], holder, hooks)
+    else:
+        _pipeline(paths, holder, hooks, selected, configs)
+
+
 def main(path: _t.Optional[_t.Union[str, _Path]] = None) -> None:
     """Parse README from commandline argument.
 
@@ -69,8 +875,9 @@ def main(path: _t.Optional[_t.Union[str, _Path]] = None) -> None:
         2. Actual from the actual command output
         3. Total with a combination of both plus code-block headings
 
-    Run assertions on the actual and expected commands and print output
-    from the total ``list``.
+    Run assertions on the actual and expected commands and write output
+    from the total ``list`` as each code-block passes. Unless verbose,
+    the total is only rendered for a code-block that fails.
 
     Clear and initialize base key-values on each iteration.
 
@@ -81,27 +888,112 @@ def main(path: _t.Optional[_t.Union[str, _Path]] = None) -> None:
     :raises OutputDocumentError: Raise if the expected ``list`` contains
         nothing even though command output was captured.
     """
-    if path is None:
-        parser = _Parser()
-        path = parser.file
+    settings = _settings(path)
+    plugins = list(_load_plugins())
+    if settings.report is not None and settings.interpreters is None:
+        plugins.append(_ReportPlugin(settings.report, settings.shard))
+
+    if settings.trace is not None:
+        _tracer.enable()
+        plugins.append(_TracePlugin())
+
+    try:
+        with _open_output(settings.output) as stream:
+            holder = _Holder(
+                _load_config(**settings.options), settings.verbose, stream
+            )
+            plugins.extend(_cache_plugins(settings, holder))
+            if settings.package is not None:
+                _test_package(settings.package, holder, settings.options)
+            elif settings.interpreters is not None:
+                _test_matrix(
+                    settings.interpreters,
+                    settings.paths,
+                    holder,
+                    settings.options,
+                    settings.report,
+                )
+            else:
+                _test_paths(settings, holder, _Hooks(plugins))
+    finally:
+        if settings.trace is not None:
+            _tracer.dump(settings.trace)
+
+
+def run(
+    path_or_text: _t.Union[str, _Path], **options: _t.Any
+) -> _t.Iterator[Result]:
+    """Test README and yield the result of each code-block.
+
+    Nothing is printed, and every code-block is run, even after one has
+    failed.
 
-    holder = _Holder()
-    _assert.syntax(path)
+    :param path_or_text: Path to README, or content of README if a
+        ``str`` containing more than one line.
+    :param options: Options to use instead of those configured under
+        ``[tool.readmetester]`` in pyproject.toml.
+    :raises SyntaxDocumentError: If README or its commands have invalid
+        syntax.
+    :return: Generator yielding the result of each code-block.
+    """
     readme = _Readme()
-    readme.load(path)
-    _assert.code_blocks(readme)
-    if _exec_status.in_exec:
-        print("recursive exec not implemented")
+    if isinstance(path_or_text, str) and "\n" in path_or_text:
+        path, content = "<string>", path_or_text
+        _assert.syntax(path, content)
+        readme.loads(content)
     else:
-        for count, element in enumerate(readme, 1):
-            code_block = f"code-block {count}"
-            holder.total.append_header(code_block)
-            _process(element, holder)
-            for position, _ in enumerate(
-                _zip_longest(holder.actual, holder.expected)
-            ):
-                actual, expected = holder.getpair(position)
-                _assert.actual_expected(actual, expected, code_block)
-                _assert.equality(actual, expected, code_block)
+        path = str(path_or_text)
+        _assert.syntax(path)
+        readme.load(path)
 
-        holder.display()
+    yield from _run(readme, path, _load_config(**options))
+
+
+def run_blocks(
+    blocks: _t.Iterable[_t.Tuple[_t.Iterable[str], int]],
+    path: _t.Union[str, _Path],
+    config: _t.Optional[_Config] = None,
+) -> _t.Iterator[Result]:
+    """Test code-blocks taken from a document parsed some other way.
+
+    Like ``run``, nothing is printed, and every code-block is run, even
+    after one has failed.
+
+    :param blocks: Lines of each code-block, without its directive, and
+        the line its first line is on.
+    :param path: Path to document code-blocks are taken from.
+    :param config: Config to test code-blocks with, defaults to that of
+        the current working directory.
+    :raises SyntaxDocumentError: If commands or options of code-blocks
+        are invalid.
+    :return: Generator yielding the result of each code-block.
+    """
+    readme = _Readme()
+    for lines, lineno in blocks:
+        readme.add_block(lines, lineno)
+
+    yield from _run(
+        readme, str(path), _load_config() if config is None else config
+    )
+
+
+def _run(readme: _Readme, path: str, config: _Config) -> _t.Iterator[Result]:
+    _assert.commands(readme, path)
+    _assert.options(readme)
+    holder = _Holder(config)
+    hooks = _Hooks(_load_plugins())
+    results = []
+    if hooks.on_document_start is not None:
+        hooks.on_document_start(path)
+
+    try:
+        with _isolate(holder), _Namespace() as namespace:
+            for result in _results(
+                _Document(readme, namespace, hooks), holder
+            ):
+                holder.passed()
+                results.append(result)
+                yield result
+    finally:
+        if hooks.on_document_end is not None:
+            hooks.on_document_end(path, results)
@@ -0,0 +1,266 @@
+"""
+readmetester._matrix
+====================
+
+Test READMEs under several interpreters at the same time.
+"""
+import asyncio as _asyncio
+import json as _json
+import os as _os
+import shutil as _shutil
+import tempfile as _tempfile
+import typing as _t
+from pathlib import Path as _Path
+
+from ._config import NAME as _NAME
+from ._holder import Holder as _Holder
+from .exceptions import DocumentError as _DocumentError
+
+# interpreters import this package from the same tree as this one
+_ROOT = str(_Path(__file__).parent.parent)
+_WORKER = f"{_NAME}._worker"
+
+Report = _t.Dict[str, _t.Any]
+
+
+def locate(names: _t.Iterable[str]) -> _t.Dict[str, str]:
+    """Locate interpreters installed locally.
+
+    :param names: Names of interpreters on ``PATH``, or paths to them.
+    :raises FileNotFoundError: If an interpreter cannot be found.
+    :return: Path to each interpreter, keyed by its name.
+    """
+    located = {}
+    for name in names:
+        path = _shutil.which(name)
+        if path is None:
+            raise FileNotFoundError(f"interpreter not found: {name}")
+
+        located[name] = path
+
+    return located
+
+
+async def _work(
+    path: str, readmes: _t.List[str], options: _t.Dict[str, _t.Any]
+) -> Report:
+    # an interpreter which cannot run the worker is recorded as an
+    # error, so the results of the others are still reported
+    with _tempfile.TemporaryDirectory() as tmpdir:
+        output = _os.path.join(tmpdir, "results.json")
+        env = dict(_os.environ)
+        env["PYTHONPATH"] = _os.pathsep.join(
+            i for i in (_ROOT, env.get("PYTHONPATH")) if i
+        )
+        try:
+            process = await _asyncio.create_subprocess_exec(
+                path,
+                "-m",
+                _WORKER,
+                output,
+                _json.dumps(options),
+                *readmes,
+                stdout=_asyncio.subprocess.DEVNULL,
+                stderr=_asyncio.subprocess.PIPE,
+                env=env,
+            )
+        except OSError as err:
+            return {"version": None, "error": str(err), "documents": []}
+
+        _, stderr = await process.communicate()
+        if process.returncode:
+            lines = stderr.decode(errors="replace").strip().splitlines()
+            return {
+                "version": None,
+                "error": (
+                    f"exited with {process.returncode}: "
+                    f"{lines[-1] if lines else ''}"
+                ),
+                "documents": [],
+            }
+
+        return _json.loads(_Path(output).read_text(encoding="utf-8"))
+
+
+async def _gather(
+    interpreters: _t.Dict[str, str],
+    readmes: _t.List[str],
+    options: _t.Dict[str, _t.Any],
+) -> _t.List[Report]:
+    return list(
+        await _asyncio.gather(
+            *(_work(i, readmes, options) for i in interpreters.values())
+        )
+    )
+
+
+def _document(
+    ran: _t.Dict[str, Report], count: int, readme: str
+) -> _t.Dict[str, _t.Any]:
+    # compare the results of a README under each interpreter which ran
+    rows: _t.Dict[str, _t.Dict[str, _t.Any]] = {}
+    errors = {}
+    for name, report in ran.items():
+        document = report["documents"][count]
+        if document["error"] is not None:
+            errors[name] = document["error"]
+
+        for result in document["results"]:
+            row = rows.setdefault(
+                result["code_block"],
+                {
+                    "code_block": result["code_block"],
+                    "lineno": result["lineno"],
+                    "results": {},
+                },
+            )
+            row["results"][name] = {
+                k: result[k] for k in ("status", "actual", "error")
+            }
+
+    for row in rows.values():
+        results = list(row["results"].values())
+        row["diverges"] = len(results) != len(ran) or any(
+            (i["status"], i["actual"])
+            != (results[0]["status"], results[0]["actual"])
+            for i in results
+        )
+
+    return {"file": readme, "errors": errors, "rows": list(rows.values())}
+
+
+def matrix(
+    interpreters: _t.Dict[str, str],
+    readmes: _t.List[str],
+    options: _t.Dict[str, _t.Any],
+) -> Report:
+    """Test READMEs under each interpreter at the same time.
+
+    Each interpreter runs a worker, which tests every code-block of each
+    README and writes its results, without needing network access. The
+    worker imports this package, so each interpreter needs its
+    dependencies installed. An interpreter which cannot run the worker
+    is recorded with its error, and the others are still compared.
+
+    :param interpreters: Path to each interpreter, keyed by its name.
+    :param readmes: Paths to READMEs.
+    :param options: Options to use instead of those configured.
+    :return: Matrix of the result of each code-block under each
+        interpreter, noting which diverge.
+    """
+    reports = dict(
+        zip(
+            interpreters, _asyncio.run(_gather(interpreters, readmes, options))
+        )
+    )
+    ran = {k: v for k, v in reports.items() if v.get("error") is None}
+    documents = [_document(ran, c, r) for c, r in enumerate(readmes)]
+
+    return {
+        "interpreters": {
+            k: {
+                "path": interpreters[k],
+                "version": v["version"],
+                "error": v.get("error"),
+            }
+            for k, v in reports.items()
+        },
+        "documents": documents,
+    }
+
+
+def render(report: Report) -> str:
+    """Render matrix as a table of the status of each code-block.
+
+    :param report: Matrix of results.
+    :return: Rendered table, with code-blocks which diverge marked, and
+        any errors.
+    """
+    names = list(report["interpreters"])
+    lines = [
+        f"{k}: {v['error']}"
+        for k, v in report["interpreters"].items()
+        if v["error"] is not None
+    ]
+    for document in report["documents"]:
+        table = [["", *names, ""]]
+        for row in document["rows"]:
+            table.append(
+                [
+                    row["code_block"],
+                    *(
+                        row["results"].get(i, {}).get("status", "-")
+                        for i in names
+                    ),
+                    "diverges" if row["diverges"] else "",
+                ]
+            )
+
+        widths = [max(len(r[i]) for r in table) for i in range(len(table[0]))]
+        lines.append(document["file"])
+        lines.extend(
+            "  ".join(c.ljust(w) for c, w in zip(r, widths)).rstrip()
+            for r in table
+        )
+        for name, error in document["errors"].items():
+            lines.append(f"{name}: {error}")
+
+        for row in document["rows"]:
+            for name, result in row["results"].items():
+                if result["error"] is not None:
+                    lines.append(f"{name}: {result['error']}")
+
+    return "\n".join(lines)
+
+
+def test(
+    names: _t.List[str],
+    paths: _t.List[_Path],
+    holder: _Holder,
+    options: _t.Dict[str, _t.Any],
+    report: _t.Optional[_Path] = None,
+) -> None:
+    """Test READMEs under several interpreters at the same time.
+
+    :param names: Names of interpreters, or paths to them.
+    :param paths: Paths to READMEs.
+    :param holder: Holding object.
+    :param options: Options to use instead of those configured.
+    :param report: Path to write matrix to as JSON, if any.
+    :raises DocumentError: If any code-block failed under any
+        interpreter, or any interpreter could not test READMEs.
+    """
+    results = matrix(locate(names), [str(i) for i in paths], options)
+    if report is not None:
+        report.write_text(_json.dumps(results, indent=2), encoding="utf-8")
+
+    holder.display_rendered(
+        ", ".join(
+            f"{k} {v['version'] or 'error'}"
+            for k, v in results["interpreters"].items()
+        ),
+        render(results),
+    )
+    failed = (
+        [
+            f"{k}: {v['error']}"
+            for k, v in results["interpreters"].items()
+            if v["error"] is not None
+        ]
+        + [
+            f"{k}: {v}"
+            for i in results["documents"]
+            for k, v in i["errors"].items()
+        ]
+        + [
+            f"{k}: {v['error']}"
+            for i in results["documents"]
+            for r in i["rows"]
+            for k, v in r["results"].items()
+            if v["error"] is not None
+        ]
+    )
+    if failed:
+        raise _DocumentError(f"{len(failed)} failed: {failed[0]}")
+
+    holder.display()
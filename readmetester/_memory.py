@@ -0,0 +1,122 @@
+"""
+readmetester._memory
+====================
+
+Trace the memory allocated by code-blocks.
+"""
+from __future__ import annotations
+
+import codecs as _codecs
+import gc as _gc
+import sys as _sys
+import tracemalloc as _tracemalloc
+import typing as _t
+from pathlib import Path as _Path
+
+try:
+    import resource as _resource
+except ImportError:  # pragma: no cover
+    _resource = None  # type: ignore
+
+
+def _maxrss() -> _t.Optional[int]:
+    # peak resident set size in bytes, if it can be measured on this
+    # platform
+    if _resource is None:  # pragma: no cover
+        return None
+
+    maxrss = _resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if _sys.platform == "darwin" else maxrss * 1024
+
+
+class Memory(_t.NamedTuple):
+    """Memory allocated while testing a code-block, in bytes.
+
+    Retained memory is still alive once the code-block has finished, so
+    is held by the namespace into later code-blocks. Sites are the lines
+    which retain the most.
+    """
+
+    peak: int
+    retained: int
+    rss: _t.Optional[int]
+    sites: _t.List[_t.Tuple[str, int]]
+
+
+class TraceMemory:
+    """Context action for tracing the memory a code-block allocates.
+
+    Allocations are only traced within the context, so code-blocks are
+    run at full speed if not traced. If memory is already being traced,
+    that session is shared, and only what changed within the context is
+    counted.
+
+    :param sites: Number of top allocation sites to record.
+    """
+
+    _EXCLUDE = (
+        _tracemalloc.__file__,
+        str(_Path(__file__).parent),
+        "<frozen importlib._bootstrap",
+    )
+
+    def __init__(self, sites: int = 3) -> None:
+        self._sites = sites
+        self._rss = _maxrss()
+        self._before: _t.Optional[_tracemalloc.Snapshot] = None
+        self._current = 0
+        self.memory: _t.Optional[Memory] = None
+
+    def __enter__(self) -> TraceMemory:
+        # expected output is decoded with this codec, which would
+        # otherwise be imported, and charged to, the first code-block
+        # with output
+        _codecs.lookup("unicode_escape")
+        _gc.collect()
+        self._rss = _maxrss()
+        if _tracemalloc.is_tracing():
+            self._before = _tracemalloc.take_snapshot()
+            self._current = _tracemalloc.get_traced_memory()[0]
+            if hasattr(_tracemalloc, "reset_peak"):
+                _tracemalloc.reset_peak()
+        else:
+            _tracemalloc.start()
+
+        return self
+
+    def __exit__(
+        self, exc_type: _t.Any, exc_val: _t.Any, exc_tb: _t.Any
+    ) -> None:
+        # tracing may have been stopped by the code-block itself
+        if not _tracemalloc.is_tracing():
+            return
+
+        _, peak = _tracemalloc.get_traced_memory()
+        _gc.collect()
+        snapshot = _tracemalloc.take_snapshot()
+
+        # statistics are filtered rather than the snapshot, as there are
+        # far fewer sites than there are traces
+        if self._before is None:
+            _tracemalloc.stop()
+            sizes = [
+                (i.traceback[0], i.size) for i in snapshot.statistics("lineno")
+            ]
+        else:
+            peak = max(peak - self._current, 0)
+            sizes = [
+                (i.traceback[0], i.size_diff)
+                for i in snapshot.compare_to(self._before, "lineno")
+                if i.size_diff > 0
+            ]
+
+        stats = [
+            i for i in sizes if not i[0].filename.startswith(self._EXCLUDE)
+        ]
+        rss = _maxrss()
+        self.memory = Memory(
+            peak,
+            sum(i for _, i in stats),
+            None if rss is None or self._rss is None else rss - self._rss,
+            [(f"{f.filename}:{f.lineno}", i) for f, i in stats[: self._sites]],
+        )
@@ -0,0 +1,115 @@
+"""
+readmetester._package
+=====================
+
+Find docstring examples of a package, without importing it.
+"""
+import ast as _ast
+import typing as _t
+from importlib.machinery import PathFinder as _PathFinder
+from pathlib import Path as _Path
+
+_INIT = "__init__"
+_SUFFIX = ".py"
+_START_CODE = ">>> "
+
+_Docstring = _t.Tuple[str, int, _t.List[str]]
+
+
+def sources(name: str) -> _t.List[_t.Tuple[str, _Path]]:
+    """Locate the modules of a package without importing it.
+
+    :param name: Name of package, or module.
+    :raises ModuleNotFoundError: If package cannot be found.
+    :return: Name and path of each module.
+    """
+    search: _t.Optional[_t.List[str]] = None
+    origin = None
+    for part in name.split("."):
+        spec = _PathFinder.find_spec(part, search)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+        search, origin = spec.submodule_search_locations, spec.origin
+
+    # a module which is not a package is found at its origin
+    if search is None:
+        return [(name, _Path(str(origin)))]
+
+    modules = []
+    for location in search:
+        for path in sorted(_Path(location).rglob(f"*{_SUFFIX}")):
+            parts = path.relative_to(location).with_suffix("").parts
+            if parts[-1] == _INIT:
+                parts = parts[:-1]
+
+            modules.append((".".join((name, *parts)), path))
+
+    return modules
+
+
+def docstrings(source: str, name: str, filename: str) -> _t.List[_Docstring]:
+    """Extract the docstrings of a module with ``ast``.
+
+    :param source: Source of module.
+    :param name: Name of module.
+    :param filename: Path to module.
+    :return: Qualified name of each docstring, the line it starts on,
+        and its lines.
+    """
+    found = []
+
+    def _add(node: _t.Any, qualname: str) -> None:
+        if (
+            node.body
+            and isinstance(node.body[0], _ast.Expr)
+            and isinstance(node.body[0].value, _ast.Constant)
+            and isinstance(node.body[0].value.value, str)
+        ):
+            found.append(
+                (
+                    qualname,
+                    node.body[0].lineno,
+                    node.body[0].value.value.splitlines(),
+                )
+            )
+
+        for child in _ast.iter_child_nodes(node):
+            if isinstance(
+                child, (_ast.FunctionDef, _ast.AsyncFunctionDef, _ast.ClassDef)
+            ):
+                _add(child, f"{qualname}.{child.name}")
+
+    _add(_ast.parse(source, filename), name)
+    return found
+
+
+def examples(
+    lines: _t.List[str], lineno: int
+) -> _t.Iterator[_t.Tuple[_t.List[str], int]]:
+    """Split the examples out of a docstring.
+
+    Like ``doctest``, an example starts with a command and ends with a
+    blank line.
+
+    :param lines: Lines of docstring.
+    :param lineno: Line docstring starts on.
+    :return: Generator yielding the lines of each example, and the line
+        it starts on.
+    """
+    example: _t.List[str] = []
+    start = 0
+    for count, line in enumerate(lines):
+        if example:
+            if line.strip():
+                example.append(line)
+                continue
+
+            yield example, start
+            example = []
+
+        if line.lstrip().startswith(_START_CODE):
+            example, start = [line], lineno + count
+
+    if example:
+        yield example, start
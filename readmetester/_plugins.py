@@ -0,0 +1,318 @@
+"""
+readmetester._plugins
+=====================
+
+Plugins are loaded from the ``readmetester`` entry point group.
+"""
+# pylint: disable=unused-argument
+from __future__ import annotations
+
+import functools as _functools
+import json as _json
+import time as _time
+import typing as _t
+from pathlib import Path as _Path
+from warnings import warn as _warn
+
+from ._config import NAME as _NAME
+from ._core import Block as _Block
+from ._store import Durations as _Durations
+from ._store import LastFailed as _LastFailed
+from ._trace import tracer as _tracer
+
+if _t.TYPE_CHECKING:  # pragma: no cover
+    from ._main import Result
+
+try:
+    from importlib import metadata as _metadata
+except ImportError:  # pragma: no cover
+    import importlib_metadata as _metadata  # type: ignore
+
+_Hook = _t.Optional[_t.Callable[..., None]]
+
+_HOOKS = (
+    "on_document_start",
+    "on_block_start",
+    "before_command",
+    "after_command",
+    "on_assert",
+    "on_document_end",
+)
+
+
+class Plugin:
+    """Base for plugins, which override the hooks they implement.
+
+    A plugin named by an entry point can be a subclass, which is
+    instantiated without arguments, or an instance. It does not need to
+    subclass this, so long as its hooks are named the same.
+    """
+
+    def on_document_start(self, path: str) -> None:
+        """Called before the first code-block of a README is run.
+
+        :param path: Path to README.
+        """
+
+    def on_block_start(self, code_block: str, block: _Block) -> None:
+        """Called before a code-block is run.
+
+        :param code_block: Header of code-block.
+        :param block: Lines of code-block, with its options.
+        """
+
+    def before_command(self, lineno: int) -> None:
+        """Called before commands are executed.
+
+        Consecutive commands with no documented output between them are
+        executed as one, so this is called once for all of them.
+
+        :param lineno: Line the first command is documented on.
+        """
+
+    def after_command(
+        self,
+        lineno: int,
+        output: _t.List[_t.Optional[_t.List[str]]],
+        duration: float,
+    ) -> None:
+        """Called after commands have been executed without raising.
+
+        :param lineno: Line the first command is documented on.
+        :param output: Output of each command, or None if there was
+            none.
+        :param duration: Seconds the commands took.
+        """
+
+    def on_assert(
+        self,
+        code_block: str,
+        actual: _t.Optional[str],
+        expected: _t.Optional[str],
+    ) -> None:
+        """Called before actual output is asserted against expected.
+
+        :param code_block: Header of code-block.
+        :param actual: Actual output, if any.
+        :param expected: Expected output, if any.
+        """
+
+    def on_document_end(self, path: str, results: _t.List[Result]) -> None:
+        """Called after the last code-block of a README was run.
+
+        This is called even if a code-block failed.
+
+        :param path: Path to README.
+        :param results: Result of each code-block that was run.
+        """
+
+
+def _dispatch(methods: _t.List[_t.Callable[..., None]]) -> _Hook:
+    # only wrap the methods if there is more than one to call
+    if not methods:
+        return None
+
+    if len(methods) == 1:
+        return methods[0]
+
+    def _hook(*args: _t.Any) -> None:
+        for method in methods:
+            method(*args)
+
+    return _hook
+
+
+class Hooks:  # pylint: disable=too-few-public-methods
+    """Dispatch each hook to the plugins which implement it.
+
+    A hook which no plugin implements is None, so calling it can be
+    skipped altogether.
+
+    :param plugins: Plugins to dispatch hooks to.
+    """
+
+    on_document_start: _Hook
+    on_block_start: _Hook
+    before_command: _Hook
+    after_command: _Hook
+    on_assert: _Hook
+    on_document_end: _Hook
+
+    def __init__(self, plugins: _t.Iterable[_t.Any]) -> None:
+        plugins = list(plugins)
+        for name in _HOOKS:
+            # hooks are looked up on each plugin, so modules and objects
+            # which set them are dispatched to, but hooks inherited from
+            # ``Plugin`` do nothing, so are not
+            default = getattr(Plugin, name)
+            methods = [getattr(i, name, None) for i in plugins]
+            setattr(
+                self,
+                name,
+                _dispatch(
+                    [
+                        i
+                        for i in methods
+                        if i is not None
+                        and getattr(i, "__func__", None) is not default
+                    ]
+                ),
+            )
+
+
+@_functools.lru_cache(maxsize=None)
+def load_plugins() -> _t.Tuple[_t.Any, ...]:
+    """Load plugins registered under the entry point group.
+
+    A plugin which fails to load is skipped with a warning.
+
+    :return: Tuple of loaded plugins.
+    """
+    entry_points = _metadata.entry_points()
+    selected = (
+        entry_points.select(group=_NAME)
+        if hasattr(entry_points, "select")
+        else entry_points.get(_NAME, [])  # type: ignore
+    )
+    plugins = []
+    for entry_point in selected:
+        try:
+            plugin = entry_point.load()
+            plugins.append(plugin() if isinstance(plugin, type) else plugin)
+        except Exception as err:  # pylint: disable=broad-except
+            # a broken plugin should not stop every run
+            _warn(
+                f"failed to load plugin {entry_point.name}: {err}",
+                RuntimeWarning,
+            )
+
+    return tuple(plugins)
+
+
+class ReportPlugin(Plugin):
+    """Write JSON report of the result of each code-block.
+
+    The report is written again as each README ends, so it holds every
+    README tested so far.
+
+    :param path: Path to write report to.
+    :param shard: Shard tested, and number of shards, if sharded.
+    """
+
+    def __init__(
+        self, path: _Path, shard: _t.Optional[_t.Tuple[int, int]] = None
+    ) -> None:
+        self._path = path
+        self._report: _t.Dict[str, _t.Any] = {"documents": []}
+        if shard is not None:
+            self._report["shard"] = {"index": shard[0], "count": shard[1]}
+
+    def on_document_end(self, path: str, results: _t.List[Result]) -> None:
+        report = []
+        for result in results:
+            entry = result._asdict()
+            entry["error"] = (
+                None if result.error is None else str(result.error)
+            )
+            if result.memory is not None:
+                entry["memory"] = result.memory._asdict()
+
+            if result.bench is not None:
+                entry["bench"] = result.bench._asdict()
+
+            report.append(entry)
+
+        self._report["documents"].append({"file": path, "results": report})
+        self._path.write_text(
+            _json.dumps(self._report, indent=2), encoding="utf-8"
+        )
+
+
+def merge_reports(paths: _t.Iterable[_Path]) -> _t.Dict[str, _t.Any]:
+    """Merge reports written by each shard into one.
+
+    Results of a README split between shards are put back in the order
+    they are documented.
+
+    :param paths: Paths to reports.
+    :return: Merged report.
+    """
+    documents: _t.Dict[str, _t.List[_t.Dict[str, _t.Any]]] = {}
+    for path in paths:
+        report = _json.loads(path.read_text(encoding="utf-8"))
+        for document in report["documents"]:
+            documents.setdefault(document["file"], []).extend(
+                document["results"]
+            )
+
+    return {
+        "documents": [
+            {"file": k, "results": sorted(v, key=lambda x: x["lineno"])}
+            for k, v in documents.items()
+        ]
+    }
+
+
+class TracePlugin(Plugin):
+    """Record the execution of commands as trace events."""
+
+    def after_command(
+        self,
+        lineno: int,
+        output: _t.List[_t.Optional[_t.List[str]]],
+        duration: float,
+    ) -> None:
+        end = _time.perf_counter_ns()
+        _tracer.record(
+            f"line {lineno}", "exec", end - int(duration * 1e9), end
+        )
+
+
+class DurationsPlugin(Plugin):
+    """Record the seconds each code-block took, to balance shards with.
+
+    :param durations: Durations to record to, which are written as each
+        README ends.
+    """
+
+    def __init__(self, durations: _Durations) -> None:
+        self._durations = durations
+        self._blocks: _t.Dict[str, _Block] = {}
+
+    def on_block_start(self, code_block: str, block: _Block) -> None:
+        self._blocks[code_block] = block
+
+    def on_document_end(self, path: str, results: _t.List[Result]) -> None:
+        for result in results:
+            self._durations.record(
+                self._blocks[result.code_block], result.duration
+            )
+
+        self._blocks.clear()
+        self._durations.save()
+
+
+class LastFailedPlugin(Plugin):
+    """Record the code-blocks of each README which failed.
+
+    Console blocks cannot be selected, so they are not recorded.
+
+    :param lastfailed: Failures to record to, which are written as each
+        README ends.
+    """
+
+    _PREFIX = "code-block "
+
+    def __init__(self, lastfailed: _LastFailed) -> None:
+        self._lastfailed = lastfailed
+
+    def on_document_end(self, path: str, results: _t.List[Result]) -> None:
+        for result in results:
+            if result.code_block.startswith(self._PREFIX):
+                self._lastfailed.record(
+                    path,
+                    int(result.code_block[len(self._PREFIX) :]) - 1,
+                    result.error is not None,
+                )
+
+        self._lastfailed.save()
@@ -0,0 +1,123 @@
+"""
+readmetester._pytest_plugin
+===========================
+
+Collect README code-blocks as ``pytest`` items.
+
+Each chain of code-blocks that can run independently is collected as
+its own item, so they can be distributed between ``pytest-xdist``
+workers.
+"""
+from __future__ import annotations
+
+import typing as _t
+from pathlib import Path as _Path
+
+import pytest as _pytest
+
+from . import _assert
+from ._config import load_config as _load_config
+from ._core import Readme as _Readme
+from ._exec import Namespace as _Namespace
+from ._holder import Holder as _Holder
+from ._main import _Document, _test_block
+from ._plugins import Hooks as _Hooks
+from ._plugins import load_plugins as _load_plugins
+from .exceptions import DocumentError as _DocumentError
+
+
+def pytest_addoption(parser: _pytest.Parser) -> None:
+    """Add options for collecting README code-blocks.
+
+    :param parser: Parser for ``pytest`` options and ini values.
+    """
+    group = parser.getgroup("readmetester")
+    group.addoption(
+        "--readmetester",
+        action="store_true",
+        help="collect code-blocks of README files as tests",
+    )
+    parser.addini(
+        "readmetester_glob",
+        "glob matching files to collect code-blocks from",
+        default="README.rst",
+    )
+
+
+def pytest_collect_file(
+    file_path: _Path, parent: _pytest.Collector
+) -> _t.Optional[ReadmeFile]:
+    """Collect README files if enabled.
+
+    :param file_path: Path of file to collect.
+    :param parent: Parent collector.
+    :return: Collector for README if it is to be collected, else None.
+    """
+    config = parent.config
+    if config.getoption("readmetester") and file_path.match(
+        config.getini("readmetester_glob")
+    ):
+        return ReadmeFile.from_parent(parent, path=file_path)
+
+    return None
+
+
+class ReadmeFile(_pytest.File):
+    """Collect a README's independent chains of code-blocks."""
+
+    def collect(self) -> _t.Iterable[ReadmeItem]:
+        _assert.syntax(self.path)
+        readme = _Readme()
+        readme.load(self.path)
+        _assert.commands(readme, self.path)
+        _assert.options(readme)
+        for chain in readme.chains():
+            yield ReadmeItem.from_parent(
+                self,
+                name=f"code-block {','.join(str(i + 1) for i in chain)}",
+                readme=readme,
+                chain=chain,
+            )
+
+
+class ReadmeItem(_pytest.Item):
+    """Run a chain of code-blocks.
+
+    :param readme: Compiled ``Readme`` object.
+    :param chain: Indices of code-blocks to run, in order.
+    :param kwargs: Keyword arguments for ``pytest.Item``.
+    """
+
+    def __init__(
+        self, *, readme: _Readme, chain: _t.List[int], **kwargs: _t.Any
+    ) -> None:
+        super().__init__(**kwargs)
+        self._readme = readme
+        self._chain = chain
+        self._holder = _Holder(_load_config(self.config.rootpath))
+        self._hooks = _Hooks(_load_plugins())
+
+    def runtest(self) -> None:
+        with _Namespace() as namespace:
+            document = _Document(self._readme, namespace, self._hooks)
+            for index in self._chain:
+                code_block = f"code-block {index + 1}"
+                self._holder.append_header(code_block)
+                _test_block(
+                    document, self._readme[index], self._holder, code_block
+                )
+                self._holder.passed()
+
+    def repr_failure(
+        self,
+        excinfo: _pytest.ExceptionInfo[BaseException],
+        style: _t.Optional[str] = None,
+    ) -> _t.Any:
+        if isinstance(excinfo.value, _DocumentError):
+            return f"{self._holder.total.get()}\n{excinfo.value}"
+
+        return super().repr_failure(excinfo, style)  # type: ignore
+
+    def reportinfo(self) -> _t.Tuple[_Path, _t.Optional[int], str]:
+        element = self._readme[self._chain[0]]
+        return self.path, element[0].lineno - 1 if element else None, self.name
@@ -0,0 +1,126 @@
+"""
+readmetester._shard
+===================
+
+Partition chains of code-blocks between shards, and select those to
+test.
+"""
+import heapq as _heapq
+import typing as _t
+from pathlib import Path as _Path
+
+from . import _assert
+from ._core import Readme as _Readme
+from ._store import Durations as _Durations
+from ._store import LastFailed as _LastFailed
+
+Shard = _t.Dict[str, _t.Set[int]]
+
+
+def partition(
+    readmes: _t.Mapping[str, _Readme],
+    count: int,
+    durations: _t.Optional[_Durations] = None,
+) -> _t.List[Shard]:
+    """Partition chains of code-blocks into balanced shards.
+
+    Chains are weighted by the durations recorded for their code-blocks
+    if given and every code-block has one, otherwise by their number of
+    lines. Durations must be shared by every shard, as shards which
+    weigh chains differently would not partition them the same way.
+    Heaviest chains are assigned first, each to the lightest shard, and
+    ties are broken by path and position, so the same READMEs are always
+    partitioned the same way.
+
+    :param readmes: Compiled ``Readme`` objects, keyed by their path.
+    :param count: Number of shards.
+    :param durations: Durations recorded by earlier runs, if any.
+    :return: List of shards, each the indices of the code-blocks to run
+        of each README.
+    """
+    chains = [
+        (path, chain)
+        for path, readme in readmes.items()
+        for chain in readme.chains()
+    ]
+    recorded = [
+        [
+            None if durations is None else durations.get(readmes[p][i])
+            for i in c
+        ]
+        for p, c in chains
+    ]
+    if all(i is not None for r in recorded for i in r):
+        weights = [sum(_t.cast(_t.List[float], r)) for r in recorded]
+    else:
+        weights = [sum(len(readmes[p][i]) for i in c) for p, c in chains]
+
+    shards: _t.List[Shard] = [{} for _ in range(count)]
+    loads = [(0.0, i) for i in range(count)]
+    for weight, path, chain in sorted(
+        ((w, p, c) for w, (p, c) in zip(weights, chains)),
+        key=lambda x: (-x[0], x[1], x[2][0]),
+    ):
+        load, index = _heapq.heappop(loads)
+        shards[index].setdefault(path, set()).update(chain)
+        _heapq.heappush(loads, (load + weight, index))
+
+    return shards
+
+
+def _load(path: _Path) -> _Readme:
+    # load README to select its code-blocks before it is tested
+    readme = _Readme()
+    readme.load(path)
+    _assert.commands(readme, path)
+    return readme
+
+
+def select(
+    paths: _t.List[_Path],
+    index: int,
+    count: int,
+    durations: _t.Optional[_Durations] = None,
+) -> Shard:
+    """Select the code-blocks of READMEs to test in a shard.
+
+    :param paths: Paths to READMEs.
+    :param index: Shard to select, counting from 1.
+    :param count: Number of shards.
+    :param durations: Durations recorded by earlier runs, if any.
+    :return: Indices of code-blocks to test of each README in shard.
+    """
+    readmes = {str(i): _load(i) for i in paths}
+    return partition(readmes, count, durations)[index - 1]
+
+
+def select_failed(
+    paths: _t.List[_Path],
+    lastfailed: _LastFailed,
+    shard: _t.Optional[Shard] = None,
+) -> Shard:
+    """Select the code-blocks of READMEs which failed when last run.
+
+    Code-blocks which failed are selected along with the code-blocks
+    that must run before them.
+
+    :param paths: Paths to READMEs.
+    :param lastfailed: Code-blocks which failed when last run.
+    :param shard: Indices of code-blocks to select from of each README,
+        if not all.
+    :return: Indices of code-blocks to test of each README which failed.
+    """
+    selected = {}
+    for path in paths:
+        failed = lastfailed.get(str(path))
+        if failed:
+            readme = _load(path)
+            selected[str(path)] = {
+                i
+                for f in failed
+                if f < len(readme)
+                for i in readme.prerequisites(f)
+                if shard is None or i in shard[str(path)]
+            }
+
+    return selected
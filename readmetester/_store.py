@@ -0,0 +1,286 @@
+"""
+readmetester._store
+===================
+
+Data stored in JSON files between runs.
+"""
+import hashlib as _hashlib
+import json as _json
+import os as _os
+import statistics as _statistics
+import typing as _t
+from pathlib import Path as _Path
+
+from ._core import Block as _Block
+from ._version import __version__
+
+_V = _t.TypeVar("_V")
+
+
+def _save(path: _Path, data: _t.Any) -> None:
+    # data is only ever stored to be used by later runs, so a run which
+    # cannot store it should not fail because of it
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(_json.dumps(data, indent=2), encoding="utf-8")
+    except OSError:
+        pass
+
+
+def _digest(block: _Block) -> str:
+    # key code-blocks by their content, so one which has changed is not
+    # confused with what was stored for it before
+    return _hashlib.sha256("\n".join(block).encode()).hexdigest()
+
+
+class _JsonStore(_t.Generic[_V]):
+    """Values stored in a JSON file between runs, keyed by ``str``.
+
+    The file is only read when first needed, and only written if a
+    value was changed.
+
+    :param path: Path to file storing values.
+    """
+
+    def __init__(self, path: _Path) -> None:
+        self._path = path
+        self._data: _t.Optional[_t.Dict[str, _V]] = None
+        self._changed = False
+
+    @property
+    def data(self) -> _t.Dict[str, _V]:
+        """Stored values."""
+        if self._data is None:
+            data: _t.Dict[str, _V] = {}
+            if self._path.is_file():
+                data = _json.loads(self._path.read_text(encoding="utf-8"))
+
+            self._data = data
+
+        return self._data
+
+    def _set(self, key: str, value: _t.Optional[_V]) -> None:
+        # set value, or remove it if None, to be written when saved
+        if value is None:
+            self.data.pop(key, None)
+        else:
+            self.data[key] = value
+
+        self._changed = True
+
+    def save(self) -> None:
+        """Write values to file if any were changed."""
+        if self._changed:
+            _save(self._path, self.data)
+            self._changed = False
+
+
+class Bench(_t.NamedTuple):
+    """Timing of a code-block run repeatedly, in seconds per loop.
+
+    Change is the percentage the best time differs from the baseline,
+    if one was stored by an earlier run.
+    """
+
+    loops: int
+    best: float
+    median: float
+    change: _t.Optional[float]
+
+
+class Baseline(_JsonStore[_t.Dict[str, float]]):
+    """Statistics of each code-block stored between benchmark runs.
+
+    Code-blocks are keyed by their content, so a code-block which has
+    changed is given a new baseline.
+    """
+
+    def compare(
+        self, block: _Block, loops: int, times: _t.List[float]
+    ) -> Bench:
+        """Compare timings of code-block to its baseline.
+
+        If there is no baseline for the code-block then these timings
+        are stored as its baseline.
+
+        :param block: Code-block that was timed.
+        :param loops: Number of loops each time is made up of.
+        :param times: Seconds per loop of each repeated run.
+        :return: Instantiated ``Bench`` object.
+        """
+        key = _digest(block)
+        best = min(times)
+        baseline = self.data.get(key)
+        if baseline is None:
+            self._set(key, {"best": best, "loops": loops})
+            change = None
+        else:
+            change = (best - baseline["best"]) / baseline["best"] * 100
+
+        return Bench(loops, best, _statistics.median(times), change)
+
+
+class Durations(_JsonStore[float]):
+    """Seconds each code-block last took to run, stored between runs.
+
+    Code-blocks are keyed by their content, like baselines.
+    """
+
+    def get(self, block: _Block) -> _t.Optional[float]:
+        """Get duration recorded for code-block.
+
+        :param block: Code-block to get duration of.
+        :return: Seconds the code-block took, if recorded.
+        """
+        return self.data.get(_digest(block))
+
+    def record(self, block: _Block, duration: float) -> None:
+        """Record duration of code-block.
+
+        :param block: Code-block that was run.
+        :param duration: Seconds the code-block took.
+        """
+        self._set(_digest(block), duration)
+
+
+class LastFailed(_JsonStore[_t.List[int]]):
+    """Code-blocks of each README which failed when last run.
+
+    A code-block is only forgotten once it has been run again and
+    passed, or its README no longer exists.
+    """
+
+    def get(self, path: str) -> _t.Set[int]:
+        """Get code-blocks of README which failed.
+
+        :param path: Path to README.
+        :return: Indices of code-blocks which failed.
+        """
+        return set(self.data.get(path, []))
+
+    def record(self, path: str, index: int, failed: bool) -> None:
+        """Record whether code-block failed.
+
+        :param path: Path to README.
+        :param index: Index of code-block that was run.
+        :param failed: Whether code-block failed.
+        """
+        indices = self.get(path)
+        if failed:
+            indices.add(index)
+        else:
+            indices.discard(index)
+
+        self._set(path, sorted(indices) if indices else None)
+
+    def save(self) -> None:
+        """Write failures to file if any code-block was run."""
+        if self._changed:
+            self._data = {
+                k: v for k, v in self.data.items() if _Path(k).is_file()
+            }
+
+        super().save()
+
+
+class Hashes(_JsonStore[str]):
+    """Hashes of the content of each module which passed, between runs.
+
+    Hashes include the version of this package, so a new version tests
+    every module again.
+    """
+
+    @staticmethod
+    def key(content: str) -> str:
+        """Get hash of content of module.
+
+        :param content: Content of module.
+        :return: Hash to compare with the one stored.
+        """
+        return _hashlib.sha256(
+            f"{__version__}\0{content}".encode()
+        ).hexdigest()
+
+    def unchanged(self, path: str, content: str) -> bool:
+        """Test module passed and has not changed since.
+
+        :param path: Path to module.
+        :param content: Content of module.
+        :return: Module is unchanged, True or False.
+        """
+        return self.data.get(path) == self.key(content)
+
+    def record(self, path: str, content: str, passed: bool) -> None:
+        """Record hash of module if it passed, or forget it if not.
+
+        :param path: Path to module.
+        :param content: Content of module.
+        :param passed: Whether module passed.
+        """
+        self._set(path, self.key(content) if passed else None)
+
+
+class LintCache:
+    """Results of linting READMEs stored between runs.
+
+    Results are keyed by the content of README along with the versions
+    of the packages linting it, so a change to either invalidates them.
+    Each result is a file holding the message of its first error, which
+    is empty if there was none. Results least recently used are evicted
+    once there are more than ``size``.
+
+    :param path: Directory to store results in.
+    :param size: Number of results to keep.
+    """
+
+    def __init__(self, path: _Path, size: int = 128) -> None:
+        self._path = path
+        self._size = size
+
+    @staticmethod
+    def key(
+        path: str, content: str, versions: str, includes: _t.Iterable[str] = ()
+    ) -> str:
+        """Get key for result of linting README.
+
+        :param path: Path to README, which relative includes depend on.
+        :param content: Content of README.
+        :param versions: Versions of the packages linting README.
+        :param includes: Path and content of each file README includes.
+        :return: Key to get and set result with.
+        """
+        return _hashlib.sha256(
+            "\0".join((versions, path, content, *includes)).encode()
+        ).hexdigest()
+
+    def __getitem__(self, key: str) -> _t.Optional[str]:
+        path = self._path / key
+        try:
+            message = path.read_text(encoding="utf-8")
+        except OSError as err:
+            raise KeyError(key) from err
+
+        # used again, so is the last to be evicted, unless results cannot
+        # be changed, in which case they are only read
+        try:
+            _os.utime(path)
+        except OSError:
+            pass
+
+        return message or None
+
+    def __setitem__(self, key: str, message: _t.Optional[str]) -> None:
+        try:
+            self._path.mkdir(parents=True, exist_ok=True)
+            tmp = self._path / f".{key}.{_os.getpid()}"
+            tmp.write_text(message or "", encoding="utf-8")
+            tmp.replace(self._path / key)
+            results = sorted(
+                self._path.iterdir(), key=lambda x: x.stat().st_mtime_ns
+            )
+            for result in results[: -self._size]:
+                result.unlink()
+        except OSError:
+            # results are only ever stored to save time, so it does not
+            # matter if they cannot be
+            pass
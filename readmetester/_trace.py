@@ -0,0 +1,135 @@
+"""
+readmetester._trace
+===================
+
+Record spans of a run as Chrome trace events.
+"""
+import contextlib as _contextlib
+import json as _json
+import os as _os
+import threading as _threading
+import time as _time
+import typing as _t
+from pathlib import Path as _Path
+
+
+class Tracer:
+    """Record spans of a run as Chrome trace events.
+
+    Events are tagged with the process and thread they were recorded
+    in, so each is shown on its own track. Events recorded in worker
+    processes can be collected there and merged into those of the run.
+    Nothing is recorded unless enabled, and spans cost next to nothing
+    otherwise.
+    """
+
+    _NULL = _contextlib.nullcontext()
+
+    def __init__(self) -> None:
+        self._events: _t.Optional[_t.List[_t.Dict[str, _t.Any]]] = None
+        self._threads: _t.Set[_t.Tuple[int, int]] = set()
+
+    @property
+    def enabled(self) -> bool:
+        """Spans are being recorded, True or False."""
+        return self._events is not None
+
+    def enable(self) -> None:
+        """Start recording spans."""
+        self._events = []
+        self._threads.clear()
+
+    def record(
+        self, name: str, cat: str, start: int, end: int, **args: _t.Any
+    ) -> None:
+        """Record span which has already ended, if enabled.
+
+        :param name: Name of span.
+        :param cat: Category of span.
+        :param start: Nanoseconds of performance counter at start.
+        :param end: Nanoseconds of performance counter at end.
+        :param args: Additional details to show for span.
+        """
+        if self._events is None:
+            return
+
+        thread = _threading.current_thread()
+        pid, tid = _os.getpid(), thread.ident or 0
+        if (pid, tid) not in self._threads:
+            self._threads.add((pid, tid))
+            self._events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": f"{thread.name} ({pid})"},
+                }
+            )
+
+        self._events.append(
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": (end - start) / 1000,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            }
+        )
+
+    @_contextlib.contextmanager
+    def _span(
+        self, name: str, cat: str, args: _t.Dict[str, _t.Any]
+    ) -> _t.Generator[None, None, None]:
+        start = _time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, cat, start, _time.perf_counter_ns(), **args)
+
+    def span(self, name: str, cat: str, **args: _t.Any) -> _t.ContextManager:
+        """Record span of the code run within context, if enabled.
+
+        :param name: Name of span.
+        :param cat: Category of span.
+        :param args: Additional details to show for span.
+        :return: Context recording span.
+        """
+        if self._events is None:
+            return self._NULL
+
+        return self._span(name, cat, args)
+
+    def collect(self) -> _t.List[_t.Dict[str, _t.Any]]:
+        """Get recorded events, and stop recording.
+
+        :return: List of events.
+        """
+        events = self._events or []
+        self._events = None
+        return events
+
+    def merge(self, events: _t.List[_t.Dict[str, _t.Any]]) -> None:
+        """Add events collected elsewhere, if enabled.
+
+        :param events: Events collected by another tracer.
+        """
+        if self._events is not None:
+            self._events.extend(events)
+
+    def dump(self, path: _Path) -> None:
+        """Write recorded spans to file, and stop recording.
+
+        :param path: Path to write trace to.
+        """
+        events = self.collect()
+        path.write_text(
+            _json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}),
+            encoding="utf-8",
+        )
+
+
+tracer = Tracer()
@@ -0,0 +1,62 @@
+"""
+readmetester._worker
+====================
+
+Test READMEs for an interpreter running a matrix, writing the results.
+
+Run as ``python -m readmetester._worker OUTPUT OPTIONS README...``,
+where options are JSON, and the results are written to output as JSON.
+"""
+import json as _json
+import platform as _platform
+import sys as _sys
+import typing as _t
+from pathlib import Path as _Path
+
+from ._main import run as _run
+from .exceptions import DocumentError as _DocumentError
+
+
+def work(output: str, options: str, paths: _t.List[str]) -> None:
+    """Test READMEs and write the result of each code-block.
+
+    Every code-block of a README is run, even after one has failed, so
+    that each can be compared between interpreters.
+
+    :param output: Path to write results to.
+    :param options: JSON of options to use instead of those configured.
+    :param paths: Paths to READMEs.
+    """
+    documents = []
+    for path in paths:
+        document: _t.Dict[str, _t.Any] = {"file": path, "error": None}
+        results = []
+        try:
+            for result in _run(path, **_json.loads(options)):
+                results.append(
+                    {
+                        "code_block": result.code_block,
+                        "lineno": result.lineno,
+                        "status": result.status,
+                        "actual": result.actual,
+                        "error": (
+                            None if result.error is None else str(result.error)
+                        ),
+                    }
+                )
+        except _DocumentError as err:
+            document["error"] = str(err)
+
+        document["results"] = results
+        documents.append(document)
+
+    _Path(output).write_text(
+        _json.dumps(
+            {"version": _platform.python_version(), "documents": documents}
+        ),
+        encoding="utf-8",
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    work(_sys.argv[1], _sys.argv[2], _sys.argv[3:])
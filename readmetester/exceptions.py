@@ -2,6 +2,7 @@
 readmetester.exceptions
 =======================
 """
+import typing as _t
 
 
 class DocumentError(Exception):
@@ -23,6 +24,10 @@ class SyntaxDocumentError(DocumentError):
     """Base for errors resulting from invalid document syntax."""
 
 
+class CommandSyntaxError(SyntaxDocumentError):
+    """Documented commands are not valid Python."""
+
+
 class OutputNotExpectedError(OutputDocumentError):
     """Output was provided, but no output is expected.
 
@@ -56,7 +61,63 @@ class OutputNotEqualError(OutputDocumentError):
     :param code_block:  Code block that error is raised for.
     :param actual:      Actual output produced.
     :param expected:    Expected output.
+    :param diff:        Diff of all output of the code block, if any.
+    """
+
+    def __init__(
+        self,
+        code_block: str,
+        actual: str,
+        expected: str,
+        diff: _t.Optional[str] = None,
+    ) -> None:
+        message = f"{expected} != {actual}"
+        if diff is not None:
+            message = f"{message}\n{diff}"
+
+        super().__init__(code_block, message)
+
+
+class CommandTimeoutError(OutputDocumentError):
+    """Command of a console block ran for longer than it can.
+
+    :param code_block:  Code block that error is raised for.
+    :param command:     Command that timed out.
+    :param timeout:     Time the command can run for.
     """
 
-    def __init__(self, code_block: str, actual: str, expected: str) -> None:
-        super().__init__(code_block, f"{expected} != {actual}")
+    def __init__(self, code_block: str, command: str, timeout: str) -> None:
+        super().__init__(
+            code_block, f"command `{command}` timed out after {timeout}"
+        )
+
+
+class CommandExitError(OutputDocumentError):
+    """Command of a console block exited with an unexpected return code.
+
+    :param code_block:  Code block that error is raised for.
+    :param command:     Command that exited.
+    :param returncode:  Return code the command exited with.
+    """
+
+    def __init__(self, code_block: str, command: str, returncode: int) -> None:
+        super().__init__(
+            code_block, f"command `{command}` exited with {returncode}"
+        )
+
+
+class BudgetExceededError(DocumentError):
+    """Code-block exceeded a budget set by an option of its directive.
+
+    :param code_block:  Code block that error is raised for.
+    :param option:      Option setting the budget.
+    :param actual:      Measured value.
+    :param limit:       Documented limit.
+    """
+
+    def __init__(
+        self, code_block: str, option: str, actual: str, limit: str
+    ) -> None:
+        super().__init__(
+            f"{code_block}: {option} of {limit} exceeded: {actual}"
+        )
@@ -0,0 +1,110 @@
+"""
+readmetester.sphinx
+===================
+
+Test python code-blocks of documents as Sphinx reads them.
+
+Add ``"readmetester.sphinx"`` to ``extensions`` in conf.py.
+"""
+from __future__ import annotations
+
+import re as _re
+import typing as _t
+from pathlib import Path as _Path
+
+from docutils import nodes as _nodes
+from sphinx.application import Sphinx as _Sphinx
+from sphinx.util import logging as _logging
+
+from ._discover import configs as _configs
+from ._main import run_blocks as _run_blocks
+from ._version import __version__
+from .exceptions import DocumentError as _DocumentError
+
+_LANGUAGE = "python"
+_DIRECTIVE = _re.compile(r"\s*\.\. [\w:-]+::")
+_OPTION = _re.compile(r"\s+:[\w-]+:")
+
+_logger = _logging.getLogger(__name__)
+
+
+def _content_lineno(node: _nodes.literal_block, lines: _t.List[str]) -> int:
+    # Sphinx records the line of the directive, so content starts after
+    # its options and the blank line after them
+    lineno = node.line or 0
+    options = 0
+    if 0 < lineno <= len(lines) and _DIRECTIVE.match(lines[lineno - 1]):
+        for line in lines[lineno:]:
+            if not _OPTION.match(line):
+                break
+
+            options += 1
+
+    return lineno + options + 2
+
+
+def doctree_read(app: _Sphinx, doctree: _nodes.document) -> None:
+    """Test python code-blocks of a document Sphinx has read.
+
+    Code-blocks are taken from the doctree Sphinx has already parsed,
+    so the document is not parsed again, though its source is read to
+    find the line each code-block starts on. Every code-block is run,
+    and each which fails is reported as a warning at the line of the
+    command it failed at.
+
+    :param app: Sphinx application.
+    :param doctree: Doctree of document that was read.
+    """
+    docname = app.env.docname
+    path = _Path(app.env.doc2path(docname))
+    nodes = [
+        i
+        for i in doctree.findall(_nodes.literal_block)
+        if i.get("language") == _LANGUAGE
+    ]
+    if not nodes:
+        return
+
+    # Sphinx has just read the document, so it can be read again
+    lines = path.read_text(encoding=app.config.source_encoding).splitlines()
+    blocks = [
+        (
+            i.astext().splitlines(),
+            _content_lineno(i, lines if i.source == str(path) else []),
+        )
+        for i in nodes
+    ]
+
+    try:
+        for result in _run_blocks(blocks, path, _configs([path])[str(path)]):
+            if result.error is not None:
+                _logger.warning(
+                    str(result.error),
+                    location=(
+                        docname,
+                        result.lineno
+                        if result.error_lineno is None
+                        else result.error_lineno,
+                    ),
+                    type="readmetester",
+                    subtype=result.status,
+                )
+    except _DocumentError as err:
+        _logger.warning(str(err), location=docname, type="readmetester")
+
+
+def setup(app: _Sphinx) -> _t.Dict[str, _t.Any]:
+    """Test code-blocks as each document is read.
+
+    Documents are tested in whichever process reads them, so the
+    extension is safe to read and write in parallel.
+
+    :param app: Sphinx application.
+    :return: Metadata of extension.
+    """
+    app.connect("doctree-read", doctree_read)
+    return {
+        "version": __version__,
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
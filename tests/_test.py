@@ -3,13 +3,25 @@ tests._test
 ===========
 """
 
-# pylint: disable=protected-access
+# pylint: disable=protected-access,too-many-lines
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
 from pathlib import Path
+from typing import Any, List, Optional
 
 import pytest
 import templatest
 
 import readmetester
+from readmetester import _main, _package, _worker
 
 # noinspection PyUnresolvedReferences
 from . import templates  # noqa pylint: disable=unused-import
@@ -20,7 +32,7 @@ from . import (
     NoColorCapsys,
     PatchArgvType,
 )
-from .strings import ERROR
+from .strings import CHECK, CROSS, ERROR, SUCCESS
 
 
 @pytest.mark.parametrize(
@@ -47,7 +59,7 @@ def test_returns(
     :param expected: Expected stdout.
     """
     readme = make_readme(template)
-    main(str(readme))
+    main(str(readme), "--verbose")
     output = nocolorcapsys.stdout()
     assert output == expected
 
@@ -212,3 +224,1972 @@ def test_readme_no_exist(
         str(err.value)
         == f"[Errno 2] No such file or directory: '{Path.cwd() /'README.rst'}'"
     )
+
+
+def test_normalize(
+    tmp_path: Path,
+    main: MockMainType,
+    make_readme: MakeReadmeType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test non-deterministic output is normalized as configured.
+
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    (tmp_path / "pyproject.toml").write_text(
+        """\
+[tool.readmetester]
+normalize = ["hex", "uuid", "timestamp"]
+
+[tool.readmetester.patterns]
+"build-\\\\d+" = "build-<n>"
+""",
+        encoding="utf-8",
+    )
+    readme = make_readme(
+        """
+.. code-block:: python
+
+    >>> import datetime
+    >>> import uuid
+    >>> print(uuid.uuid4())
+    1b4e28ba-2fa1-11d2-883f-0016d3cca427
+    >>> print(datetime.datetime.now().isoformat())
+    2023-01-07T10:00:00.000001
+    >>> print("build-1234")
+    build-0
+
+"""
+    )
+    with EnterDir(tmp_path):
+        main(str(readme), "--verbose")
+
+    assert nocolorcapsys.stdout().splitlines()[4:9] == [
+        f"{CHECK} <uuid>",
+        ". >>> print(datetime.datetime.now().isoformat())",
+        f"{CHECK} <timestamp>",
+        '. >>> print("build-1234")',
+        f"{CHECK} build-<n>",
+    ]
+
+
+def test_normalize_unknown(tmp_path: Path) -> None:
+    """Test error is raised when a normalizer does not exist.
+
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    """
+    (tmp_path / "pyproject.toml").write_text(
+        '[tool.readmetester]\nnormalize = ["unknown"]\n', encoding="utf-8"
+    )
+    with pytest.raises(ValueError, match="unknown normalizer: unknown"):
+        readmetester._config.load_config(tmp_path).normalizer("value")
+
+
+def test_quiet(
+    main: MockMainType,
+    make_readme: MakeReadmeType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test only a failing code-block is displayed if not verbose.
+
+    :param main: Patch package entry point.
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    readme = make_readme(templatest.templates.registered[0][1])
+    main(str(readme))
+    assert nocolorcapsys.stdout() == SUCCESS.strip()
+    readme = make_readme(
+        """
+.. code-block:: python
+
+    >>> print("Hello, world!")
+    'Hello, world!'
+
+.. code-block:: python
+
+    >>> print("Goodbye, world...")
+    'Hello, world!'
+
+"""
+    )
+    with pytest.raises(readmetester.exceptions.OutputNotEqualError):
+        main(str(readme))
+
+    assert nocolorcapsys.stdout() == (
+        f'code-block 2\n. >>> print("Goodbye, world...")\n'
+        f"{CHECK} Goodbye, world...\n\u2716"
+    )
+
+
+def test_output(
+    tmp_path: Path,
+    main: MockMainType,
+    make_readme: MakeReadmeType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test output is written to file instead of stdout.
+
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    template = templatest.templates.registered.getbyname("ending-dots")
+    readme = make_readme(template.template)
+    output = tmp_path / "output.txt"
+    main(str(readme), "--verbose", "--output", str(output))
+    assert not nocolorcapsys.stdout()
+    assert (
+        "\n".join(
+            i.strip()
+            for i in nocolorcapsys.regex(
+                output.read_text(encoding="utf-8")
+            ).splitlines()
+        ).strip()
+        == template.expected
+    )
+
+
+def test_output_flush() -> None:
+    """Test output is flushed after each code-block, not each line."""
+    flushed = []
+
+    class _Stream(io.StringIO):
+        def flush(self) -> None:
+            flushed.append(self.getvalue())
+
+    stream = _Stream()
+    holder = readmetester._holder.Holder(
+        readmetester._config.load_config(), verbose=True, stream=stream
+    )
+    for count in range(1, 3):
+        holder.append_header(f"code-block {count}")
+        holder.append_command(readmetester._core.Code(">>> pass"))
+        holder.passed()
+        assert len(flushed) == count
+        assert flushed[-1] == stream.getvalue()
+
+    holder.display()
+    assert len(flushed) == 3
+
+
+def test_pytest_plugin(pytester: pytest.Pytester) -> None:
+    """Test independent chains of code-blocks are collected as items.
+
+    :param pytester: Fixture for testing ``pytest`` plugins.
+    """
+    pytester.makefile(
+        ".rst",
+        README="""
+.. code-block:: python
+
+    >>> n = 1
+
+.. code-block:: python
+
+    >>> print("Hello, world!")
+    'Hello, world!'
+
+.. code-block:: python
+
+    >>> print(n)
+    2
+
+.. code-block:: python
+
+    >>> 1 / 0
+
+""",
+        other="""
+.. code-block:: python
+
+    >>> 1 / 0
+
+""",
+    )
+    result = pytester.runpytest(
+        "-p", "readmetester._pytest_plugin", "--readmetester", "-v"
+    )
+    result.assert_outcomes(passed=1, failed=2)
+    result.stdout.fnmatch_lines(
+        [
+            "*README.rst::code-block 1,3 FAILED*",
+            "*README.rst::code-block 2 PASSED*",
+            "*README.rst::code-block 4 FAILED*",
+            "code-block 3: 2 != 1",
+            "E *ZeroDivisionError: division by zero",
+        ]
+    )
+
+
+def test_run() -> None:
+    """Test results of each code-block are returned from text."""
+    results = list(
+        readmetester.run(
+            """
+.. code-block:: python
+
+    >>> print("Hello, world!")
+    'Hello, world!'
+
+.. code-block:: python
+
+    >>> print("Goodbye, world...")
+    'Hello, world!'
+
+.. code-block:: python
+
+    >>> print(undefined)
+
+""",
+            normalize=[],
+        )
+    )
+    assert [(i.code_block, i.lineno, i.end_lineno) for i in results] == [
+        ("code-block 1", 4, 5),
+        ("code-block 2", 9, 10),
+        ("code-block 3", 14, 14),
+    ]
+    assert [i.status for i in results] == ["passed", "failed", "error"]
+    assert results[1].actual == ["Goodbye, world..."]
+    assert results[1].expected == ["Hello, world!"]
+    assert isinstance(
+        results[1].error, readmetester.exceptions.OutputNotEqualError
+    )
+    assert isinstance(results[2].error, NameError)
+    assert all(i.duration >= 0 for i in results)
+
+
+def test_concurrent() -> None:
+    """Test independent code-blocks which await are run concurrently."""
+    block = """
+.. code-block:: python
+
+    >>> import asyncio
+    >>> await asyncio.sleep(0.3)
+    >>> print("{}")
+    {}
+"""
+    elapsed = []
+    for concurrent in (False, True):
+        start = time.perf_counter()
+        results = list(
+            readmetester.run(
+                block.format(1, 1) + block.format(2, 2), concurrent=concurrent
+            )
+        )
+        elapsed.append(time.perf_counter() - start)
+        assert [i.status for i in results] == ["passed", "passed"]
+        assert [i.actual for i in results] == [["1"], ["2"]]
+
+    # one sleep is saved, whatever the overhead of the machine
+    assert elapsed[0] - elapsed[1] > 0.15
+
+    # an error raised by a chain is raised when its code-block is run
+    error = """
+.. code-block:: python
+
+    >>> import asyncio
+    >>> await asyncio.sleep(0)
+    >>> print(1 / 0)
+"""
+    results = list(
+        readmetester.run(error + block.format(2, 2), concurrent=True)
+    )
+    assert [i.status for i in results] == ["error", "passed"]
+    assert str(results[0].error) == "division by zero"
+
+
+def test_memory(
+    tmp_path: Path,
+    main: MockMainType,
+    make_readme: MakeReadmeType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test memory retained into later code-blocks is reported.
+
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    readme = make_readme(
+        """
+.. code-block:: python
+
+    >>> data = bytearray(2 << 20)
+
+.. code-block:: python
+
+    >>> print(len(bytearray(2 << 20)))
+    2097152
+
+"""
+    )
+    report = tmp_path / "report.json"
+    main(str(readme), "--memory", "--report", str(report))
+    first, second = nocolorcapsys.stdout().split("code-block 2: ")
+    lines = first.splitlines()
+    assert lines[0].startswith("code-block 1: peak 2.0 MiB, retained 2.0 MiB")
+    assert lines[1] == f"{readme}:4: 2.0 MiB"
+    assert "retains 2.0 MiB into later code-blocks" in lines
+
+    # anything code-block 2 retains is too small to be flagged, and
+    # what is loaded to process output is not charged to it
+    assert second.startswith("peak 2.0 MiB, retained ")
+    assert "retains" not in second
+    assert "unicode_escape" not in second
+    results = json.loads(report.read_text(encoding="utf-8"))["documents"][0][
+        "results"
+    ]
+    assert [i["status"] for i in results] == ["passed", "passed"]
+    assert results[0]["memory"]["retained"] >= 2 << 20
+    assert results[1]["memory"]["retained"] < 1 << 20
+    tracemalloc.start()
+    try:
+        results = list(readmetester.run(readme, memory=True))
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+    # a session already tracing is shared, counting only what changed
+    assert results[0].memory is not None
+    assert results[0].memory.retained >= 2 << 20
+    assert results[0].memory.sites[0][0] == f"{readme}:4"
+
+    # nothing is recorded once a code-block stops tracing itself
+    results = list(
+        readmetester.run(
+            """
+.. code-block:: python
+
+    >>> import tracemalloc
+    >>> tracemalloc.stop()
+
+""",
+            memory=True,
+        )
+    )
+    assert results[0].status == "passed"
+    assert results[0].memory is None
+
+
+def test_budget() -> None:
+    """Test code-blocks are timed and traced against their budgets."""
+    results = list(
+        readmetester.run(
+            """
+.. code-block:: python
+
+    >>> import time
+    >>> runs = []
+
+.. code-block:: python
+    :max-time: 10s
+    :repeat: 3
+    :statistic: median
+
+    >>> runs.append(time.sleep(0))
+
+.. code-block:: python
+
+    >>> print(len(runs))
+    3
+
+.. code-block:: python
+    :max-time: 1ms
+
+    >>> time.sleep(0.01)
+
+.. code-block:: python
+    :max-memory: 1MB
+
+    >>> data = bytearray(2 << 20)
+
+.. code-block:: python
+    :max-time: 10s
+    :max-memory: 10MB
+
+    >>> runs.append(time.sleep(0))
+
+.. code-block:: python
+
+    >>> print(len(runs))
+    4
+
+.. code-block:: python
+    :max-time: 10s
+    :max-memory: 10MB
+    :repeat: 2
+
+    >>> runs.append(time.sleep(0))
+
+.. code-block:: python
+
+    >>> print(len(runs))
+    7
+
+"""
+        )
+    )
+    assert [i.status for i in results] == [
+        "passed",
+        "passed",
+        "passed",
+        "failed",
+        "failed",
+        "passed",
+        "passed",
+        "passed",
+        "passed",
+    ]
+    assert isinstance(
+        results[3].error, readmetester.exceptions.BudgetExceededError
+    )
+    assert str(results[3].error).startswith(
+        "code-block 4: max-time of 1ms exceeded: "
+    )
+    assert (
+        str(results[4].error)
+        == "code-block 5: max-memory of 1MB exceeded: 2.0 MiB"
+    )
+
+    # the options are only accepted while linting
+    directives = pytest.importorskip("docutils.parsers.rst.directives")
+    assert (
+        readmetester._assert._budget_code_block()
+        not in directives._directives.values()
+    )
+
+
+@pytest.mark.parametrize(
+    "option,expected",
+    [
+        (":max-time: fast", "invalid max-time: fast"),
+        (":repeat: 0", "invalid repeat: 0"),
+    ],
+    ids=["max-time", "repeat"],
+)
+def test_budget_invalid(option: str, expected: str) -> None:
+    """Test error is raised before running for an invalid budget.
+
+    :param option: Option of code-block.
+    :param expected: Expected error.
+    """
+    with pytest.raises(readmetester.exceptions.SyntaxDocumentError) as err:
+        list(
+            readmetester.run(
+                f"""
+.. code-block:: python
+    {option}
+
+    >>> print("Hello, world!")
+    'Hello, world!'
+
+"""
+            )
+        )
+
+    assert str(err.value) == f"code-block 1: {expected}"
+
+
+@pytest.mark.parametrize(
+    "value,size,duration",
+    [
+        (1.5, "1.5 B", "1.5 s"),
+        (0.0015, "0.0 B", "1.5 ms"),
+        (1.5e-9, "0.0 B", "1.5 ns"),
+        (1.5 * (1 << 30), "1.5 GiB", "1610612736.0 s"),
+    ],
+)
+def test_format(value: float, size: str, duration: str) -> None:
+    """Test sizes and durations are formatted in the largest unit.
+
+    :param value: Number of bytes, or seconds.
+    :param size: Expected size.
+    :param duration: Expected duration.
+    """
+    assert readmetester._holder.format_size(value) == size
+    assert readmetester._holder.format_duration(value) == duration
+
+
+def test_bench(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    main: MockMainType,
+    make_readme: MakeReadmeType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test code-blocks are benchmarked against their stored baseline.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    monkeypatch.chdir(tmp_path)
+    readme = make_readme(
+        """
+.. code-block:: python
+
+    >>> total = sum(range(100))
+
+"""
+    )
+    baseline = tmp_path / ".readmetester_cache" / "baseline.json"
+    main(str(readme), "--bench")
+    assert nocolorcapsys.stdout().splitlines()[0].endswith("baseline saved")
+    assert baseline.is_file()
+    report = tmp_path / "report.json"
+    main(str(readme), "--bench", "--report", str(report))
+    assert nocolorcapsys.stdout().splitlines()[0].endswith("from baseline")
+    bench = json.loads(report.read_text(encoding="utf-8"))["documents"][0][
+        "results"
+    ][0]["bench"]
+    assert bench["loops"] > 0 and bench["change"] is not None
+    baselines = json.loads(baseline.read_text(encoding="utf-8"))
+    for value in baselines.values():
+        value["best"] /= 1000
+
+    baseline.write_text(json.dumps(baselines), encoding="utf-8")
+    main(str(readme), "--bench")
+    assert nocolorcapsys.stdout().splitlines()[1].startswith("regressed by")
+
+    # code-blocks are timed apart from the state of the document, and
+    # those which cannot be run again are not timed
+    readme = make_readme(
+        """
+.. code-block:: python
+
+    >>> items = []
+
+.. code-block:: python
+
+    >>> items.append(1)
+
+.. code-block:: python
+
+    >>> print(len(items))
+    1
+
+.. code-block:: python
+
+    >>> import os
+    >>> path = os.mkdir("directory")
+
+.. code-block:: python
+
+    >>> print(path)
+    None
+
+"""
+    )
+    main(str(readme), "--bench")
+    output = nocolorcapsys.stdout()
+    assert output.count("baseline saved") == 3
+    assert "Success!" in output
+
+
+def test_trace(
+    tmp_path: Path, main: MockMainType, make_readme: MakeReadmeType
+) -> None:
+    """Test spans of the run are written as Chrome trace events.
+
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    """
+    template = templatest.templates.registered.getbyname("simple")
+    readme = make_readme(template.template)
+    trace = tmp_path / "trace.json"
+    main(str(readme), "--verbose", "--trace", str(trace))
+    events = json.loads(trace.read_text(encoding="utf-8"))["traceEvents"]
+    assert [(i["name"], i["cat"]) for i in events if i["ph"] == "X"] == [
+        ("lint", "lint"),
+        ("parse", "parse"),
+        ("compile", "parse"),
+        ("line 4", "exec"),
+        ("code-block 1", "code-block"),
+        ("render", "render"),
+    ]
+    assert all(i["pid"] == os.getpid() for i in events)
+    assert not readmetester._trace.tracer.enabled
+
+
+def test_plugin(
+    monkeypatch: pytest.MonkeyPatch,
+    main: MockMainType,
+    make_readme: MakeReadmeType,
+) -> None:
+    """Test hooks of plugins are called throughout a run.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param main: Patch package entry point.
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    """
+    calls = []
+
+    class _Plugin(readmetester.Plugin):
+        def on_document_start(self, path: str) -> None:
+            calls.append(("on_document_start", Path(path).name))
+
+        def on_block_start(self, code_block: str, block: Any) -> None:
+            calls.append(("on_block_start", code_block))
+
+        def after_command(
+            self,
+            lineno: int,
+            output: List[Optional[List[str]]],
+            duration: float,
+        ) -> None:
+            calls.append(("after_command", lineno, output))
+
+        def on_document_end(self, path: str, results: List[Any]) -> None:
+            calls.append(("on_document_end", [i.status for i in results]))
+
+    assert readmetester._plugins.Hooks([]).after_command is None
+
+    # plugins do not need to subclass, and can be modules
+    module = types.ModuleType("plugin")
+    setattr(module, "on_document_start", print)
+    hooks = readmetester._plugins.Hooks(
+        [module, types.SimpleNamespace(on_assert=print), _Plugin()]
+    )
+    assert hooks.on_assert is print
+    assert hooks.before_command is None
+    assert hooks.on_document_start is not None
+    other = types.SimpleNamespace(
+        before_command=lambda *x: calls.append(("before_command", *x)),
+        on_assert=lambda *x: calls.append(("on_assert", *x)),
+    )
+    monkeypatch.setattr(
+        readmetester._main, "_load_plugins", lambda: (_Plugin(), other)
+    )
+    template = templatest.templates.registered.getbyname("simple")
+    main(str(make_readme(template.template)))
+    assert calls == [
+        ("on_document_start", "README.rst"),
+        ("on_block_start", "code-block 1"),
+        ("before_command", 4),
+        ("after_command", 4, [["Hello, world!"]]),
+        ("on_assert", "code-block 1", "Hello, world!", "Hello, world!"),
+        ("on_document_end", ["passed"]),
+    ]
+    calls.clear()
+    list(
+        readmetester.run(
+            ".. code-block:: console\n\n    $ true\n", console=True
+        )
+    )
+    assert calls == [
+        ("on_document_start", "<string>"),
+        ("on_block_start", "console-block 1"),
+        ("on_document_end", ["passed"]),
+    ]
+
+
+def test_load_plugins(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test plugins which fail to load are skipped with a warning.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    """
+
+    class _EntryPoint:  # pylint: disable=too-few-public-methods
+        def __init__(self, name: str, plugin: Any) -> None:
+            self.name = name
+            self._plugin = plugin
+
+        def load(self) -> Any:
+            """Load plugin, raising it if it is an exception.
+
+            :return: Loaded plugin.
+            """
+            if isinstance(self._plugin, Exception):
+                raise self._plugin
+
+            return self._plugin
+
+    class _EntryPoints(list):
+        def select(self, group: str) -> List[_EntryPoint]:
+            """Select entry points of a group.
+
+            :param group: Group of entry points.
+            :return: Entry points of group.
+            """
+            return [i for i in self if group == "readmetester"]
+
+    plugin = readmetester.Plugin()
+    monkeypatch.setattr(
+        readmetester._plugins._metadata,
+        "entry_points",
+        lambda: _EntryPoints(
+            [
+                _EntryPoint("class", readmetester.Plugin),
+                _EntryPoint("broken", ImportError("No module named 'x'")),
+                _EntryPoint("instance", plugin),
+            ]
+        ),
+    )
+    readmetester._plugins.load_plugins.cache_clear()
+    try:
+        with pytest.warns(RuntimeWarning) as record:
+            plugins = readmetester._plugins.load_plugins()
+    finally:
+        readmetester._plugins.load_plugins.cache_clear()
+
+    assert isinstance(plugins[0], readmetester.Plugin)
+    assert plugins[1] is plugin
+    assert len(plugins) == 2
+    assert str(record[0].message) == (
+        "failed to load plugin broken: No module named 'x'"
+    )
+
+
+def test_pipeline(
+    tmp_path: Path,
+    main: MockMainType,
+    make_readme: MakeReadmeType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test an error only stops the README it is raised for.
+
+    A README which exits stops the run, as it would if tested alone.
+
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    invalid = tmp_path / "INVALID.rst"
+    invalid.write_text("Title\n===\n", encoding="utf-8")
+    template = templatest.templates.registered.getbyname("simple")
+    readme = make_readme(template.template)
+    with pytest.raises(readmetester.exceptions.SyntaxDocumentError):
+        main(str(invalid), str(readme), "--verbose")
+
+    assert nocolorcapsys.stdout().strip() == template.expected
+
+    # a README which exits stops the run, unless it exits successfully
+    exits = tmp_path / "EXITS.rst"
+    exits.write_text(
+        "\n.. code-block:: python\n\n    >>> raise SystemExit(3)\n\n",
+        encoding="utf-8",
+    )
+    with pytest.raises(SystemExit) as err:
+        main(str(exits), str(readme))
+
+    assert err.value.code == 3
+    assert "Success!" not in nocolorcapsys.stdout()
+
+    # a path to test is given the default settings
+    readmetester.main(readme)
+    assert "Success!" in nocolorcapsys.stdout()
+
+
+def test_lint_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, main: MockMainType
+) -> None:
+    """Test READMEs are only linted again if they changed.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    """
+    monkeypatch.chdir(tmp_path)
+    template = templatest.templates.registered.getbyname("simple")
+    readme = tmp_path / "README.rst"
+    invalid = tmp_path / "INVALID.rst"
+    included = tmp_path / "INCLUDED.rst"
+    lint = tmp_path / ".readmetester_cache" / "lint"
+    readme.write_text(template.template, encoding="utf-8")
+    invalid.write_text("Title\n===\n", encoding="utf-8")
+    included.write_text("Title\n=====\n", encoding="utf-8")
+    main(str(readme))
+    list(readmetester.run(readme))
+    list(readmetester.run(readme.read_text(encoding="utf-8")))
+    assert not lint.exists()
+    (tmp_path / "pyproject.toml").write_text(
+        "[tool.readmetester]\ncache = true\n", encoding="utf-8"
+    )
+    list(readmetester.run(readme))
+    assert not lint.exists()
+    main(str(readme))
+    with pytest.raises(readmetester.exceptions.SyntaxDocumentError) as err:
+        main(str(invalid))
+
+    assert len(list(lint.iterdir())) == 2
+
+    def _lint(*_: Any) -> None:
+        raise AssertionError("linted again")
+
+    monkeypatch.setattr("restructuredtext_lint.lint", _lint)
+    main(str(readme))
+    with pytest.raises(readmetester.exceptions.SyntaxDocumentError) as cached:
+        main(str(invalid))
+
+    assert str(cached.value) == str(err.value)
+    readme.write_text(
+        f"{template.template}\n.. include:: INCLUDED.rst\n", encoding="utf-8"
+    )
+    with pytest.raises(AssertionError, match="linted again"):
+        main(str(readme))
+
+    monkeypatch.undo()
+    monkeypatch.chdir(tmp_path)
+    main(str(readme))
+    monkeypatch.setattr("restructuredtext_lint.lint", _lint)
+    main(str(readme))
+    included.write_text("Title\n===\n", encoding="utf-8")
+    with pytest.raises(AssertionError, match="linted again"):
+        main(str(readme))
+
+
+def test_lint_cache_store(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test results of linting are evicted, and read if read-only.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    """
+    cache = readmetester._store.LintCache(tmp_path / "lint", size=2)
+    with pytest.raises(KeyError):
+        _ = cache["first"]
+
+    cache["first"] = None
+    cache["second"] = "error"
+    os.utime(tmp_path / "lint" / "first", (0, 0))
+    assert cache["second"] == "error"
+    cache["third"] = None
+    with pytest.raises(KeyError):
+        _ = cache["first"]
+
+    def _utime(*_: Any) -> None:
+        raise PermissionError
+
+    monkeypatch.setattr("readmetester._store._os.utime", _utime)
+    assert cache["second"] == "error"
+    assert cache["third"] is None
+    readonly = readmetester._store.LintCache(tmp_path / "lint" / "third")
+    readonly["fourth"] = "error"
+    with pytest.raises(KeyError):
+        _ = readonly["fourth"]
+
+
+def test_includes(tmp_path: Path) -> None:
+    """Test lint results depend on each file included once.
+
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    """
+    readme = tmp_path / "README.rst"
+    included = tmp_path / "INCLUDED.rst"
+    included.write_text(".. include:: README.rst\n", encoding="utf-8")
+    content = (
+        ".. include:: <isonum.txt>\n"
+        ".. include:: INCLUDED.rst\n"
+        ".. include:: INCLUDED.rst\n"
+        ".. include:: MISSING.rst\n"
+    )
+    readme.write_text(content, encoding="utf-8")
+    assert readmetester._assert._includes(readme, content) == [
+        f"{included}\0.. include:: README.rst\n",
+        str(tmp_path / "MISSING.rst"),
+        f"{readme}\0{content}",
+    ]
+
+
+def test_lint_worker(tmp_path: Path) -> None:
+    """Test READMEs are linted in workers, merged if the run is traced.
+
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    """
+    readme = tmp_path / "README.rst"
+    readme.write_text("Title\n===\n", encoding="utf-8")
+    message, events = _main._lint(str(readme), True)
+    assert message is not None and "too short for the title" in message
+    assert [i["name"] for i in events if i["ph"] == "X"] == ["lint"]
+    assert not readmetester._trace.tracer.enabled
+    assert _main._lint(str(readme), False) == (message, [])
+
+    # events of workers are only merged if the run is traced
+    readmetester._trace.tracer.merge(events)
+    readmetester._trace.tracer.record("lint", "lint", 0, 1)
+    assert not readmetester._trace.tracer.collect()
+    readmetester._trace.tracer.enable()
+    readmetester._trace.tracer.merge(events)
+    assert readmetester._trace.tracer.collect() == events
+
+
+def test_highlighter(tmp_path: Path) -> None:
+    """Test builtin highlighter is used without importing pygments.
+
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    """
+    template = templatest.templates.registered.getbyname("simple")
+    (tmp_path / "README.rst").write_text(template.template, encoding="utf-8")
+    (tmp_path / "pyproject.toml").write_text(
+        '[tool.readmetester]\nhighlighter = "builtin"\ncache = true\n',
+        encoding="utf-8",
+    )
+    command = [
+        sys.executable,
+        "-c",
+        "import sys, readmetester; "
+        "sys.argv = ['readmetester', '--verbose', 'README.rst']; "
+        "readmetester.main(); "
+        "print('pygments' in sys.modules)",
+    ]
+    env = dict(
+        os.environ, PYTHONPATH=str(Path(readmetester.__file__).parent.parent)
+    )
+
+    # the first run lints README, which is then cached
+    for _ in range(2):
+        output = subprocess.run(
+            command,
+            cwd=tmp_path,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    assert '\x1b[38;5;124m"Hello, world!"\x1b[39m' in output
+    assert "False" in output.splitlines()
+    assert (
+        readmetester._config.Config(
+            tmp_path / "pyproject.toml", highlighter="builtin"
+        ).highlight
+        is readmetester._highlight.highlight_builtin
+    )
+    with pytest.raises(ValueError) as err:
+        readmetester._config.Config(
+            tmp_path / "pyproject.toml", highlighter="unknown"
+        ).highlight("value")
+
+    assert str(err.value) == "unknown highlighter: unknown"
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("value", "value"),
+        ("if x:", "\x1b[38;5;28mif\x1b[39m x:"),
+        (
+            "x = 1  # comment",
+            "x = \x1b[38;5;241m1\x1b[39m  \x1b[38;5;65m# comment\x1b[39m",
+        ),
+        ('print("a"', 'print(\x1b[38;5;124m"a"\x1b[39m'),
+        ('x = """a\nb"""', 'x = \x1b[38;5;124m"""a\nb"""\x1b[39m'),
+        ("x\nif", "x\nif"),
+    ],
+    ids=["plain", "keyword", "number", "incomplete", "multiline", "second"],
+)
+def test_highlight_builtin(value: str, expected: str) -> None:
+    """Test builtin highlighter highlights the first line of a command.
+
+    :param value: Line to highlight.
+    :param expected: Expected highlighted line.
+    """
+    assert readmetester._highlight.highlight_builtin(value) == expected
+
+
+def test_diff() -> None:
+    """Test diff of output is bounded when most of it differs."""
+    expected = [str(i) for i in range(100000)]
+    actual = list(expected)
+    actual[50000] = "50001"
+    diff = readmetester._diff.unified(expected, actual).splitlines()
+    assert diff == [
+        "--- expected",
+        "+++ actual",
+        "@@ -49998,7 +49998,7 @@",
+        " 49997",
+        " 49998",
+        " 49999",
+        "-50000",
+        "+50001",
+        "?    ^",
+        " 50001",
+        " 50002",
+        " 50003",
+    ]
+    diff = readmetester._diff.unified(expected, expected[::-1]).splitlines()
+    assert diff[2] == "@@ -1,100000 +1,100000 @@"
+    assert diff[3:5] == ["-0", "-1"]
+    assert diff[-1] == "... 199941 more lines"
+
+    # lines which match between those that differ are still matched,
+    # and a line which only extends another is marked where it does
+    diff = readmetester._diff.unified(["a", "b", "c"], ["ab", "b", "d"])
+    assert diff.splitlines()[3:] == ["-a", "+ab", "? ^", " b", "-c", "+d"]
+
+    # lines are cut short, as is the header of the error
+    long = 300 * "x"
+    diff = readmetester._diff.unified([long], [f"{long}y"])
+    assert diff.splitlines()[4] == f"+{199 * 'x'}..."
+    with pytest.raises(readmetester.exceptions.OutputNotEqualError) as err:
+        readmetester._assert.equality(f"{long}y", long, "code-block 1")
+
+    assert str(err.value) == f"code-block 1: {200 * 'x'}... != {200 * 'x'}..."
+
+
+def test_shard(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    main: MockMainType,
+    make_readme: MakeReadmeType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test chains of code-blocks are partitioned between shards.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    readme = make_readme(
+        """
+.. code-block:: python
+
+    >>> n = 1
+
+.. code-block:: python
+
+    >>> print(n)
+    1
+
+.. code-block:: python
+
+    >>> print("Hello, world!")
+    Hello, world!
+
+.. code-block:: python
+
+    >>> m = [
+    ...     1,
+    ... ]
+    >>> print(m)
+    [1]
+"""
+    )
+    monkeypatch.chdir(tmp_path)
+    reports = [tmp_path / f"report-{i}.json" for i in (1, 2)]
+    durations = tmp_path / "durations.json"
+    for _ in range(2):
+        # first partitioned by lines, then by the durations recorded by
+        # a run which was not sharded
+        shards = []
+        for count, report in enumerate(reports, 1):
+            main(
+                str(readme),
+                "--shard",
+                f"{count}/2",
+                "--report",
+                str(report),
+                "--durations",
+                str(durations),
+            )
+            content = json.loads(report.read_text(encoding="utf-8"))
+            assert content["shard"] == {"index": count, "count": 2}
+            shards.append(
+                {
+                    i["code_block"]
+                    for d in content["documents"]
+                    for i in d["results"]
+                }
+            )
+
+        assert all(shards)
+        assert not shards[0] & shards[1]
+        assert {"code-block 1", "code-block 2"} in (
+            shards[0] & {"code-block 1", "code-block 2"},
+            shards[1] & {"code-block 1", "code-block 2"},
+        )
+        main(str(readme), "--durations", str(durations))
+        assert len(json.loads(durations.read_text(encoding="utf-8"))) == 4
+
+    # durations are only recorded to a file shared between shards, and
+    # storing them does not fail a run
+    main(str(readme), "--durations", str(readme / "durations.json"))
+    assert not (tmp_path / ".readmetester_cache" / "durations.json").exists()
+    merged = readmetester.merge_reports(reports)
+    assert [i["code_block"] for i in merged["documents"][0]["results"]] == [
+        "code-block 1",
+        "code-block 2",
+        "code-block 3",
+        "code-block 4",
+    ]
+    for shard in ("3/2", "one/2"):
+        with pytest.raises(SystemExit):
+            main(str(readme), "--shard", shard)
+
+        assert f"invalid shard: {shard}" in nocolorcapsys.readouterr()[1]
+
+
+def test_last_failed(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    main: MockMainType,
+    make_readme: MakeReadmeType,
+) -> None:
+    """Test code-blocks which failed are tested first, or only.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    """
+    monkeypatch.chdir(tmp_path)
+    template = """
+.. code-block:: python
+
+    >>> n = 1
+
+.. code-block:: python
+
+    >>> print(n)
+    1
+
+.. code-block:: python
+
+    >>> print("Hello, world!")
+    Hello, world!
+
+.. code-block:: python
+
+    >>> print(n + 1)
+    {}
+"""
+    passing = tmp_path / "PASSING.rst"
+    passing.write_text(template.format(2), encoding="utf-8")
+    readme = make_readme(template.format(3))
+    report = tmp_path / "report.json"
+    lastfailed = tmp_path / ".readmetester_cache" / "lastfailed.json"
+
+    def _tested(*args: str) -> List[Any]:
+        try:
+            main(*args, "--report", str(report))
+        except readmetester.exceptions.OutputNotEqualError:
+            pass
+
+        return [
+            (Path(d["file"]).name, [i["code_block"] for i in d["results"]])
+            for d in json.loads(report.read_text(encoding="utf-8"))[
+                "documents"
+            ]
+        ]
+
+    _tested(str(passing), str(readme))
+    assert not lastfailed.exists()
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(
+        "[tool.readmetester]\ncache = true\n", encoding="utf-8"
+    )
+    _tested(str(passing), str(readme))
+    pyproject.unlink()
+    assert json.loads(lastfailed.read_text(encoding="utf-8")) == {
+        str(readme): [3]
+    }
+    assert _tested(str(passing), str(readme), "--ff") == [
+        ("README.rst", [f"code-block {i}" for i in (1, 2, 3, 4)]),
+        ("PASSING.rst", [f"code-block {i}" for i in (1, 2, 3, 4)]),
+    ]
+    make_readme(template.format(2))
+    assert _tested(str(passing), str(readme), "--lf") == [
+        ("README.rst", ["code-block 1", "code-block 4"])
+    ]
+    assert json.loads(lastfailed.read_text(encoding="utf-8")) == {}
+
+    # like pytest, everything is tested if nothing failed
+    assert _tested(str(passing), str(readme), "--lf") == [
+        ("PASSING.rst", [f"code-block {i}" for i in (1, 2, 3, 4)]),
+        ("README.rst", [f"code-block {i}" for i in (1, 2, 3, 4)]),
+    ]
+
+    # READMEs which no longer exist are forgotten
+    removed = tmp_path / "REMOVED.rst"
+    removed.write_text(template.format(3), encoding="utf-8")
+    _tested(str(removed), "--ff")
+    assert str(removed) in json.loads(lastfailed.read_text(encoding="utf-8"))
+    removed.unlink()
+    _tested(str(passing), "--ff")
+    assert json.loads(lastfailed.read_text(encoding="utf-8")) == {}
+
+
+def test_discover(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    main: MockMainType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test documents are discovered with the config of their package.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    monkeypatch.chdir(tmp_path)
+    template = templatest.templates.registered.getbyname("simple")
+    normalized = """
+.. code-block:: python
+
+    >>> print("build-123")
+    build-<n>
+"""
+    files = {
+        ".gitignore": "# generated\nbuild/\n\n*.tmp.rst\n",
+        "README.rst": template.template,
+        "notes.tmp.rst": normalized,
+        "build/README.rst": normalized,
+        ".git/README.rst": normalized,
+        "packages/a/pyproject.toml": (
+            '[tool.readmetester.patterns]\n"build-\\\\d+" = "build-<n>"\n'
+        ),
+        "packages/a/README.rst": normalized,
+        "packages/a/docs/guide.rst": normalized,
+        "packages/b/README.rst": normalized,
+        "packages/c/.gitignore": "*.rst\n!keep.rst\n",
+        "packages/c/keep.rst": template.template,
+        "packages/c/other.rst": normalized,
+    }
+    for name, content in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    paths = readmetester._discover.discover(tmp_path, ["packages/b"])
+    assert [i.relative_to(tmp_path).as_posix() for i in paths] == [
+        "README.rst",
+        "packages/a/README.rst",
+        "packages/a/docs/guide.rst",
+        "packages/c/keep.rst",
+    ]
+    assert not readmetester._discover.discover(tmp_path / "missing")
+    configs = readmetester._discover.configs(paths)
+    assert configs[str(paths[1])] is configs[str(paths[2])]
+    assert configs[str(paths[0])] is configs[str(paths[3])]
+    assert configs[str(paths[0])] is not configs[str(paths[1])]
+    main("discover", str(tmp_path), "--exclude", "packages/b")
+    assert nocolorcapsys.stdout().count("Success!") == 4
+    with pytest.raises(readmetester.exceptions.OutputNotEqualError):
+        main("discover", str(tmp_path))
+
+    # only the first positional argument starts discovery
+    (tmp_path / "discover").write_text(template.template, encoding="utf-8")
+    main("./discover")
+    assert "Success!" in nocolorcapsys.stdout()
+    for option in ("--package", "--interpreters"):
+        with pytest.raises(SystemExit):
+            main("discover", option, "value")
+
+        assert (
+            f"discover cannot be used with {option}"
+            in nocolorcapsys.readouterr()[1]
+        )
+    with pytest.raises(SystemExit):
+        main("discover", str(tmp_path), str(tmp_path))
+
+    assert "discover takes one root" in nocolorcapsys.readouterr()[1]
+
+
+@pytest.mark.parametrize(
+    "pattern,matches,other",
+    [
+        ("*.rst", ["README.rst", ".rst"], ["docs/README.rst"]),
+        ("**/build", ["build", "a/b/build"], ["build/a", "abuild"]),
+        ("docs/**", ["docs/a", "docs/a/b.rst"], ["doc/a"]),
+        ("a/**/b", ["a/b", "a/x/y/b"], ["a/xb"]),
+        ("file?.rst", ["file1.rst"], ["file.rst", "file/.rst"]),
+        ("file[0-9].rst", ["file1.rst"], ["filea.rst"]),
+        ("file[!0-9].rst", ["filea.rst"], ["file1.rst"]),
+        ("[].rst", ["[].rst"], ["a.rst"]),
+        ("a+b.rst", ["a+b.rst"], ["aab.rst"]),
+    ],
+)
+def test_translate(pattern: str, matches: List[str], other: List[str]) -> None:
+    """Test globs of gitignore are translated to regular expressions.
+
+    :param pattern: Glob to translate.
+    :param matches: Paths matching glob.
+    :param other: Paths not matching glob.
+    """
+    regex = readmetester._discover._translate(pattern)
+    assert all(re.fullmatch(regex, i) for i in matches)
+    assert not any(re.fullmatch(regex, i) for i in other)
+
+
+def test_sphinx(tmp_path: Path) -> None:
+    """Test code-blocks are tested from doctrees Sphinx has read.
+
+    Failures are reported at the command which failed, past the options
+    of the directive.
+
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    """
+    application = pytest.importorskip("sphinx.application")
+    template = templatest.templates.registered.getbyname(
+        "err-output-not-equal"
+    )
+    (tmp_path / "conf.py").write_text(
+        'extensions = ["readmetester.sphinx"]\n', encoding="utf-8"
+    )
+    (tmp_path / "index.rst").write_text(
+        f"Title\n=====\n{template.template}"
+        ".. code-block:: python\n"
+        "    :caption: Caption\n"
+        "    :linenos:\n"
+        "\n"
+        "    >>> x = 1\n"
+        "    >>> x / 0\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "other.rst").write_text("Other\n=====\n", encoding="utf-8")
+    (tmp_path / "invalid.rst").write_text(
+        "Invalid\n=======\n\n.. code-block:: python\n\n    >>> 1 +\n",
+        encoding="utf-8",
+    )
+    warning = io.StringIO()
+    app = application.Sphinx(
+        str(tmp_path),
+        str(tmp_path),
+        str(tmp_path / "_build"),
+        str(tmp_path / "_build" / ".doctrees"),
+        "html",
+        status=None,
+        warning=warning,
+    )
+    app.build()
+    assert (
+        f"{tmp_path / 'index.rst'}:8: WARNING: {template.expected}"
+        in warning.getvalue()
+    )
+    assert (
+        f"{tmp_path / 'index.rst'}:16: WARNING: division by zero"
+        in warning.getvalue()
+    )
+    assert (
+        f"{tmp_path / 'invalid.rst'}: WARNING: code-block 1: line 6: invalid"
+        in warning.getvalue()
+    )
+    assert f"{tmp_path / 'other.rst'}: WARNING: code" not in warning.getvalue()
+
+
+def test_batched_error(
+    main: MockMainType,
+    make_readme: MakeReadmeType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test failure of batched commands is shown at the one which raised.
+
+    :param main: Patch package entry point.
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    readme = make_readme(
+        """
+.. code-block:: python
+
+    >>> a = 1
+    >>> print(a)
+    >>> b = 2
+    >>> c = 1 / 0
+    >>> print(b)
+    1
+    2
+
+"""
+    )
+    with pytest.raises(ZeroDivisionError):
+        main(str(readme))
+
+    assert (
+        nocolorcapsys.stdout()
+        == f"""\
+code-block 1
+. >>> a = 1
+. >>> print(a)
+{CHECK} 1
+. >>> b = 2
+. >>> c = 1 / 0
+{CROSS}\
+"""
+    )
+
+
+def test_process_not_compiled() -> None:
+    """Test a command which was not compiled is not silently skipped."""
+    readme = readmetester._core.Readme()
+    readme.add_block([">>> print(1)", "1"], 3)
+    readme.compile("<string>")
+    holder = readmetester._holder.Holder(readmetester._config.load_config())
+    with readmetester._exec.Namespace() as namespace:
+        _main._process(
+            readme[0], holder, readme.compiled, namespace, _main._NO_HOOKS
+        )
+        assert list(holder.actual) == ["1"]
+        with pytest.raises(RuntimeError) as err:
+            _main._process(readme[0], holder, {}, namespace, _main._NO_HOOKS)
+
+    assert str(err.value) == "command on line 3 was not compiled"
+
+
+def test_run_blocks(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test code-blocks taken from a document parsed some other way.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    """
+    monkeypatch.chdir(tmp_path)
+    blocks = [
+        ([">>> print(1)", "1"], 5),
+        ([">>> print(2)", "3"], 10),
+        ([">>> print(4)", "4", "", ">>> print(5)", "6"], 15),
+    ]
+    results = list(readmetester.run_blocks(blocks, "index.rst"))
+    assert [(i.code_block, i.lineno, i.status) for i in results] == [
+        ("code-block 1", 5, "passed"),
+        ("code-block 2", 10, "failed"),
+        ("code-block 3", 15, "failed"),
+    ]
+    assert str(results[1].error).startswith("code-block 2: 3 != 2")
+
+    # a blank line does not end a code-block the document has ended
+    assert str(results[2].error).startswith("code-block 3: 6 != 5")
+
+
+def test_package(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    main: MockMainType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test docstring examples of a package.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("VALUE", "1")
+    package = tmp_path / "package"
+    package.mkdir()
+    (package / "__init__.py").write_text(
+        '"""Package.\n\n>>> import os\n>>> print(os.environ["VALUE"])\n1\n"""\n',
+        encoding="utf-8",
+    )
+    module = package / "module.py"
+    template = '''"""Module."""
+
+
+class Class:
+    def method(self) -> None:
+        """Method.
+
+        >>> print("Hello, world!")
+        {}
+
+        Not an example.
+        """
+'''
+    module.write_text(template.format("Goodbye, world..."), encoding="utf-8")
+    with pytest.raises(readmetester.exceptions.DocumentError) as err:
+        main("--package", "package")
+
+    header = f"{module}:6: package.module.Class.method"
+    assert str(err.value) == f"1 docstrings failed: {header}"
+    output = nocolorcapsys.stdout()
+    assert header in output
+    assert "code-block 1: Goodbye, world... != Hello, world!" in output
+    assert '>>> print("Hello, world!")' in output
+    module.write_text(template.format("Hello, world!"), encoding="utf-8")
+    main("--package", "package")
+    assert "Success!" in nocolorcapsys.stdout()
+
+    # modules which passed, and have not changed, are skipped
+    monkeypatch.setenv("VALUE", "2")
+    main("--package", "package")
+    assert "Success!" in nocolorcapsys.stdout()
+    with pytest.raises(ModuleNotFoundError):
+        main("--package", "package.missing")
+
+
+def test_package_module() -> None:
+    """Test docstrings of a module in this process, as a worker would."""
+    source = '''"""Module.
+
+>>> print(1)
+2
+"""
+
+
+def function() -> None:
+    """Function.
+
+    >>> 1 +
+    """
+'''
+    failures = dict(_main._test_module(source, "module", "module.py"))
+    assert list(failures) == [
+        "module.py:1: module",
+        "module.py:9: module.function",
+    ]
+    assert "code-block 1: 2 != 1" in failures["module.py:1: module"]
+    assert failures["module.py:9: module.function"].startswith(
+        "code-block 1: line 11: invalid syntax"
+    )
+
+
+def test_package_sources(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test docstring examples are found without importing a package.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = tmp_path / "module.py"
+    source = '''"""Module.
+
+>>> print(1)
+1
+>>> print(2)
+2
+
+Between.
+
+    >>> print(3)
+    3
+"""
+
+
+async def function() -> None:
+    """Function."""
+
+
+class Class:
+    value = 1
+
+    def method(self) -> None:
+        """Method.
+
+        >>> print(4)
+        4"""
+'''
+    module.write_text(source, encoding="utf-8")
+    assert _package.sources("module") == [("module", module)]
+    docstrings = _package.docstrings(source, "module", str(module))
+    assert [(q, n) for q, n, _ in docstrings] == [
+        ("module", 1),
+        ("module.function", 16),
+        ("module.Class.method", 23),
+    ]
+    assert list(_package.examples(docstrings[0][2], 1)) == [
+        ([">>> print(1)", "1", ">>> print(2)", "2"], 3),
+        (["    >>> print(3)", "    3"], 10),
+    ]
+    assert not list(_package.examples(docstrings[1][2], 16))
+    assert list(_package.examples(docstrings[2][2], 23)) == [
+        (["        >>> print(4)", "        4"], 25)
+    ]
+
+    # options are passed to the config of each worker
+    options = []
+    load_config = _main._load_config
+
+    def _load_config(**kwargs: Any) -> Any:
+        options.append(kwargs)
+        return load_config(**kwargs)
+
+    monkeypatch.setattr(_main, "_load_config", _load_config)
+    assert not _main._test_module(source, "module", str(module))
+    assert not _main._test_module(
+        source, "module", str(module), {"isolate": True}
+    )
+    assert options == [{}, {"isolate": True}]
+
+
+def test_console(
+    make_readme: MakeReadmeType,
+    main: MockMainType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test console blocks are run concurrently when enabled.
+
+    :param make_readme: Create a README.rst file in the temp dir
+        containing the provided ``str``.
+    :param main: Patch package entry point.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    text = """
+.. code-block:: python
+
+    >>> print("Hello, world!")
+    Hello, world!
+
+.. code-block:: console
+
+    $ sleep 1 && echo "Hello, world!"
+    Hello, world!
+    $ touch file && ls
+    file
+
+.. code-block:: console
+
+    $ sleep 1 && echo Hello, \\
+    world!
+    Hello, world!
+
+.. code-block:: console
+
+    $ echo Goodbye, world...
+    Hello, world!
+
+.. code-block:: console
+
+    $ sleep 5
+
+.. code-block:: console
+
+    $ false
+    $ echo Hello, world!
+    Hello, world!
+
+.. code-block:: console
+    :returncode: 1
+
+    $ true
+    $ false
+"""
+    assert len(list(readmetester.run(text))) == 1
+    start = time.perf_counter()
+    results = list(
+        readmetester.run(text, console=True, console_timeout=2, console_jobs=4)
+    )
+    assert time.perf_counter() - start < 4
+    assert [(i.code_block, i.lineno, i.status) for i in results] == [
+        ("code-block 1", 4, "passed"),
+        ("console-block 1", 9, "passed"),
+        ("console-block 2", 16, "passed"),
+        ("console-block 3", 22, "failed"),
+        ("console-block 4", 27, "failed"),
+        ("console-block 5", 31, "failed"),
+        ("console-block 6", 38, "passed"),
+    ]
+    assert str(results[3].error).startswith(
+        "console-block 3: Hello, world! != Goodbye, world..."
+    )
+    assert str(results[4].error) == (
+        "console-block 4: command `sleep 5` timed out after 2.0 s"
+    )
+    assert str(results[5].error) == (
+        "console-block 5: command `false` exited with 1"
+    )
+    with pytest.raises(readmetester.exceptions.SyntaxDocumentError) as err:
+        list(
+            readmetester.run(
+                ".. code-block:: console\n    :returncode: no\n\n    $ true\n",
+                console=True,
+            )
+        )
+
+    assert str(err.value) == "console-block 1: invalid returncode: no"
+    with pytest.raises(readmetester.exceptions.SyntaxDocumentError) as err:
+        list(
+            readmetester.run(
+                ".. code-block:: console\n"
+                "    :max-time: 1s\n"
+                "    :repeat: 3\n"
+                "\n"
+                "    $ true\n",
+                console=True,
+            )
+        )
+
+    assert str(err.value) == (
+        "console-block 1: max-time is not supported\n"
+        "console-block 1: repeat is not supported"
+    )
+    readme = make_readme(
+        ".. code-block:: console\n\n    $ echo Hello, world!\n    Hello, world!\n"
+    )
+    main(str(readme), "--console", "--verbose")
+    assert (
+        f"$ echo Hello, world!\n{CHECK} Hello, world!"
+        in nocolorcapsys.stdout()
+    )
+
+
+def test_interpreters(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    main: MockMainType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test README under several interpreters at the same time.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    monkeypatch.chdir(tmp_path)
+    interpreter = tmp_path / "interpreter"
+    interpreter.symlink_to(sys.executable)
+    readme = tmp_path / "README.rst"
+    readme.write_text(
+        f"""
+.. code-block:: python
+
+    >>> print("Hello, world!")
+    Hello, world!
+
+.. code-block:: python
+
+    >>> import sys
+    >>> print(sys.executable == "{interpreter}")
+    False
+""",
+        encoding="utf-8",
+    )
+    report = tmp_path / "report.json"
+    with pytest.raises(FileNotFoundError) as err:
+        main(str(readme), "--interpreters", f"{sys.executable},missing")
+
+    assert str(err.value) == "interpreter not found: missing"
+    with pytest.raises(SystemExit):
+        main(str(readme), "--interpreters", ",")
+
+    assert "invalid interpreters: ," in nocolorcapsys.readouterr()[1]
+    main(str(readme), "--interpreters", sys.executable)
+    assert SUCCESS in nocolorcapsys.stdout()
+    with pytest.raises(readmetester.exceptions.DocumentError) as err:
+        main(
+            str(readme),
+            "--interpreters",
+            f"{sys.executable},{interpreter}",
+            "--report",
+            str(report),
+        )
+
+    assert str(err.value).startswith(
+        f"1 failed: {interpreter}: code-block 2: False != True"
+    )
+    rows = [i.split() for i in nocolorcapsys.stdout().splitlines()]
+    assert ["code-block", "1", "passed", "passed"] in rows
+    assert ["code-block", "2", "passed", "failed", "diverges"] in rows
+    matrix = json.loads(report.read_text(encoding="utf-8"))
+    assert list(matrix["interpreters"]) == [sys.executable, str(interpreter)]
+    rows = matrix["documents"][0]["rows"]
+    assert [(i["code_block"], i["diverges"]) for i in rows] == [
+        ("code-block 1", False),
+        ("code-block 2", True),
+    ]
+    assert rows[1]["results"][str(interpreter)]["actual"] == ["True"]
+
+    # an interpreter without the dependencies is reported as an error,
+    # and the others are still compared
+    broken = tmp_path / "broken"
+    broken.write_text(
+        "#!/bin/sh\n"
+        "echo \"ModuleNotFoundError: No module named 'x'\" >&2\n"
+        "exit 1\n",
+        encoding="utf-8",
+    )
+    broken.chmod(0o755)
+    with pytest.raises(readmetester.exceptions.DocumentError) as err:
+        main(
+            str(readme),
+            "--interpreters",
+            f"{sys.executable},{broken}",
+            "--report",
+            str(report),
+        )
+
+    error = "exited with 1: ModuleNotFoundError: No module named 'x'"
+    assert str(err.value) == f"1 failed: {broken}: {error}"
+    assert f"{broken}: {error}" in nocolorcapsys.stdout()
+    matrix = json.loads(report.read_text(encoding="utf-8"))
+    assert matrix["interpreters"][str(broken)]["error"] == error
+    rows = matrix["documents"][0]["rows"]
+    assert not any(i["diverges"] for i in rows)
+    assert list(rows[0]["results"]) == [sys.executable]
+    invalid = tmp_path / "INVALID.rst"
+    invalid.write_text("Title\n===\n", encoding="utf-8")
+    unexecutable = tmp_path / "unexecutable"
+    unexecutable.write_text("", encoding="utf-8")
+    matrix = readmetester._matrix.matrix(
+        {"python": sys.executable, "unexecutable": str(unexecutable)},
+        [str(invalid)],
+        {},
+    )
+    assert matrix["interpreters"]["unexecutable"]["error"].startswith(
+        "[Errno 13] Permission denied"
+    )
+    assert "python: Possible title underline" in readmetester._matrix.render(
+        matrix
+    )
+
+
+def test_worker(tmp_path: Path) -> None:
+    """Test worker writes the result of each code-block of READMEs.
+
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    """
+    template = templatest.templates.registered.getbyname("simple")
+    readme = tmp_path / "README.rst"
+    invalid = tmp_path / "INVALID.rst"
+    output = tmp_path / "results.json"
+    readme.write_text(template.template, encoding="utf-8")
+    invalid.write_text("Title\n===\n", encoding="utf-8")
+    _worker.work(str(output), "{}", [str(readme), str(invalid)])
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert results["version"] == platform.python_version()
+    assert [i["file"] for i in results["documents"]] == [
+        str(readme),
+        str(invalid),
+    ]
+    assert results["documents"][0] == {
+        "file": str(readme),
+        "error": None,
+        "results": [
+            {
+                "code_block": "code-block 1",
+                "lineno": 4,
+                "status": "passed",
+                "actual": ["Hello, world!"],
+                "error": None,
+            }
+        ],
+    }
+    assert results["documents"][1]["error"].startswith(
+        "Possible title underline, too short for the title."
+    )
+
+
+def test_isolate(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    main: MockMainType,
+    nocolorcapsys: NoColorCapsys,
+) -> None:
+    """Test the state of the interpreter is restored after each README.
+
+    :param monkeypatch: Mock patch environment and attributes.
+    :param tmp_path: Fixture for creating and returning temporary
+        directory.
+    :param main: Patch package entry point.
+    :param nocolorcapsys: Capture system output while stripping ANSI
+        color codes.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("VALUE", raising=False)
+    monkeypatch.setenv("CHANGED", "0")
+    replaced = types.ModuleType("replaced")
+    monkeypatch.setitem(sys.modules, "replaced", replaced)
+    (tmp_path / "module.py").write_text("VALUE = 1\n", encoding="utf-8")
+    (tmp_path / "directory").mkdir()
+    first = tmp_path / "first.rst"
+    first.write_text(
+        f"""
+.. code-block:: python
+
+    >>> import atexit
+    >>> import os
+    >>> import sys
+    >>> sys.path.insert(0, "{tmp_path}")
+    >>> import module
+    >>> os.environ["VALUE"] = "1"
+    >>> os.environ["CHANGED"] = "1"
+    >>> sys.modules["replaced"] = module
+    >>> os.chdir("directory")
+    >>> _ = atexit.register(print, "Goodbye, world...")
+    >>> print(module.VALUE)
+    1
+""",
+        encoding="utf-8",
+    )
+    second = tmp_path / "second.rst"
+    second.write_text(
+        """
+.. code-block:: python
+
+    >>> import os
+    >>> import sys
+    >>> print("module" in sys.modules, "VALUE" in os.environ)
+    False False
+    >>> print(os.path.basename(os.getcwd()) == "directory")
+    False
+""",
+        encoding="utf-8",
+    )
+    path = list(sys.path)
+    (tmp_path / "pyproject.toml").write_text(
+        "[tool.readmetester]\ncache = true\n", encoding="utf-8"
+    )
+    main(str(first), str(second), "--isolate")
+    assert "Goodbye, world..." in nocolorcapsys.stdout()
+    assert "module" not in sys.modules
+    assert "VALUE" not in os.environ
+    assert os.environ["CHANGED"] == "0"
+    assert sys.modules["replaced"] is replaced
+    assert sys.path == path
+    assert Path.cwd() == tmp_path
+    assert (tmp_path / ".readmetester_cache" / "lastfailed.json").is_file()
+    assert not (tmp_path / "directory" / ".readmetester_cache").exists()
+    assert readmetester._config.load_config().cache_dir.is_absolute()
@@ -11,6 +11,8 @@ import readmetester
 
 from . import MakeReadmeType, MockMainType, NoColorCapsys, PatchArgvType
 
+pytest_plugins = ["pytester"]
+
 
 @pytest.fixture(name="patch_argv")
 def fixture_patch_argv(monkeypatch: pytest.MonkeyPatch) -> PatchArgvType:
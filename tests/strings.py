@@ -4,4 +4,5 @@ tests.strings
 """
 SUCCESS = f"\n{80 * '-'}\nSuccess!"
 CHECK = "\u2713"
+CROSS = "\u2716"
 ERROR = "err"
@@ -536,6 +536,9 @@ code-block 1
 {CHECK} 0 zero
 {CHECK} 1 one
 {CHECK} 2 two
+
+code-block 2
+. >>> total = sum(range(1000))
 {SUCCESS}\
 """
 
@@ -635,7 +638,15 @@ class _ErrOutputNotEqual(BaseTemplate):
 
     @property
     def expected(self) -> str:
-        return "code-block 1: Hello, world! != Goodbye, world..."
+        return """\
+code-block 1: Hello, world! != Goodbye, world...
+--- expected
++++ actual
+@@ -1,2 +1,2 @@
+ Hello, world!
+-Hello, world!
++Goodbye, world...
+?^"""
 
 
 @templates.register
@@ -757,3 +768,142 @@ maximum 1 argument(s) allowed, 6 supplied.
     >>> print("Hello, world!")
     'Hello, world!'
 """
+
+
+@templates.register
+class _ErrCommandSyntax(BaseTemplate):
+    """Test all syntax errors are reported before anything runs."""
+
+    @property
+    def template(self) -> str:
+        return """
+.. code-block:: python
+
+    >>> print("Hello, world!")
+    'Hello, world!'
+    >>> x = = 1
+
+.. code-block:: python
+
+    >>> d = {
+    ...     "one": 1,
+    ...     "two": = 2,
+    ... }
+
+"""
+
+    @property
+    def expected(self) -> str:
+        return """\
+code-block 1: line 6: invalid syntax
+code-block 2: line 12: invalid syntax\
+"""
+
+
+@templates.register
+class _ErrTopLevelReturn(BaseTemplate):
+    """Test errors compiling batched commands are reported as syntax."""
+
+    @property
+    def template(self) -> str:
+        return """
+.. code-block:: python
+
+    >>> x = 1
+    >>> return x
+
+"""
+
+    @property
+    def expected(self) -> str:
+        return "code-block 1: line 5: 'return' outside function"
+
+
+@templates.register
+class _BatchedCommands(BaseTemplate):
+    """Test output of batched commands is attributed to each command."""
+
+    @property
+    def template(self) -> str:
+        return """
+.. code-block:: python
+
+    >>> a = 1
+    >>> print(a)
+    >>> b = 2
+    >>> print(b)
+    1
+    2
+
+"""
+
+    @property
+    def expected(self) -> str:
+        return f"""\
+code-block 1
+. >>> a = 1
+. >>> print(a)
+{CHECK} 1
+. >>> b = 2
+. >>> print(b)
+{CHECK} 2
+{SUCCESS}\
+"""
+
+
+@templates.register
+class _TopLevelAwait(BaseTemplate):
+    """Test commands can await at the top level."""
+
+    @property
+    def template(self) -> str:
+        return """
+.. code-block:: python
+
+    >>> import asyncio
+    >>> await asyncio.sleep(0)
+    >>> print("done")
+    done
+
+"""
+
+    @property
+    def expected(self) -> str:
+        return f"""\
+code-block 1
+. >>> import asyncio
+. >>> await asyncio.sleep(0)
+. >>> print("done")
+{CHECK} done
+{SUCCESS}\
+"""
+
+
+@templates.register
+class _FutureImport(BaseTemplate):
+    """Test future statements which do not start a code-block."""
+
+    @property
+    def template(self) -> str:
+        return """
+.. code-block:: python
+
+    >>> import os
+    >>> from __future__ import annotations
+    >>> def function(value: Undefined) -> None: pass
+    >>> print(function.__annotations__["value"])
+    Undefined
+
+"""
+
+    @property
+    def expected(self) -> str:
+        return f"""\
+code-block 1
+. >>> import os
+. >>> from __future__ import annotations
+. >>> def function(value: Undefined) -> None: pass
+. >>> print(function.__annotations__["value"])
+{CHECK} Undefined
+{SUCCESS}\
+"""
@@ -1,4 +1,6 @@
+_BatchedCommands  # unused class (tests/templates.py:786)
 _EndingDots  # unused class (tests/templates.py:67)
+_ErrCommandSyntax  # unused class (tests/templates.py:756)
 _ErrInvalidSyntax  # unused class (tests/templates.py:737)
 _ErrOutputExpected  # unused class (tests/templates.py:641)
 _ErrOutputNEMulti  # unused class (tests/templates.py:659)
@@ -19,16 +21,39 @@ _RecursiveExec  # unused class (tests/templates.py:577)
 _Simple  # unused class (tests/templates.py:14)
 _SimpleLineBreak  # unused class (tests/templates.py:38)
 _ThisReadme  # unused class (tests/templates.py:511)
-exc_tb  # unused variable (readmetester/_core.py:296)
-exc_tb  # unused variable (readmetester/_core.py:476)
+_TopLevelAwait  # unused class (tests/templates.py:825)
+after_command  # unused method (readmetester/_plugins.py:70)
+before_command  # unused method (readmetester/_plugins.py:61)
+exc_tb  # unused variable (readmetester/_core.py:1300)
+exc_tb  # unused variable (readmetester/_core.py:577)
+exc_tb  # unused variable (readmetester/_core.py:880)
+exc_tb  # unused variable (readmetester/_core.py:903)
+exc_tb  # unused variable (readmetester/_core.py:945)
 exc_tb  # unused variable (tests/__init__.py:85)
-exc_type  # unused variable (readmetester/_core.py:296)
-exc_type  # unused variable (readmetester/_core.py:476)
+exc_type  # unused variable (readmetester/_core.py:1300)
+exc_type  # unused variable (readmetester/_core.py:577)
+exc_type  # unused variable (readmetester/_core.py:880)
+exc_type  # unused variable (readmetester/_core.py:903)
+exc_type  # unused variable (readmetester/_core.py:945)
 exc_type  # unused variable (tests/__init__.py:85)
-exc_val  # unused variable (readmetester/_core.py:296)
-exc_val  # unused variable (readmetester/_core.py:476)
+exc_val  # unused variable (readmetester/_core.py:1300)
+exc_val  # unused variable (readmetester/_core.py:577)
+exc_val  # unused variable (readmetester/_core.py:880)
+exc_val  # unused variable (readmetester/_core.py:903)
+exc_val  # unused variable (readmetester/_core.py:945)
 exc_val  # unused variable (tests/__init__.py:85)
 fixture_main  # unused function (tests/conftest.py:30)
 fixture_make_readme  # unused function (tests/conftest.py:46)
 fixture_nocolorcapsys  # unused function (tests/conftest.py:63)
 fixture_patch_argv  # unused function (tests/conftest.py:15)
+on_assert  # unused method (readmetester/_plugins.py:84)
+on_block_start  # unused method (readmetester/_plugins.py:54)
+on_document_end  # unused method (readmetester/_plugins.py:97)
+on_document_start  # unused method (readmetester/_plugins.py:48)
+option_spec  # unused variable (readmetester/_assert.py:74)
+pytest_addoption  # unused function (readmetester/_pytest_plugin.py:27)
+pytest_collect_file  # unused function (readmetester/_pytest_plugin.py:45)
+pytest_plugins  # unused variable (tests/conftest.py:14)
+reportinfo  # unused method (readmetester/_pytest_plugin.py:120)
+repr_failure  # unused method (readmetester/_pytest_plugin.py:110)
+runtest  # unused method (readmetester/_pytest_plugin.py:96)